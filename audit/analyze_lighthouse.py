@@ -1,13 +1,15 @@
-import json
 import os
 import glob
 
+from crawler.jsonstream import LIGHTHOUSE_SKIP, load
+
 LIGHTHOUSE_DIR = "audit/lighthouse"
 SUMMARY_FILE = f"{LIGHTHOUSE_DIR}/summary.md"
 
 def analyze_report(filepath):
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+    # Screenshots and the other blobs the summary never reads are skipped unparsed
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = load(f, keys=('finalUrl', 'categories', 'audits'), skip=LIGHTHOUSE_SKIP)
 
     categories = data['categories']
     audits = data['audits']
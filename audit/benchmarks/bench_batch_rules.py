@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: page-by-page vs. batch (column mask) issue rules in process_audit.py.
+
+Usage: python audit/benchmarks/bench_batch_rules.py [--pages N]
+
+Builds a synthetic report of N pages with every shape the rules look at:
+- missing and short titles;
+- non-200 and missing status codes;
+- missing canonicals;
+- pages with and without JSON-LD (some using @graph, some with FAQPage);
+- reported issues.
+
+It times `page_findings()` over every page against one `batch_findings()`
+call, which evaluate the same `ISSUE_RULES` per page and as column masks,
+and checks that both produce the same issue rows and schema types.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+
+from process_audit import batch_findings, determine_page_type, page_findings  # noqa: E402
+
+BASE = "https://www.drsayuj.info"
+SECTIONS = ("services", "conditions", "locations", "blog", "appointments", "about")
+ISSUES = (
+    "Title too long",
+    "Missing meta description",
+    "Multiple H1 tags",
+    "Meta description too short",
+    "Missing H1",
+)
+
+
+def make_page(i: int, rnd: random.Random) -> Dict[str, Any]:
+    url = f"{BASE}/{rnd.choice(SECTIONS)}/page-{i}" if i else BASE
+    page: Dict[str, Any] = {"url": url}
+    roll = rnd.random()
+    if roll < 0.9:
+        page["statusCode"] = 200
+    elif roll < 0.98:
+        page["statusCode"] = rnd.choice((301, 404, 500))
+    title = rnd.choice((None, "", "Short title", "Brain & Spine Surgery in Hyderabad | Dr Sayuj Krishnan"))
+    if title is not None or rnd.random() < 0.5:
+        page["title"] = title
+    if rnd.random() < 0.9:
+        page["canonical"] = url if rnd.random() < 0.95 else ""
+    schema = rnd.random()
+    if schema < 0.4:
+        page["structuredData"] = [{"@context": "https://schema.org", "@type": "MedicalWebPage"},
+                                  {"@type": "FAQPage", "mainEntity": []}]
+    elif schema < 0.7:
+        page["structuredData"] = [{"@context": "https://schema.org",
+                                   "@graph": [{"@type": "Physician"}, {"@type": "WebPage"}]}]
+    elif schema < 0.8:
+        page["structuredData"] = []
+    page["issues"] = rnd.sample(ISSUES, rnd.choice((0, 0, 1, 2)))
+    return page
+
+
+def per_page(pages: List[Dict[str, Any]], p_types: List[str]) -> tuple:
+    onpage, tech, schema_types, schema = [], [], [], []
+    for page, p_type in zip(pages, p_types):
+        page_onpage, page_tech, types, page_schema = page_findings(page, p_type)
+        onpage.extend(page_onpage)
+        tech.extend(page_tech)
+        schema_types.append(types)
+        schema.extend(page_schema)
+    return onpage, tech, schema_types, schema
+
+
+def best_of(runs: int, fn, *args) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rnd = random.Random(5)
+    pages = [make_page(i, rnd) for i in range(args.pages)]
+    p_types = [determine_page_type(page["url"]) for page in pages]
+
+    loop_time, expected = best_of(args.runs, per_page, pages, p_types)
+    batch_time, result = best_of(args.runs, batch_findings, pages, p_types)
+    for name, want, got in zip(("onpage", "tech", "schema types", "schema"), expected, result):
+        assert want == got, f"{name} rows differ"
+
+    onpage, tech, _, schema = expected
+    print(f"{args.pages} pages: {len(onpage)} on-page, {len(tech)} tech, {len(schema)} schema issue rows\n")
+    print(f"page_findings() loop  {loop_time * 1000:8.1f} ms")
+    print(f"batch_findings()      {batch_time * 1000:8.1f} ms  {loop_time / batch_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
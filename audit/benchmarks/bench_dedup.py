@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: near-duplicate clustering, LSH index vs. pairwise comparison.
+
+Usage: python audit/benchmarks/bench_dedup.py [--pages N] [--families N]
+
+Generates N synthetic pages of which a share are templated families (one
+shared body with the location name swapped in every 20th word, like the
+/locations/* pages), computes their MinHash signatures with the page parser
+and clusters them twice: with `MinHashIndex` and by comparing every pair.
+Both must find the same clusters; the LSH index should need a tiny fraction
+of the comparisons.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+
+from crawler.dedup import DEFAULT_THRESHOLD, MinHashIndex, similarity  # noqa: E402
+from crawler.page import parse_html  # noqa: E402
+
+VOCABULARY = [f"word{i}" for i in range(20000)]
+
+
+def make_pages(count: int, families: int, family_size: int, rnd: random.Random) -> Dict[str, str]:
+    pages = {}
+    for f in range(families):
+        template = [rnd.choice(VOCABULARY) for _ in range(600)]
+        for member in range(family_size):
+            words = [f"area{f}x{member}" if i % 20 == 0 else w for i, w in enumerate(template)]
+            pages[f"/family-{f}/member-{member}"] = " ".join(words)
+    while len(pages) < count:
+        pages[f"/page-{len(pages)}"] = " ".join(rnd.choice(VOCABULARY) for _ in range(rnd.randint(300, 1200)))
+    return {url: f"<html><body><nav>Home Services Locations</nav><p>{text}</p></body></html>"
+            for url, text in pages.items()}
+
+
+def pairwise(signatures: List[bytes]) -> List[List[int]]:
+    parent = list(range(len(signatures)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i, a in enumerate(signatures):
+        for j in range(i):
+            if similarity(a, signatures[j]) >= DEFAULT_THRESHOLD:
+                parent[max(find(i), find(j))] = min(find(i), find(j))
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(signatures)):
+        groups.setdefault(find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--families", type=int, default=20)
+    parser.add_argument("--family-size", type=int, default=8)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.families, args.family_size, random.Random(7))
+    start = time.perf_counter()
+    signatures: List[Optional[bytes]] = [parse_html(html, fingerprint=True).minhash for html in pages.values()]
+    parse_time = time.perf_counter() - start
+    signed = [s for s in signatures if s is not None]
+    print(f"{len(pages)} pages, {args.families} families of {args.family_size}; "
+          f"parse + MinHash {parse_time * 1000 / len(pages):.2f} ms/page\n")
+
+    start = time.perf_counter()
+    index: MinHashIndex[int] = MinHashIndex()
+    for i, signature in enumerate(signed):
+        index.add(i, signature)
+    lsh = sorted(sorted(i for i, _ in cluster) for cluster in index.clusters())
+    lsh_time = time.perf_counter() - start
+    print(f"{'LSH index':<12} {lsh_time * 1000:9.1f} ms  {index.comparisons:>10} comparisons  {len(lsh)} clusters")
+
+    start = time.perf_counter()
+    brute = sorted(pairwise(signed))
+    brute_time = time.perf_counter() - start
+    pairs = len(signed) * (len(signed) - 1) // 2
+    print(f"{'pairwise':<12} {brute_time * 1000:9.1f} ms  {pairs:>10} comparisons  {len(brute)} clusters")
+
+    print(f"\nsame clusters: {lsh == brute}; {brute_time / lsh_time:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
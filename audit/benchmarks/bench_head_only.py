@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark: head-only parsing vs. reading the whole page.
+
+Usage: python audit/benchmarks/bench_head_only.py [--pages N] [--html-dir DIR]
+
+Feeds each page to `PageParser` in 16 KB chunks, the way `--stream` receives
+it, once in full with every default rule and once with `stop_after="head"`
+and `"h1"` and only the head rules (`crawl_site.py --head-only`). Reports how
+many bytes each mode had to read before the parser signalled it was done and
+the parse time per page.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_word_count import load_pages  # noqa: E402
+from crawler.page import PageParser  # noqa: E402
+from crawler.rules import default_rules  # noqa: E402
+
+CHUNK = 16 * 1024
+
+
+def run(pages: List[str], stop_after: Optional[str]) -> tuple:
+    rules = default_rules(head_only=stop_after is not None)
+    read = 0
+    start = time.perf_counter()
+    for html in pages:
+        parser = PageParser(rules, stop_after=stop_after)
+        for offset in range(0, len(html), CHUNK):
+            read += min(CHUNK, len(html) - offset)
+            if parser.feed(html[offset:offset + CHUNK]):
+                break
+        parser.finish()
+    return read, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--html-dir", help="Use saved pages (*.html or cache *.body files) instead of synthetic ones")
+    args = parser.parse_args()
+
+    pages = load_pages(args)
+    total = sum(len(p) for p in pages)
+    print(f"{len(pages)} pages, {total / len(pages) / 1024:.0f} KB average\n")
+
+    full_read, full_time = run(pages, None)
+    for label, stop_after in (("full page", None), ("--head-only", "head"), ("--head-only h1", "h1")):
+        read, elapsed = (full_read, full_time) if stop_after is None else run(pages, stop_after)
+        print(f"{label:<16} {read / total:7.1%} of bytes read  {elapsed * 1000 / len(pages):7.2f} ms/page  "
+              f"{full_time / elapsed:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
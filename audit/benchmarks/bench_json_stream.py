@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: json.load vs. the incremental reader on audit reports.
+
+Usage: python audit/benchmarks/bench_json_stream.py [--repeat N] [REPORT ...]
+
+For each report (default: the Lighthouse reports and the newest SEO audit
+report) reads what the audit scripts need, once with `json.load` on the whole
+file and once with `crawler.jsonstream`: `finalUrl`, `categories` and `audits`
+without the screenshots for Lighthouse reports, the `pages` array one page at
+a time for SEO reports. Reports the best time of N runs and the tracemalloc
+peak of one run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, List
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+
+from crawler.jsonstream import LIGHTHOUSE_SKIP, iter_array, load  # noqa: E402
+
+
+def default_reports() -> List[Path]:
+    reports = sorted((ROOT / "audit" / "lighthouse").glob("*.report.json"))
+    seo = sorted((ROOT / "reports" / "seo").glob("comprehensive-seo-audit-*.json"))
+    return reports + seo[-1:]
+
+
+def full_load(path: Path) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def stream_load(path: Path) -> Any:
+    with open(path, encoding="utf-8") as f:
+        if path.name.endswith(".report.json"):
+            return load(f, keys=("finalUrl", "categories", "audits"), skip=LIGHTHOUSE_SKIP)
+        # What process_audit.py --delta does with earlier reports: one page at a time
+        return sum(1 for _ in iter_array(f, ("pages",)))
+
+
+def measure(read: Callable[[Path], Any], path: Path, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    read(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("reports", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for path in args.reports or default_reports():
+        size = path.stat().st_size
+        full_time, full_peak = measure(full_load, path, args.repeat)
+        stream_time, stream_peak = measure(stream_load, path, args.repeat)
+        print(f"{path.name} ({size / 1024 / 1024:.1f} MB)")
+        print(f"  json.load   {full_time * 1000:8.1f} ms  peak {full_peak / 1024 / 1024:7.2f} MB")
+        print(f"  jsonstream  {stream_time * 1000:8.1f} ms  peak {stream_peak / 1024 / 1024:7.2f} MB  "
+              f"{full_peak / stream_peak:5.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: link-graph analytics on a synthetic site.
+
+Usage: python audit/benchmarks/bench_link_graph.py [--pages N] [--links N]
+
+Builds a `LinkGraph` of N pages with ~`links` internal links each (every page
+links to the homepage and its section hub, the rest at random, like a real
+site's navigation plus body links) and times the CSR build, PageRank, click
+depth and orphan detection used for url_inventory.csv.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+
+from crawler.graph import LinkGraph, click_depth, orphans, pagerank  # noqa: E402
+
+
+def build(pages: int, links: int, rnd: random.Random) -> LinkGraph:
+    graph = LinkGraph()
+    for i in range(pages):
+        graph.urls.id(f"https://www.drsayuj.info/page-{i}")
+    hubs = max(1, pages // 100)
+    for i in range(pages):
+        targets = [0, i % hubs] + [rnd.randrange(pages) for _ in range(links - 2)]
+        graph.add_links(i, targets)
+    return graph
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--links", type=int, default=10, help="Internal links per page")
+    args = parser.parse_args()
+
+    graph = build(args.pages, args.links, random.Random(5))
+    timings = []
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        value = fn()
+        timings.append((label, time.perf_counter() - start))
+        return value
+
+    links = timed("CSR build", graph.csr)
+    incoming = timed("transpose", links.transpose)
+    inlinks = timed("in-degrees", incoming.degrees)
+    timed("PageRank", lambda: pagerank(links, incoming=incoming))
+    timed("click depth (BFS)", lambda: click_depth(links, 0))
+    timed("orphans", lambda: orphans(inlinks, range(args.pages), 0))
+
+    print(f"{args.pages} pages, {len(graph)} links ({len(links)} distinct)\n")
+    for label, seconds in timings:
+        print(f"{label:<20} {seconds * 1000:8.1f} ms")
+    print(f"{'total':<20} {sum(s for _, s in timings) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: trend queries on the metrics store vs. re-parsing every report.
+
+Usage: python audit/benchmarks/bench_metrics_store.py [--reports N] [--pages N]
+
+Writes N synthetic SEO audit reports (one a week, `--pages` pages each, in
+the comprehensive-seo-audit format) to a temporary directory and ingests
+them into a `MetricsStore`. It then times three things: the average word
+count per page type and report date read from the store, the same answer
+computed by loading every report with `json.load`, and a second ingest
+that finds nothing changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+
+from crawler.metrics import MetricsStore  # noqa: E402
+from process_audit import determine_page_type  # noqa: E402
+
+BASE = "https://www.drsayuj.info"
+SECTIONS = ("services", "conditions", "locations", "blog", "about")
+
+
+def write_reports(directory: str, reports: int, pages: int, rnd: random.Random) -> list:
+    paths = []
+    start = datetime.date(2025, 11, 1)
+    for r in range(reports):
+        date = start + datetime.timedelta(weeks=r)
+        report = {
+            "timestamp": f"{date.isoformat()}T06:00:00.000Z",
+            "site": BASE,
+            "pages": [
+                {
+                    "url": f"{BASE}/{SECTIONS[i % len(SECTIONS)]}/page-{i}",
+                    "statusCode": 200,
+                    "wordCount": rnd.randrange(300, 9000),
+                    "issues": ["Title too long"] if rnd.random() < 0.3 else [],
+                    # The bulk of a real page record
+                    "structuredData": [{"@type": "MedicalWebPage", "text": "x" * 2000}],
+                    "internalLinks": [f"/blog/page-{rnd.randrange(pages)}" for _ in range(60)],
+                }
+                for i in range(pages)
+            ],
+        }
+        path = os.path.join(directory, f"comprehensive-seo-audit-{date.isoformat()}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        paths.append(path)
+    return paths
+
+
+def reparse(paths: list) -> dict:
+    sums = defaultdict(lambda: [0, 0])
+    for path in paths:
+        with open(path) as f:
+            report = json.load(f)
+        for page in report["pages"]:
+            acc = sums[(report["timestamp"][:10], determine_page_type(page["url"]))]
+            acc[0] += page["wordCount"]
+            acc[1] += 1
+    return {key: total / count for key, (total, count) in sums.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=52)
+    parser.add_argument("--pages", type=int, default=150)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_reports(tmp, args.reports, args.pages, random.Random(3))
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{args.reports} reports x {args.pages} pages ({size / 1024 / 1024:.0f} MB)\n")
+
+        with MetricsStore(os.path.join(tmp, "metrics.sqlite"), determine_page_type) as store:
+            start = time.perf_counter()
+            store.ingest(paths)
+            print(f"first ingest      {(time.perf_counter() - start) * 1000:9.1f} ms")
+            start = time.perf_counter()
+            store.ingest(paths)
+            print(f"unchanged ingest  {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+            start = time.perf_counter()
+            rows = store.trend("word_count")
+            store_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        expected = reparse(paths)
+        reparse_ms = (time.perf_counter() - start) * 1000
+
+        assert len(rows) == len(expected)
+        assert all(abs(avg - expected[(date, page_type)]) < 1e-6 for date, page_type, avg, _ in rows)
+        print(f"trend from store  {store_ms:9.1f} ms")
+        print(f"re-parse reports  {reparse_ms:9.1f} ms  ({reparse_ms / store_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held per crawled page, dataclass vs. compact record.
+
+Usage: python audit/benchmarks/bench_page_memory.py [--pages N] [--links N]
+
+Builds N synthetic pages the way seo_deep_crawl.py does (every href resolved
+to a fresh URL string) and measures, with tracemalloc, what it costs to keep
+them: the previous `PageData` dataclass with lists of URL strings and raw
+structured-data dicts, against `PageRecord`, whose links are int ids into a
+shared `UrlTable` stored once as `LinkGraph` edges.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib.util
+import random
+import sys
+import tracemalloc
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+
+from crawler.graph import LinkGraph  # noqa: E402
+
+BASE = "https://www.drsayuj.info"
+
+
+def load_crawler() -> Any:
+    spec = importlib.util.spec_from_file_location("seo_deep_crawl", ROOT / "scripts" / "seo_deep_crawl.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+@dataclass
+class LegacyPageData:
+    url: str
+    status: int
+    content_type: str
+    title: Optional[str] = None
+    meta_description: Optional[str] = None
+    meta_robots: Optional[str] = None
+    canonical: Optional[str] = None
+    h1: List[str] = field(default_factory=list)
+    h2: List[str] = field(default_factory=list)
+    h3: List[str] = field(default_factory=list)
+    internal_links: List[str] = field(default_factory=list)
+    external_links: List[str] = field(default_factory=list)
+    images_missing_alt: List[str] = field(default_factory=list)
+    structured_data: List[Dict[str, Any]] = field(default_factory=list)
+    word_count: int = 0
+    issues: List[str] = field(default_factory=list)
+
+
+def make_parsed(i: int, site_size: int, links: int, rnd: random.Random) -> Dict[str, Any]:
+    # Fresh strings per page, as produced by urljoin() on every crawl.
+    internal = sorted({f"{BASE}/services/page-{rnd.randrange(site_size)}" for _ in range(links)})
+    return {
+        "url": f"{BASE}/services/page-{i}",
+        "title": f"Page {i} | Dr Sayuj Krishnan, Neurosurgeon in Hyderabad",
+        "meta": {"description": f"Treatment page {i} for spine and brain conditions in Hyderabad."},
+        "canonical": f"{BASE}/services/page-{i}",
+        "h1": [f"Page {i}"],
+        "h2": [f"Section {k}" for k in range(6)],
+        "h3": [f"Question {k}" for k in range(8)],
+        "internal_links": internal,
+        "external_links": [f"https://www.facebook.com/drsayuj?ref={k}" for k in range(4)],
+        "images_missing_alt": [],
+        "structured_data": [
+            {"@context": "https://schema.org", "@type": "MedicalWebPage", "name": f"Page {i}",
+             "about": {"@type": "MedicalCondition", "name": "Sciatica"},
+             "author": {"@type": "Physician", "name": "Dr Sayuj Krishnan", "url": BASE}},
+        ],
+        "word_count": 900,
+        "issues": ["Missing canonical tag"],
+    }
+
+
+def keep_legacy(parsed: List[Dict[str, Any]]) -> Any:
+    pages = []
+    for p in parsed:
+        page = LegacyPageData(p["url"], 200, "text/html; charset=utf-8")
+        page.title = p["title"]
+        page.meta_description = p["meta"]["description"]
+        page.canonical = p["canonical"]
+        page.h1, page.h2, page.h3 = p["h1"], p["h2"], p["h3"]
+        page.internal_links = p["internal_links"]
+        page.external_links = p["external_links"]
+        page.structured_data = p["structured_data"]
+        page.word_count = p["word_count"]
+        page.issues = list(p["issues"])
+        pages.append(page)
+    return pages
+
+
+def keep_compact(crawler: Any) -> Callable[[List[Dict[str, Any]]], Any]:
+    def keep(parsed: List[Dict[str, Any]]) -> Any:
+        graph = LinkGraph()
+        urls = graph.urls
+        pages = []
+        for p in parsed:
+            page = crawler.PageRecord(urls.id(p["url"]), 200, "text/html; charset=utf-8")
+            page.title = p["title"]
+            page.meta_description = p["meta"]["description"]
+            page.canonical = p["canonical"]
+            page.h1, page.h2, page.h3 = tuple(p["h1"]), tuple(p["h2"]), tuple(p["h3"])
+            page.external_links = array("I", map(urls.id, p["external_links"]))
+            page.structured_data = crawler.json.dumps(p["structured_data"], separators=(",", ":"))
+            page.word_count = p["word_count"]
+            page.issues = list(p["issues"])
+            page.links = graph.add_links(page.url, map(urls.id, p["internal_links"]))
+            pages.append(page)
+        return pages, graph
+
+    return keep
+
+
+def measure(label: str, keep: Callable[[List[Dict[str, Any]]], Any], args: argparse.Namespace) -> int:
+    rnd = random.Random(11)
+    gc.collect()
+    tracemalloc.start()
+    kept = keep([make_parsed(i, args.site_size, args.links, rnd) for i in range(args.pages)])
+    gc.collect()
+    # The parse results are garbage by now; only what `keep` returned is still allocated.
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    print(f"{label:<32} {current / 1024 / 1024:8.1f} MB  {current / args.pages / 1024:7.1f} KB/page")
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--links", type=int, default=80, help="Internal links per page")
+    parser.add_argument("--site-size", type=int, default=5000, help="Distinct internal URLs links are drawn from")
+    args = parser.parse_args()
+
+    crawler = load_crawler()
+    print(f"{args.pages} pages, ~{args.links} internal links each, {args.site_size} distinct URLs\n")
+    legacy = measure("PageData (lists of str)", keep_legacy, args)
+    compact = measure("PageRecord + UrlTable + graph", keep_compact(crawler), args)
+    print(f"\n{legacy / compact:.1f}x less memory per page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: page-parsing throughput in the crawl process vs. a process pool.
+
+Usage: python audit/benchmarks/bench_parse_pool.py [--pages N] [--html-dir DIR] [--workers 1,2,4]
+
+Runs crawl_site.py's parse stage (`parse_body`: decode, single-pass parse
+with all rules, JSON-LD extraction, fingerprint) over the same raw pages
+inline and then with `--parse-workers`-style `ProcessPoolExecutor`s of
+increasing size, and reports wall-clock pages per second. Throughput should
+grow with the number of workers up to the number of cores.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_word_count import load_pages  # noqa: E402
+from crawl_site import parse_body  # noqa: E402
+
+URL = "https://www.drsayuj.info/bench"
+
+
+def run(bodies: List[bytes], workers: int) -> float:
+    start = time.perf_counter()
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(parse_body, URL, body, "utf-8") for body in bodies]:
+                future.result()
+    else:
+        for body in bodies:
+            parse_body(URL, body, "utf-8")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--html-dir", help="Use saved pages (*.html or cache *.body files) instead of synthetic ones")
+    cores = os.cpu_count() or 1
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, 4, cores})),
+                        help="Comma-separated pool sizes to try")
+    args = parser.parse_args()
+
+    bodies = [page.encode("utf-8") for page in load_pages(args)]
+    size = sum(len(b) for b in bodies) / len(bodies) / 1024
+    print(f"{len(bodies)} pages, {size:.0f} KB average, {cores} cores\n")
+
+    inline = run(bodies, 0)
+    print(f"{'in crawl process':<20} {len(bodies) / inline:8.1f} pages/s")
+    for workers in (int(n) for n in args.workers.split(",")):
+        elapsed = run(bodies, workers)
+        print(f"{f'{workers} parse workers':<20} {len(bodies) / elapsed:8.1f} pages/s  {inline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTML parser backends, throughput and identical extraction.
+
+Usage: python audit/benchmarks/bench_parser_backends.py [--html-dir DIR] [--pages N]
+
+Parses saved pages from the site (by default the response cache that
+`crawl_site.py --cache-dir audit/.cache/http` fills; synthetic pages when it
+is empty) with every available `crawler.page` backend, reports pages/sec for
+each and checks that all backends extract the same title, meta, canonical,
+headings, links, images and ld+json as the html.parser default. Exits with
+status 1 if any page differs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "audit"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_word_count import load_pages  # noqa: E402
+from crawler.page import BACKENDS, DEFAULT_BACKEND, PageData, available_backends, parse_html  # noqa: E402
+
+CACHE_DIR = ROOT / "audit" / ".cache" / "http"
+FIELDS = ("title", "meta", "canonical", "h1", "h2", "h3", "links", "images", "images_missing_alt", "ld_json",
+          "word_count")
+
+
+def extraction(page: PageData) -> Dict[str, Any]:
+    return {name: getattr(page, name) for name in FIELDS}
+
+
+def throughput(pages: List[str], backend: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            parse_html(html, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--html-dir", help=f"Saved pages (*.html or cache *.body files); default {CACHE_DIR}")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.html_dir is None and CACHE_DIR.is_dir():
+        args.html_dir = str(CACHE_DIR)
+
+    pages = load_pages(args)
+    if not pages:
+        args.html_dir = None
+        pages = load_pages(args)
+    size = sum(len(p) for p in pages) / len(pages) / 1024
+    source = args.html_dir or "synthetic pages"
+    print(f"{len(pages)} pages from {source}, {size:.0f} KB average\n")
+
+    backends = available_backends()
+    missing = [name for name in BACKENDS if name not in backends]
+    reference = [extraction(parse_html(html)) for html in pages]
+    mismatches = 0
+    baseline = None
+    for backend in backends:
+        rate = throughput(pages, backend, args.repeat)
+        baseline = baseline or rate
+        differing = []
+        if backend != DEFAULT_BACKEND:
+            for i, html in enumerate(pages):
+                got = extraction(parse_html(html, backend=backend))
+                fields = [name for name in FIELDS if got[name] != reference[i][name]]
+                if fields:
+                    differing.append((i, fields))
+        mismatches += len(differing)
+        status = "reference" if backend == DEFAULT_BACKEND else (
+            "outputs match" if not differing else f"{len(differing)} pages differ")
+        print(f"{backend:<12} {rate:8.1f} pages/s  {rate / baseline:5.2f}x  {status}")
+        for i, fields in differing[:5]:
+            print(f"    page {i}: {', '.join(fields)}")
+    for name in missing:
+        print(f"{name:<12} not installed")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled robots matcher vs. the legacy linear prefix scan.
+
+Usage: python audit/benchmarks/bench_robots.py [--rules N] [--urls N]
+
+The legacy `should_crawl()` from seo_deep_crawl.py is kept here verbatim for
+comparison. Both are checked to agree on plain Disallow prefixes (the only
+rules the legacy function understood) before timing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crawler.robots import RobotsMatcher, parse_robots_txt  # noqa: E402
+
+SECTIONS = ["services", "conditions", "locations", "blog", "api", "admin", "_next", "search", "tag", "drafts"]
+
+
+def legacy_should_crawl(url: str, disallow_paths: List[str]) -> bool:
+    parsed = urllib.parse.urlparse(url)
+    path = parsed.path or "/"
+    for disallow in disallow_paths:
+        if disallow == "/":
+            return False
+        if disallow and path.startswith(disallow):
+            return False
+    return True
+
+
+def make_rules(count: int, rnd: random.Random) -> List[str]:
+    rules = []
+    for i in range(count):
+        section = rnd.choice(SECTIONS)
+        rules.append(f"/{section}/private-{i}")
+    return rules
+
+
+def make_urls(count: int, rules: List[str], rnd: random.Random) -> List[str]:
+    urls = []
+    for i in range(count):
+        if rnd.random() < 0.2:
+            path = rnd.choice(rules) + f"/page-{i}"
+        else:
+            path = f"/{rnd.choice(SECTIONS)}/page-{i}"
+        urls.append(f"https://www.drsayuj.info{path}")
+    return urls
+
+
+def bench(label: str, check: Callable[[str], bool], urls: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url in urls:
+            check(url)
+        best = min(best, time.perf_counter() - start)
+    per_url_us = best / len(urls) * 1e6
+    print(f"{label:<28} {best * 1000:9.2f} ms  {per_url_us:7.2f} us/url")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--urls", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    for rule_count in args.rules:
+        rules = make_rules(rule_count, rnd)
+        urls = make_urls(args.urls, rules, rnd)
+        text = "User-agent: *\n" + "".join(f"Disallow: {rule}\n" for rule in rules)
+        matcher = parse_robots_txt(text).matcher("SEO-Audit-Bot/1.0")
+
+        mismatches = [url for url in urls if legacy_should_crawl(url, rules) != matcher.allowed(url)]
+        if mismatches:
+            raise SystemExit(f"matcher disagrees with legacy on {len(mismatches)} URLs, e.g. {mismatches[0]}")
+
+        # Same rules plus wildcard/anchor/Allow rules the legacy function cannot express.
+        extended = RobotsMatcher(
+            [(False, rule) for rule in rules]
+            + [(False, "/*.pdf$"), (False, "/*?sort="), (True, "/blog/private-*/public$"), (True, "/api/health")]
+        )
+
+        print(f"\n{rule_count} rules, {len(urls)} URLs")
+        legacy = bench("legacy startswith scan", lambda url: legacy_should_crawl(url, rules), urls, args.repeat)
+        compiled = bench("compiled trie", matcher.allowed, urls, args.repeat)
+        bench("compiled trie + wildcards", extended.allowed, urls, args.repeat)
+        print(f"{'speedup':<28} {legacy / compiled:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rule count vs. per-page parse cost.
+
+Usage: python audit/benchmarks/bench_rules.py [--pages N] [--html-dir DIR]
+
+Parses the same pages with `crawler.page.PageParser` carrying 0, 3 and 20
+rules, and compares that with the previous approach of one extra pass over the
+page per check (a lower-cased copy of the HTML scanned for each phrase or
+tag). The 20-rule set is the built-in rules plus synthetic phrase and tag
+rules of the same shape.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_word_count import load_pages  # noqa: E402
+from crawler.page import Attrs, Issue, PageData, PageParser, Rule  # noqa: E402
+from crawler.rules import MEDIUM, KeywordPlacementRule, default_rules  # noqa: E402
+
+SYNTHETIC_PHRASES = ("spinal fusion", "second opinion", "emergency care", "insurance", "cashless", "robotic",
+                     "awake craniotomy", "day care", "keyhole", "pain free", "same day discharge", "free consultation")
+
+
+class PhraseRule(Rule):
+    def __init__(self, phrase: str) -> None:
+        self.name = f"phrase:{phrase}"
+        self.phrases = (phrase,)
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        if self.phrases[0] in page.phrases:
+            yield self.issue("Phrase Found", MEDIUM, f"Found '{self.phrases[0]}'")
+
+
+class ExternalLinkRule(Rule):
+    name = "external_links"
+    tags = ("a",)
+
+    def start(self, tag: str, attrs: Attrs, page: PageData) -> None:
+        if attrs.get("href", "").startswith("http"):
+            page.facts["external_links"] = page.facts.get("external_links", 0) + 1
+
+
+def rule_sets() -> List[List[Rule]]:
+    three = default_rules()[:3]
+    twenty = default_rules() + [KeywordPlacementRule("neurosurgeon"), ExternalLinkRule()]
+    twenty += [PhraseRule(p) for p in SYNTHETIC_PHRASES[: 20 - len(twenty)]]
+    return [[], three, twenty]
+
+
+def per_check_passes(html: str) -> int:
+    # The old shape: parse once, then scan the raw HTML again for every check.
+    parser = PageParser()
+    parser.feed(html)
+    parser.finish()
+    lowered = html.lower()
+    checks = ["<title", "<h1", 'rel="canonical"', "<img", "wa.me", "/appointments", "book now"]
+    checks += list(SYNTHETIC_PHRASES)
+    return sum(1 for needle in checks if needle in lowered)
+
+
+def bench(label: str, parse: Callable[[str], object], pages: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for html in pages:
+            parse(html)
+        best = min(best, time.process_time() - start)
+    print(f"{label:<34} {best * 1000:9.1f} ms  {best / len(pages) * 1000:7.3f} ms/page")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--html-dir", help="Use saved pages (*.html or cache *.body files) instead of synthetic ones")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args)
+    size = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {size:.0f} KB average\n")
+
+    timings = []
+    for rules in rule_sets():
+        def run(html: str, rules: List[Rule] = rules) -> PageData:
+            p = PageParser(rules)
+            p.feed(html)
+            return p.finish()
+
+        timings.append(bench(f"single pass, {len(rules)} rules", run, pages, args.repeat))
+    bench("parse + one scan per check", per_check_passes, pages, args.repeat)
+    base, three, twenty = timings
+    print(f"\n20 rules cost {(twenty - three) / len(pages) * 1000:.3f} ms/page more than 3 "
+          f"({twenty / three:.2f}x); rules add {(twenty - base) / base:.0%} over a bare parse")
+
+
+if __name__ == "__main__":
+    main()
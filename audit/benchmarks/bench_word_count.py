@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: word counting inside the parser vs. extra regex passes.
+
+Usage: python audit/benchmarks/bench_word_count.py [--pages N] [--html-dir DIR]
+
+Compares the per-page CPU cost of parsing with `crawler.page.PageParser`
+(which counts visible words in `handle_data`) against the previous approach of
+parsing and then running `collect_word_count()`'s regex passes over the raw
+HTML again. The legacy helper is kept here verbatim, along with a version with
+the regex escaping fixed, since the original patterns never matched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from crawler.page import PageParser  # noqa: E402
+
+
+def legacy_collect_word_count(html: str) -> int:
+    text = re.sub(r"(?is)<(script|style).*?>.*?</\\1>", " ", html)
+    text = re.sub(r"(?s)<.*?>", " ", text)
+    words = [w for w in re.split(r"\\s+", text) if w]
+    return len(words)
+
+
+def fixed_collect_word_count(html: str) -> int:
+    text = re.sub(r"(?is)<(script|style).*?>.*?</\1>", " ", html)
+    text = re.sub(r"(?s)<.*?>", " ", text)
+    return len(text.split())
+
+
+WORDS = ("spine brain surgery hyderabad neurosurgeon pain disc treatment recovery minimally invasive "
+         "endoscopic tumor nerve consultation appointment").split()
+
+
+def make_page(rnd: random.Random) -> str:
+    paragraphs = "".join(
+        f"<p>{' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(40, 120)))}</p>" for _ in range(rnd.randint(10, 30))
+    )
+    links = "".join(f'<a href="/services/s{i}">Service {i}</a>' for i in range(rnd.randint(20, 80)))
+    script = "var data = " + repr([rnd.random() for _ in range(2000)]) + ";"
+    return (
+        "<!DOCTYPE html><html><head><title>Dr Sayuj | Neurosurgeon</title>"
+        '<meta name="description" content="desc"><style>' + ".c{color:red}" * 200 + "</style>"
+        f"<script>{script}</script></head><body><h1>Heading</h1>{links}{paragraphs}</body></html>"
+    )
+
+
+def load_pages(args: argparse.Namespace) -> List[str]:
+    if args.html_dir:
+        files = sorted(p for p in Path(args.html_dir).rglob("*") if p.suffix in (".html", ".body"))
+        return [p.read_text("utf-8", errors="replace") for p in files[: args.pages]]
+    rnd = random.Random(7)
+    return [make_page(rnd) for _ in range(args.pages)]
+
+
+def bench(label: str, parse: Callable[[str], int], pages: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for html in pages:
+            parse(html)
+        best = min(best, time.process_time() - start)
+    print(f"{label:<34} {best * 1000:9.1f} ms  {best / len(pages) * 1000:7.3f} ms/page")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--html-dir", help="Use saved pages (*.html or cache *.body files) instead of synthetic ones")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    parser_cls = PageParser
+    pages = load_pages(args)
+    size = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {size:.0f} KB average\n")
+
+    def single_pass(html: str) -> int:
+        p = parser_cls()
+        p.feed(html)
+        return p.page.word_count
+
+    def with_regex(count: Callable[[str], int]) -> Callable[[str], int]:
+        def run(html: str) -> int:
+            p = parser_cls()
+            p.feed(html)
+            return count(html)
+        return run
+
+    legacy = bench("parse + legacy regex (buggy)", with_regex(legacy_collect_word_count), pages, args.repeat)
+    fixed = bench("parse + fixed regex", with_regex(fixed_collect_word_count), pages, args.repeat)
+    single = bench("single pass (count in handle_data)", single_pass, pages, args.repeat)
+    print(f"\nsaving per page: {(legacy - single) / len(pages) * 1000:.3f} ms vs legacy, "
+          f"{(fixed - single) / len(pages) * 1000:.3f} ms vs fixed regex")
+
+
+if __name__ == "__main__":
+    main()
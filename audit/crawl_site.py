@@ -1,13 +1,25 @@
-import urllib.request
-import urllib.parse
-import urllib.error
 import re
 import csv
 import json
-import time
 import os
-import xml.etree.ElementTree as ET
-from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+from crawler.cache import HIT as CACHE_HIT, REVALIDATED as CACHE_REVALIDATED, ResponseCache, cached_request
+from crawler.checkpoint import CrawlCheckpoint
+from crawler.dedup import MinHashIndex, similarity
+from crawler.engine import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, FetchEngine
+from crawler.frontier import Frontier
+from crawler.graph import LinkGraph, click_depth, orphans, pagerank
+from crawler.jsonld import SchemaIndex, schema_types as jsonld_types
+from crawler.output import JsonlWriter, iter_jsonl, write_json_array, write_json_object
+from crawler.page import BACKENDS, DEFAULT_BACKEND, STOP_POINTS, PageParser, resolve_backend
+from crawler.pool import ConnectionPool, charset_from_headers
+from crawler.ratelimit import AdaptiveRateLimiter
+from crawler.rules import default_rules
+from crawler.sitemap import SitemapReader
+from crawler.stream import html_feed, pump
 
 BASE_URL = "http://localhost:3000"
 PROD_URL = "https://www.drsayuj.info"
@@ -19,6 +31,38 @@ ONPAGE_DIR = "audit/onpage"
 TECH_DIR = "audit/tech"
 SCHEMA_DIR = "audit/schema"
 HEADERS_DIR = "audit/headers"
+CACHE_DIR = "audit/.cache/http"
+CHECKPOINT_PATH = "audit/.cache/crawl_site.sqlite"
+
+# Per-page JSON Lines, appended as the crawl runs
+JSONL_OUTPUTS = {
+    'url_inventory': f"{CRAWL_DIR}/url_inventory.jsonl",
+    'onpage_issues': f"{ONPAGE_DIR}/onpage_issues.jsonl",
+    'tech_issues': f"{TECH_DIR}/tech_issues.jsonl",
+    'schema_inventory': f"{SCHEMA_DIR}/schema_inventory.jsonl",
+    'headers_report': f"{HEADERS_DIR}/headers_report.jsonl",
+    'fingerprints': f"{ONPAGE_DIR}/fingerprints.jsonl",
+    'links': f"{CRAWL_DIR}/links.jsonl",
+}
+
+USER_AGENT = 'SEO-Audit-Bot/1.0'
+
+# Safety limit and fetch concurrency (overridable from the command line)
+MAX_PAGES = 200
+CONCURRENCY = DEFAULT_CONCURRENCY
+PER_HOST_CONNECTIONS = DEFAULT_PER_HOST
+
+# Keep-alive pool with per-request DNS/connect/TLS/wait/download timing
+POOL = ConnectionPool(pool_size=PER_HOST_CONNECTIONS, timeout=10, headers={'User-Agent': USER_AGENT})
+# Unthrottled until the server answers 429/5xx, then backs off per host
+LIMITER = AdaptiveRateLimiter()
+
+# Every on-page check runs inside the single parse of each page
+RULES = default_rules()
+# HTML tokenizer (--parser-backend); lxml is used only when installed
+PARSER_BACKEND = DEFAULT_BACKEND
+# --head-only: stop reading each page at </head> ('head') or its first </h1> ('h1')
+STOP_AFTER = None
 
 os.makedirs(CRAWL_DIR, exist_ok=True)
 os.makedirs(ONPAGE_DIR, exist_ok=True)
@@ -26,303 +70,470 @@ os.makedirs(TECH_DIR, exist_ok=True)
 os.makedirs(SCHEMA_DIR, exist_ok=True)
 os.makedirs(HEADERS_DIR, exist_ok=True)
 
-class MetadataParser(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.title = None
-        self.meta_description = None
-        self.h1 = []
-        self.canonical = None
-        self.robots = None
-        self.scripts = []
-        self.text_content = []
-        self.links = []
-        self.in_script = False
-        self.in_title = False
-        self.in_h1 = False
-        self.script_type = None
-
-    def handle_starttag(self, tag, attrs):
-        attrs_dict = dict(attrs)
-        if tag == 'title':
-            self.in_title = True
-        elif tag == 'meta':
-            name = attrs_dict.get('name', '').lower()
-            if name == 'description':
-                self.meta_description = attrs_dict.get('content')
-            elif name == 'robots':
-                self.robots = attrs_dict.get('content')
-        elif tag == 'h1':
-            self.in_h1 = True
-        elif tag == 'link':
-            rel = attrs_dict.get('rel', '').lower()
-            if rel == 'canonical':
-                self.canonical = attrs_dict.get('href')
-        elif tag == 'script':
-            self.in_script = True
-            self.script_type = attrs_dict.get('type')
-        elif tag == 'a':
-            href = attrs_dict.get('href')
-            if href:
-                self.links.append(href)
-
-    def handle_endtag(self, tag):
-        if tag == 'title':
-            self.in_title = False
-        elif tag == 'h1':
-            self.in_h1 = False
-        elif tag == 'script':
-            self.in_script = False
-
-    def handle_data(self, data):
-        if self.in_title:
-            self.title = data.strip()
-        elif self.in_h1:
-            self.h1.append(data.strip())
-        elif self.in_script and self.script_type == 'application/ld+json':
-            self.scripts.append(data.strip())
-        elif not self.in_script:
-            if data.strip():
-                self.text_content.append(data.strip())
-
-def fetch_url(url):
+def fetch_url(url, cache=None, stream=False, raw=False):
+    # In streaming mode the body is read in chunks and fed to the parser as it
+    # arrives, so the full HTML is never held in memory. With raw=True the body
+    # is returned undecoded ('body') for a parser worker process.
+    parser = None
+    text_feed = None
+
+    def start_parser(status, headers):
+        nonlocal parser, text_feed
+        content_type = headers.get('Content-Type') or headers.get('content-type') or ''
+        if status != 200 or 'text/html' not in content_type.lower():
+            return None
+        parser = PageParser(RULES, fingerprint=True, backend=PARSER_BACKEND, stop_after=STOP_AFTER)
+
+        def feed(text):
+            # Returning True stops the download once the parser has what it needs
+            if parser.page.parse_error:
+                return
+            try:
+                return parser.feed(text)
+            except Exception as e:
+                parser.page.parse_error = str(e)
+                print(f"Error parsing HTML for {url}: {e}")
+
+        text_feed = html_feed(feed, charset_from_headers(headers))
+        return text_feed
+
+    timings = []
+    transfers = []
+
+    def send(extra_headers, on_headers):
+        LIMITER.acquire(url)
+        try:
+            response = POOL.request(url, headers=extra_headers)
+        except Exception:
+            LIMITER.record(url, 0)
+            raise
+        with response:
+            LIMITER.record(url, response.status, response.timing.ttfb_ms, response.headers.get('Retry-After'))
+            timings.append(response.timing)
+            transfers.append(response.transfer)
+            headers = dict(response.headers)
+            sink = on_headers(response.status, response.headers)
+            if sink is None:
+                body = response.read()
+            else:
+                pump(response.iter_chunks(), sink)
+                body = None
+        return response.status, headers, body
+
     try:
-        req = urllib.request.Request(
-            url,
-            headers={'User-Agent': 'SEO-Audit-Bot/1.0'}
-        )
-        with urllib.request.urlopen(req, timeout=10) as response:
-            headers = dict(response.info())
-            content = response.read().decode('utf-8')
-            return {
-                'status': response.status,
-                'headers': headers,
-                'content': content,
-                'url': response.url,
-                'ttfb': 0 # Basic placeholder
-            }
-    except urllib.error.HTTPError as e:
-        return {'status': e.code, 'headers': {}, 'content': '', 'url': url, 'error': str(e)}
+        res = cached_request(cache, url, send, start_parser if stream else None)
+        parsed = res.entry.parsed if res.entry and res.state in (CACHE_HIT, CACHE_REVALIDATED) else None
+        if parsed is not None and ('minhash' not in parsed or parsed.get('partial', False) != bool(STOP_AFTER)):
+            # Stored before rules and fingerprints ran during the parse, or by a
+            # crawl with a different --head-only setting; parse the cached body again
+            parsed = None
+        parsed_cached = parsed is not None
+        if stream and parsed is None:
+            if res.body is None and res.entry is not None and parser is None:
+                # Served from cache without stored parse results: stream the cached body
+                sink = start_parser(res.status, res.headers)
+                if sink is not None:
+                    pump(res.entry.iter_body(), sink)
+            if parser is not None:
+                text_feed.close()
+                parsed = page_fields(parser.finish())
+        # No timing when a fresh cache entry was served without a request
+        timing = timings[-1] if timings else None
+        transfer = transfers[-1] if transfers else None
+        # The cache stores bodies decoded; it keeps the coding they had on the wire
+        if res.state in (CACHE_HIT, CACHE_REVALIDATED):
+            encoding = res.entry.wire_encoding
+        else:
+            encoding = transfer.encoding if transfer else None
+        return {
+            'status': res.status,
+            'headers': res.headers,
+            'content': res.body.decode('utf-8') if res.body is not None and not raw else '',
+            'body': res.body if raw else None,
+            'url': url,
+            'ttfb': round(timing.ttfb_ms) if timing else 0,
+            'timing': timing.as_dict() if timing else None,
+            # Body bytes on the wire and after decompression (304s transfer none)
+            'transfer': transfer.as_dict() if transfer else None,
+            'encoding': encoding or None,
+            'cache': res.state,
+            'parsed': parsed,
+            'parsed_cached': parsed_cached,
+            'error': f"HTTP Error {res.status}" if res.status >= 400 else None
+        }
     except Exception as e:
-        return {'status': 0, 'headers': {}, 'content': '', 'url': url, 'error': str(e)}
+        return {'status': 0, 'headers': {}, 'content': '', 'url': url, 'ttfb': 0, 'timing': None, 'error': str(e)}
 
-def parse_sitemap(sitemap_content):
-    urls = []
+def parse_page(url, content, backend=None):
+    parser = PageParser(RULES, fingerprint=True, backend=backend or PARSER_BACKEND)
     try:
-        root = ET.fromstring(sitemap_content)
-        # Handle namespaces which might vary
-        # Try finding all 'loc' tags regardless of namespace if possible, or use explicit namespace map
-        # ElementTree requires explicit namespace handling usually
-
-        # Simple hack: iterate all elements and check tag name ending in 'loc'
-        for elem in root.iter():
-            if elem.tag.endswith('loc'):
-                if elem.text:
-                    urls.append(elem.text.strip())
-
+        parser.feed(content)
     except Exception as e:
-        print(f"Error parsing sitemap: {e}")
-    return urls
+        parser.page.parse_error = str(e)
+        print(f"Error parsing HTML for {url}: {e}")
+    return page_fields(parser.finish())
 
-def run_audit():
-    print(f"Fetching sitemap from {SITEMAP_URL}")
-    sitemap_res = fetch_url(SITEMAP_URL)
-
-    urls = []
-    if sitemap_res['status'] == 200:
-        urls = parse_sitemap(sitemap_res['content'])
-        print(f"Found {len(urls)} URLs in sitemap")
+def parse_body(url, body, charset, backend=None):
+    # Runs in a parser worker process: the raw bytes go in, only the compact
+    # page fields come back
+    try:
+        content = body.decode(charset, errors='replace')
+    except LookupError:
+        content = body.decode('utf-8', errors='replace')
+    return parse_page(url, content, backend)
+
+def page_fields(page):
+    # Schema Analysis
+    schemas = []
+    schema_types = []
+    for script in page.ld_json:
+        try:
+            data = json.loads(script)
+            schemas.append(data)
+            schema_types.extend(jsonld_types(data))
+        except:
+            pass
+
+    return {
+        'title': page.title,
+        'meta_description': page.meta.get('description'),
+        'h1': page.h1,
+        'canonical': page.canonical,
+        'robots': page.meta.get('robots'),
+        # Head-only parses never saw the body text
+        'word_count': None if page.partial else page.word_count,
+        'partial': page.partial,
+        'minhash': page.minhash.hex() if page.minhash is not None else None,
+        # Distinct types in document order, so identical pages give identical rows
+        'schema_types': list(dict.fromkeys(schema_types)),
+        'schemas': schemas,
+        'links': page.links,
+        'facts': page.facts,
+        'issues': [issue.as_dict() for issue in page.issues]
+    }
+
+def fetch_sitemap(url):
+    # Stream one sitemap file; SitemapReader parses it as the chunks arrive
+    LIMITER.acquire(url)
+    with POOL.request(url) as response:
+        LIMITER.record(url, response.status, response.timing.ttfb_ms, response.headers.get('Retry-After'))
+        if response.status != 200:
+            raise OSError(f"HTTP Error {response.status}")
+        yield from response.iter_chunks()
+
+def run_audit(concurrency=CONCURRENCY, per_host=PER_HOST_CONNECTIONS, max_pages=MAX_PAGES, cache_dir=None,
+              stream=False, checkpoint_path=CHECKPOINT_PATH, resume=False, parse_workers=0,
+              parser_backend=DEFAULT_BACKEND, head_only=None):
+    global POOL, PARSER_BACKEND, RULES, STOP_AFTER
+    PARSER_BACKEND = resolve_backend(parser_backend)
+    if head_only:
+        # Only the streaming parser can stop the download early
+        if parse_workers:
+            raise ValueError('head_only parses while streaming; it cannot be combined with parse_workers')
+        stream = True
+        RULES = default_rules(head_only=True)
+    STOP_AFTER = head_only
+    POOL.close()
+    POOL = ConnectionPool(pool_size=per_host, timeout=10, headers={'User-Agent': USER_AGENT})
+    cache = ResponseCache(cache_dir) if cache_dir else None
+
+    # Queued URLs and finished pages are written to SQLite as the crawl runs, so an
+    # interrupted crawl can be continued with --resume
+    checkpoint = CrawlCheckpoint(checkpoint_path, resume=resume)
+
+    # The frontier maps the prod domain onto localhost and canonicalizes/deduplicates
+    # (trailing slash, fragment, query order, host case)
+    frontier = Frontier(BASE_URL, aliases=[PROD_URL], on_queue=checkpoint.queue)
+    if resume:
+        frontier.restore(checkpoint.done_urls(), checkpoint.pending())
+
+    def fetch_sitemap_local(url):
+        # Child sitemaps in an index are listed with the prod domain
+        return fetch_sitemap(frontier.canonicalize(url) or url)
+
+    # Sitemap records are streamed (sitemap indexes and .xml.gz children included)
+    # and pulled into the frontier lazily as the crawl needs more URLs
+    print(f"Reading sitemap from {SITEMAP_URL}")
+    sitemap = SitemapReader(fetch_sitemap_local)
+    records = sitemap.read(SITEMAP_URL)
+    first = next(records, None)
+    if first is None:
+        print(f"Failed to read sitemap ({sitemap.errors[0][1] if sitemap.errors else 'no URLs'}). "
+              f"Trying backup {BACKUP_SITEMAP_URL}")
+        sitemap = SitemapReader(fetch_sitemap_local)
+        records = sitemap.read(BACKUP_SITEMAP_URL)
+        first = next(records, None)
+    if first is not None:
+        frontier.add(first.loc)
     else:
-        print(f"Failed to fetch sitemap (Status: {sitemap_res['status']}). Trying backup {BACKUP_SITEMAP_URL}")
-        backup_res = fetch_url(BACKUP_SITEMAP_URL)
-        if backup_res['status'] == 200:
-            urls = parse_sitemap(backup_res['content'])
-            print(f"Found {len(urls)} URLs in backup sitemap")
-        else:
-            print("Failed to fetch backup sitemap. Using fallback list.")
-            # Fallback list based on file structure I saw
-            urls = [
-                f"{PROD_URL}/",
-                f"{PROD_URL}/about",
-                f"{PROD_URL}/services",
-                f"{PROD_URL}/conditions",
-                f"{PROD_URL}/locations",
-                f"{PROD_URL}/contact",
-                f"{PROD_URL}/blog",
-                f"{PROD_URL}/services/spine-surgery-hyderabad",
-                f"{PROD_URL}/conditions/sciatica-pain-treatment-hyderabad",
-                f"{PROD_URL}/locations/banjara-hills"
-            ]
-
-    # Process URLs: replace prod domain with localhost
-    local_urls = []
-    for u in urls:
-        if u.startswith(PROD_URL):
-            local_urls.append(u.replace(PROD_URL, BASE_URL))
-        elif u.startswith(BASE_URL):
-            local_urls.append(u)
-        else:
-            # Maybe relative URL?
-            if u.startswith('/'):
-                local_urls.append(f"{BASE_URL}{u}")
+        print("Failed to read backup sitemap. Using fallback list.")
+        # Fallback list based on file structure I saw
+        fallback_urls = [
+            f"{PROD_URL}/",
+            f"{PROD_URL}/about",
+            f"{PROD_URL}/services",
+            f"{PROD_URL}/conditions",
+            f"{PROD_URL}/locations",
+            f"{PROD_URL}/contact",
+            f"{PROD_URL}/blog",
+            f"{PROD_URL}/services/spine-surgery-hyderabad",
+            f"{PROD_URL}/conditions/sciatica-pain-treatment-hyderabad",
+            f"{PROD_URL}/locations/banjara-hills"
+        ]
+        for u in fallback_urls:
+            frontier.add(u)
+
+    # Results are appended to JSONL files as pages finish instead of being kept in
+    # memory; the CSV/JSON/Markdown reports are derived from them at the end
+    outputs = {name: JsonlWriter(path) for name, path in JSONL_OUTPUTS.items()}
+
+    def collect(record):
+        url = record['result']['url']
+        outputs['url_inventory'].write(record['result'])
+        for row in record['onpage']:
+            outputs['onpage_issues'].write(row)
+        for row in record['tech']:
+            outputs['tech_issues'].write(row)
+        if record['schemas'] is not None:
+            outputs['schema_inventory'].write({'url': url, 'schemas': record['schemas']})
+        outputs['headers_report'].write(record['headers'])
+        if record.get('fingerprint'):
+            outputs['fingerprints'].write(record['fingerprint'])
+        if record.get('links'):
+            outputs['links'].write(record['links'])
+
+    if resume:
+        for _, record in checkpoint.records():
+            if record is not None:
+                collect(record)
+        print(f"Resuming from {checkpoint_path}: {checkpoint.pages_done} pages done, {len(frontier)} queued")
+
+    pipeline = f", parse-workers={parse_workers}" if parse_workers else ""
+    if head_only:
+        pipeline += f", head-only={head_only}"
+    print(f"Starting crawl (concurrency={concurrency}, per-host={per_host}, max-pages={max_pages}, "
+          f"parser={PARSER_BACKEND}{pipeline})...")
+
+    # Pages finished before a resume count towards max_pages
+    count = checkpoint.pages_done
+    submitted = count
+
+    # Pipeline mode: fetch threads only do I/O and hand raw HTML to a pool of parser
+    # processes, so parsing is no longer limited to one interpreter
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+
+    def fetch(url):
+        return fetch_url(url, cache, stream and parse_pool is None, raw=parse_pool is not None)
+
+    def parse_stage(url, res):
+        body = res.pop('body', None)
+        content_type = res.get('headers', {}).get('Content-Type', '').lower()
+        if body is None or res['status'] != 200 or 'text/html' not in content_type or res.get('parsed') is not None:
+            return None
+        res['parse_future'] = parse_pool.submit(parse_body, url, body, charset_from_headers(res['headers']), PARSER_BACKEND)
+        return res['parse_future']
+
+    engine = FetchEngine(fetch, concurrency=concurrency, per_host=per_host,
+                         process=parse_stage if parse_pool is not None else None)
+    with engine, parse_pool or nullcontext():
+        def refill():
+            # Keep a couple of requests queued per worker; the rest wait in the frontier
+            nonlocal submitted
+            while submitted < max_pages and engine.pending < 2 * concurrency:
+                # Sitemap URLs are seeds, so they still go ahead of discovered links
+                while not frontier.seeds_queued:
+                    record = next(records, None)
+                    if record is None:
+                        break
+                    frontier.add(record.loc)
+                if not frontier:
+                    break
+                engine.submit(frontier.pop())
+                submitted += 1
+
+        refill()
+
+        # Results arrive in completion order; parsing and checks run here while
+        # the remaining requests are still in flight.
+        for url, res in engine.results():
+            refill()
+            count += 1
+            print(f"Crawled {count}/{frontier.seen_count}: {url} [{res.get('cache', 'error')}]")
+            ttfb = res['ttfb']
+
+            # Map back to prod URL for reporting
+            prod_url_report = url.replace(BASE_URL, PROD_URL)
+
+            result = {
+                'url': prod_url_report,
+                'local_url': url,
+                'status': res['status'],
+                'ttfb': ttfb,
+                'timing': res.get('timing'),
+                'transfer': res.get('transfer'),
+                'headers': res.get('headers', {})
+            }
+
+            if not res['status']:
+                # Failed requests (connection errors, bodies that cannot be decoded) are
+                # listed as tech issues and stay queued in the checkpoint to be retried on resume
+                print(f"Fetch error for {url}: {res['error']}")
+                outputs['tech_issues'].write([prod_url_report, 'Fetch Error', 'High', res['error']])
+                continue
+
+            content_type = res.get('headers', {}).get('Content-Type', '').lower()
+            if 'text/html' not in content_type:
+                # Skip non-HTML content
+                print(f"Skipping non-HTML content: {content_type}")
+                checkpoint.done(url)
+                continue
+
+            page_onpage = []
+            page_tech = []
+            page_schemas = None
+            page_fingerprint = None
+            page_links = None
+
+            if res['status'] == 200:
+                # Reuse stored parse results when the cache revalidated the page
+                parsed = res['parse_future'].result() if 'parse_future' in res else res.get('parsed')
+                if parsed is None:
+                    parsed = parse_page(url, res['content'])
+                if cache is not None and not res.get('parsed_cached') and not parsed.get('partial'):
+                    cache.save_parsed(url, parsed)
+
+                result['title'] = parsed['title']
+                result['meta_description'] = parsed['meta_description']
+                result['h1'] = parsed['h1']
+                result['canonical'] = parsed['canonical']
+                result['robots'] = parsed['robots']
+                result['word_count'] = parsed['word_count']
+                result['schema_types'] = parsed['schema_types']
+                result['facts'] = parsed['facts']
+
+                page_schemas = parsed['schemas']
+                # Distinct internal link targets, in the frontier's canonical form, for the link graph
+                page_links = {'url': url, 'links': sorted({
+                    c for c in map(frontier.canonicalize, parsed['links']) if c and frontier.is_internal(c)})}
+                if parsed['minhash']:
+                    page_fingerprint = {'url': result['url'], 'title': result['title'],
+                                        'word_count': result['word_count'], 'minhash': parsed['minhash']}
+
+                # On-page issues were reported by the rules during the parse
+                for issue in parsed['issues']:
+                    page_onpage.append([result['url'], issue['type'], issue['severity'], issue['fix']])
+
+                # Tech Checks
+                if result['canonical']:
+                     # Check if canonical matches current URL
+                     # Note: result['canonical'] is likely absolute prod URL
+                     # result['url'] is also prod URL (mapped)
+                     if frontier.canonicalize(result['canonical']) != frontier.canonicalize(result['url']):
+                         page_tech.append([result['url'], 'Canonical Mismatch', 'Medium', f"Canonical points to {result['canonical']}"])
+
             else:
-                local_urls.append(u) # Leave as is?
-
-    # Remove duplicates
-    local_urls = list(set(local_urls))
-
-    crawl_results = []
-    onpage_issues = []
-    tech_issues = []
-    schema_inventory = {}
-    headers_report = []
-
-    print(f"Starting crawl of {len(local_urls)} pages...")
-
-    count = 0
-    # Safety limit
-    max_pages = 200
-
-    for url in local_urls:
-        if count >= max_pages: break
-        count += 1
-
-        print(f"Crawling {count}/{len(local_urls)}: {url}")
-        start_time = time.time()
-        res = fetch_url(url)
-        end_time = time.time()
-        ttfb = int((end_time - start_time) * 1000)
-
-        # Map back to prod URL for reporting
-        prod_url_report = url.replace(BASE_URL, PROD_URL)
-
-        result = {
-            'url': prod_url_report,
-            'local_url': url,
-            'status': res['status'],
-            'ttfb': ttfb,
-            'headers': res.get('headers', {})
-        }
+                page_tech.append([result['url'], f"Status {res['status']}", 'High', 'Check server logs'])
+                result['error'] = res.get('error')
+
+            # Headers Report
+            page_headers = {
+                'url': result['url'],
+                'status': result['status'],
+                'cache_control': result['headers'].get('Cache-Control', 'N/A'),
+                'content_type': result['headers'].get('Content-Type', 'N/A'),
+                'ttfb': ttfb,
+                'timing': res.get('timing') or {},
+                'transfer': res.get('transfer') or {},
+                'encoding': res.get('encoding')
+            }
 
-        content_type = res.get('headers', {}).get('Content-Type', '').lower()
-        if 'text/html' not in content_type:
-            # Skip non-HTML content
-            print(f"Skipping non-HTML content: {content_type}")
-            continue
+            # Simple recursive crawl (discover internal links)
+            # If we have capacity left
+            if submitted + len(frontier) < max_pages and res['status'] == 200:
+                for link in parsed['links']:
+                    frontier.add_link(link)
+                refill()
+
+            # One checkpoint transaction per page: its results plus the links it queued
+            record = {'result': result, 'onpage': page_onpage, 'tech': page_tech, 'schemas': page_schemas,
+                      'headers': page_headers, 'fingerprint': page_fingerprint, 'links': page_links}
+            collect(record)
+            checkpoint.done(url, record)
+
+    # The link graph is only complete if the sitemap was read to the end (an
+    # empty frontier is checked first, so a truncated crawl reads no further)
+    sitemap_done = not frontier and next(records, None) is None
+    # Stop the sitemap fetch threads if the page limit was reached first
+    records.close()
+    for writer in outputs.values():
+        writer.close()
+
+    write_reports(sitemap, frontier, cache, checkpoint, sitemap_done)
+    checkpoint.close()
+    print("Audit Complete. Artifacts saved.")
 
-        if res['status'] == 200:
-            parser = MetadataParser()
-            try:
-                parser.feed(res['content'])
-            except Exception as e:
-                print(f"Error parsing HTML for {url}: {e}")
+def page_type(url):
+    # First path segment ('/blog/...' -> 'blog'); the homepage is 'home'
+    segment = urlparse(url).path.strip('/').split('/')[0]
+    return segment or 'home'
+
+def link_metrics(frontier, checkpoint, sitemap_done):
+    # Internal link graph of the crawled pages, keyed by canonical (local) URL:
+    # distinct linking pages, PageRank (scaled so the average page is 1.0),
+    # click depth from the homepage and orphans (sitemap URLs nothing links to).
+    # Orphans are None unless every known URL was crawled: a page left out by
+    # max_pages may be the one linking to a sitemap URL
+    if STOP_AFTER:
+        # Head-only crawls never read the links in the body
+        return lambda url: {'inlinks_count': None, 'pagerank': None, 'click_depth': None, 'orphan': None}, None
+    graph = LinkGraph()
+    urls = graph.urls
+    sitemap_ids = [urls.id(u) for u in checkpoint.seed_urls()]
+    for page in iter_jsonl(JSONL_OUTPUTS['links']):
+        graph.add_links(urls.id(page['url']), map(urls.id, page['links']))
+    crawled = {urls.id(r['local_url']) for r in iter_jsonl(JSONL_OUTPUTS['url_inventory'])}
+    # Every sitemap URL and link target fetched (the ids above are exactly those URLs)
+    complete = sitemap_done and len(crawled) == len(urls)
+    home = urls.id(frontier.canonicalize(f"{BASE_URL}/"))
+    links = graph.csr()
+    incoming = links.transpose()
+    inlinks = incoming.degrees()
+    ranks = pagerank(links, incoming=incoming)
+    depths = click_depth(links, home)
+    orphan_ids = set(orphans(inlinks, sitemap_ids, home)) if complete else None
+    scale = len(ranks)
+
+    def metrics(url):
+        url_id = urls.get(url)
+        if url_id is None:
+            return {'inlinks_count': 0, 'pagerank': 0.0, 'click_depth': None, 'orphan': False if complete else None}
+        return {
+            'inlinks_count': inlinks[url_id],
+            'pagerank': round(ranks[url_id] * scale, 4),
+            'click_depth': depths[url_id] if depths[url_id] >= 0 else None,
+            'orphan': url_id in orphan_ids if complete else None,
+        }
 
-            result['title'] = parser.title
-            result['meta_description'] = parser.meta_description
-            result['h1'] = parser.h1
-            result['canonical'] = parser.canonical
-            result['robots'] = parser.robots
-            result['word_count'] = len(' '.join(parser.text_content).split())
-            result['inlinks_count'] = 0
-            result['schema_types'] = []
-
-            # Schema Analysis
-            schemas = []
-            for script in parser.scripts:
-                try:
-                    data = json.loads(script)
-                    schemas.append(data)
-
-                    def extract_types(obj):
-                        types = []
-                        if isinstance(obj, dict):
-                            t = obj.get('@type')
-                            if t:
-                                if isinstance(t, list):
-                                    types.extend(t)
-                                else:
-                                    types.append(t)
-                            for k, v in obj.items():
-                                types.extend(extract_types(v))
-                        elif isinstance(obj, list):
-                            for item in obj:
-                                types.extend(extract_types(item))
-                        return types
-
-                    result['schema_types'].extend(extract_types(data))
-                except:
-                    pass
-
-            schema_inventory[result['url']] = schemas
-            # Remove duplicates and ensure all are strings
-            result['schema_types'] = list(set([str(x) for x in result['schema_types']]))
-
-            # On-page Checks
-            if not result['title']:
-                onpage_issues.append([result['url'], 'Missing Title', 'High', 'Add title tag'])
-            elif len(result['title']) > 60:
-                onpage_issues.append([result['url'], 'Title Too Long', 'Medium', 'Shorten title'])
-
-            if not result['meta_description']:
-                onpage_issues.append([result['url'], 'Missing Meta Description', 'High', 'Add meta description'])
-
-            if not result['h1']:
-                onpage_issues.append([result['url'], 'Missing H1', 'High', 'Add H1 tag'])
-            elif len(result['h1']) > 1:
-                onpage_issues.append([result['url'], 'Multiple H1', 'Medium', 'Use only one H1'])
-
-            if not result['canonical']:
-                onpage_issues.append([result['url'], 'Missing Canonical', 'High', 'Add canonical tag'])
-
-            if result['word_count'] < 300:
-                onpage_issues.append([result['url'], 'Thin Content', 'Medium', 'Add more content'])
-
-            # Tech Checks
-            if result['canonical']:
-                 # Check if canonical matches current URL
-                 # Note: result['canonical'] is likely absolute prod URL
-                 # result['url'] is also prod URL (mapped)
-                 if result['canonical'] != result['url']:
-                     tech_issues.append([result['url'], 'Canonical Mismatch', 'Medium', f"Canonical points to {result['canonical']}"])
+    return metrics, len(orphan_ids) if complete else None
 
-        else:
-            tech_issues.append([result['url'], f"Status {res['status']}", 'High', 'Check server logs'])
-            result['error'] = res.get('error')
-
-        # Headers Report
-        headers_report.append({
-            'url': result['url'],
-            'status': result['status'],
-            'cache_control': result['headers'].get('Cache-Control', 'N/A'),
-            'content_type': result['headers'].get('Content-Type', 'N/A'),
-            'ttfb': ttfb
-        })
-
-        crawl_results.append(result)
-
-        # Simple recursive crawl (discover internal links)
-        # If we have capacity left
-        if len(local_urls) < max_pages and res['status'] == 200:
-            for link in parser.links:
-                if link.startswith('/'):
-                    full_link = f"{BASE_URL}{link}"
-                    if full_link not in local_urls:
-                        local_urls.append(full_link)
-                elif link.startswith(BASE_URL):
-                    if link not in local_urls:
-                        local_urls.append(link)
-                elif link.startswith(PROD_URL):
-                    mapped = link.replace(PROD_URL, BASE_URL)
-                    if mapped not in local_urls:
-                        local_urls.append(mapped)
-
-    # Save Results
+def write_reports(sitemap, frontier, cache, checkpoint, sitemap_done):
+    # Each report is derived in one streaming pass over its JSONL file
+    metrics, orphan_count = link_metrics(frontier, checkpoint, sitemap_done)
+
+    def inventory():
+        for r in iter_jsonl(JSONL_OUTPUTS['url_inventory']):
+            r.update(metrics(r['local_url']))
+            yield r
 
     # 1. URL Inventory
     with open(f'{CRAWL_DIR}/url_inventory.csv', 'w', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(['URL', 'Status', 'Title', 'Meta Description', 'H1', 'Word Count', 'Canonical', 'Robots', 'Schema Types'])
-        for r in crawl_results:
+        writer.writerow(['URL', 'Status', 'Title', 'Meta Description', 'H1', 'Word Count', 'Canonical', 'Robots', 'Schema Types',
+                         'Inlinks', 'Internal PageRank', 'Click Depth', 'Orphan'])
+        crawled = ok = 0
+        for r in inventory():
+            crawled += 1
+            ok += r['status'] == 200
             writer.writerow([
                 r['url'],
                 r['status'],
@@ -332,46 +543,154 @@ def run_audit():
                 r.get('word_count', 0),
                 r.get('canonical', ''),
                 r.get('robots', ''),
-                ';'.join(r.get('schema_types', []))
+                ';'.join(r.get('schema_types', [])),
+                '' if r['inlinks_count'] is None else r['inlinks_count'],
+                '' if r['pagerank'] is None else r['pagerank'],
+                '' if r['click_depth'] is None else r['click_depth'],
+                'Yes' if r['orphan'] else ''
             ])
 
-    with open(f'{CRAWL_DIR}/url_inventory.json', 'w') as f:
-        json.dump(crawl_results, f, indent=2)
+    write_json_array(inventory(), f'{CRAWL_DIR}/url_inventory.json')
 
     # 2. On-page Issues
     with open(f'{ONPAGE_DIR}/onpage_issues.csv', 'w', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(['URL', 'Issue Type', 'Severity', 'Recommended Fix'])
-        writer.writerows(onpage_issues)
+        # Rows of one page are written together, so counting URL changes counts pages
+        pages_with_issues = 0
+        last_url = None
+        for row in iter_jsonl(JSONL_OUTPUTS['onpage_issues']):
+            if row[0] != last_url:
+                pages_with_issues += 1
+                last_url = row[0]
+            writer.writerow(row)
+
+    # 2b. Near-Duplicate Content: MinHash signatures go through the LSH index, so
+    # only pages sharing a signature band are ever compared
+    index = MinHashIndex()
+    for fp in iter_jsonl(JSONL_OUTPUTS['fingerprints']):
+        index.add((fp['url'], fp['title'] or '', fp['word_count']), bytes.fromhex(fp['minhash']))
+    clusters = index.clusters()
+    with open(f'{ONPAGE_DIR}/duplicates.csv', 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Cluster', 'URL', 'Title', 'Word Count', 'Similarity to First'])
+        for number, cluster in enumerate(clusters, 1):
+            first = cluster[0][1]
+            for (url, title, word_count), signature in cluster:
+                writer.writerow([number, url, title, word_count, f'{similarity(first, signature):.2f}'])
 
     # 3. Tech Issues
     with open(f'{TECH_DIR}/tech_issues.csv', 'w', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(['URL', 'Issue', 'Severity', 'Details'])
-        writer.writerows(tech_issues)
+        writer.writerows(iter_jsonl(JSONL_OUTPUTS['tech_issues']))
 
     # 4. Schema Inventory
-    with open(f'{SCHEMA_DIR}/schema_inventory.json', 'w') as f:
-        json.dump(schema_inventory, f, indent=2)
+    write_json_object(((s['url'], s['schemas']) for s in iter_jsonl(JSONL_OUTPUTS['schema_inventory'])),
+                      f'{SCHEMA_DIR}/schema_inventory.json')
+
+    # 4b. Schema Index: schema type -> URLs and @id -> URLs over every JSON-LD node
+    # of the crawl, nested ones included
+    schema_index = SchemaIndex()
+    for s in iter_jsonl(JSONL_OUTPUTS['schema_inventory']):
+        schema_index.add(s['url'], s['schemas'])
+    with open(f'{SCHEMA_DIR}/schema_index.json', 'w') as f:
+        json.dump(schema_index.as_dict(), f, indent=2)
 
     # 5. Headers Report
     with open(f'{HEADERS_DIR}/headers_report.md', 'w') as f:
         f.write("# Headers Report\n\n")
-        f.write("| URL | Status | TTFB (ms) | Cache-Control | Content-Type |\n")
-        f.write("|---|---|---|---|---|\n")
-        for h in headers_report:
-            f.write(f"| {h['url']} | {h['status']} | {h['ttfb']} | {h['cache_control']} | {h['content_type']} |\n")
+        f.write("TTFB = DNS + Connect + TLS + Wait (+ send/redirects); 0 DNS/Connect/TLS means a reused connection.\n\n")
+        f.write("Transfer = body bytes on the wire, Decoded = after decompression; '-' when served from the cache "
+                "without a download (Encoding is then the one the cached response had on the wire).\n\n")
+        f.write("| URL | Status | TTFB (ms) | DNS (ms) | Connect (ms) | TLS (ms) | Wait (ms) | Download (ms) "
+                "| Encoding | Transfer (KB) | Decoded (KB) | Ratio | Cache-Control | Content-Type |\n")
+        f.write("|---|---|---|---|---|---|---|---|---|---|---|---|---|---|\n")
+        # Page type (first path segment) -> [pages, wire bytes, decoded bytes] of complete downloads
+        by_type = {}
+        for h in iter_jsonl(JSONL_OUTPUTS['headers_report']):
+            t = h['timing']
+            phases = ' | '.join(str(round(t.get(k, 0))) if t else '-' for k in ('dns_ms', 'connect_ms', 'tls_ms', 'wait_ms', 'download_ms'))
+            x = h.get('transfer')
+            if x and x['wire_bytes']:
+                sizes = (f"{x['encoding'] or 'identity'} | {x['wire_bytes'] / 1024:.1f} | {x['decoded_bytes'] / 1024:.1f} "
+                         f"| {x['ratio']:.2f}{'' if x['complete'] else ' (partial)'}")
+                if x['complete']:
+                    totals = by_type.setdefault(page_type(h['url']), [0, 0, 0])
+                    totals[0] += 1
+                    totals[1] += x['wire_bytes']
+                    totals[2] += x['decoded_bytes']
+            else:
+                # Nothing downloaded (e.g. served from the cache): only the stored wire encoding is known
+                sizes = f"{h.get('encoding') or '-'} | - | - | -"
+            f.write(f"| {h['url']} | {h['status']} | {h['ttfb']} | {phases} | {sizes} | {h['cache_control']} | {h['content_type']} |\n")
+
+        f.write("\n## Compression by Page Type\n\n")
+        f.write("| Page Type | Pages | Transfer (KB) | Decoded (KB) | Ratio | Avg Transfer (KB) |\n")
+        f.write("|---|---|---|---|---|---|\n")
+        if not by_type:
+            f.write("| (no complete downloads) | 0 | - | - | - | - |\n")
+        for kind, (pages, wire, decoded) in sorted(by_type.items(), key=lambda item: -item[1][1]):
+            f.write(f"| {kind} | {pages} | {wire / 1024:.1f} | {decoded / 1024:.1f} | {decoded / wire:.2f} "
+                    f"| {wire / pages / 1024:.1f} |\n")
 
     # 6. Crawl Summary
     with open(f'{CRAWL_DIR}/crawl_summary.md', 'w') as f:
         f.write("# Crawl Summary\n\n")
-        f.write(f"- Total URLs Discovered: {len(local_urls)}\n")
-        f.write(f"- URLs Crawled: {len(crawl_results)}\n")
-        f.write(f"- Successful (200 OK): {len([r for r in crawl_results if r['status'] == 200])}\n")
-        f.write(f"- Errors: {len([r for r in crawl_results if r['status'] != 200])}\n")
-        f.write(f"- Pages with On-Page Issues: {len(set([x[0] for x in onpage_issues]))}\n")
-
-    print("Audit Complete. Artifacts saved.")
+        f.write(f"- Sitemap URLs Read: {sitemap.stats.urls} (from {sitemap.stats.sitemaps} sitemap files)\n")
+        f.write(f"- Total URLs Discovered: {frontier.seen_count}\n")
+        f.write(f"- URLs Crawled: {crawled}\n")
+        f.write(f"- Successful (200 OK): {ok}\n")
+        f.write(f"- Errors: {crawled - ok}\n")
+        f.write(f"- Pages with On-Page Issues: {pages_with_issues}\n")
+        if orphan_count is not None:
+            f.write(f"- Orphan Pages (in sitemap, no internal inlinks): {orphan_count}\n")
+        elif not STOP_AFTER:
+            f.write("- Orphan Pages: not computed (partial crawl: max-pages was reached before every sitemap URL "
+                    "and linked page was fetched)\n")
+        if STOP_AFTER:
+            f.write(f"- Head-only crawl: pages read up to {'</head>' if STOP_AFTER == 'head' else 'the first </h1>'}\n")
+        f.write(f"- Near-Duplicate Clusters: {len(clusters)} ({sum(map(len, clusters))} pages)\n")
+        wire = sum(t[1] for t in by_type.values())
+        if wire:
+            decoded = sum(t[2] for t in by_type.values())
+            f.write(f"- Page Bodies Transferred: {wire / 1024:.1f} KB ({decoded / 1024:.1f} KB decoded, "
+                    f"{decoded / wire:.2f}x compression)\n")
+        if cache is not None:
+            stats = cache.stats
+            f.write(f"- HTTP Cache: {stats.hits} hits, {stats.misses} misses, {stats.revalidated} revalidated "
+                    f"({stats.bytes_saved} bytes not re-downloaded)\n")
+        if LIMITER.stats.throttled:
+            f.write(f"- Throttled responses (429/5xx): {LIMITER.stats.throttled}, "
+                    f"waited {LIMITER.stats.waited_seconds:.1f}s in backoff\n")
 
 if __name__ == "__main__":
-    run_audit()
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Crawl the local site and write audit artifacts.")
+    arg_parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Maximum requests in flight')
+    arg_parser.add_argument('--per-host', type=int, default=PER_HOST_CONNECTIONS, help='Maximum concurrent connections per host')
+    arg_parser.add_argument('--max-pages', type=int, default=MAX_PAGES, help='Maximum number of pages to crawl')
+    arg_parser.add_argument('--cache-dir', default=None,
+                            help=f'Reuse unchanged pages via conditional GET (e.g. {CACHE_DIR})')
+    arg_parser.add_argument('--stream', action='store_true',
+                            help='Parse pages chunk by chunk while they download')
+    arg_parser.add_argument('--checkpoint', default=CHECKPOINT_PATH,
+                            help='SQLite file the crawl state is saved to as pages finish')
+    arg_parser.add_argument('--resume', action='store_true',
+                            help='Continue an interrupted crawl from --checkpoint instead of starting over')
+    arg_parser.add_argument('--parse-workers', type=int, default=0,
+                            help=f'Parse pages in N worker processes while the fetch threads keep downloading '
+                                 f'(0: parse in the crawl process; this machine has {os.cpu_count()} cores)')
+    arg_parser.add_argument('--parser-backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                            help='HTML tokenizer; lxml (C, faster) falls back to html.parser when not installed')
+    arg_parser.add_argument('--head-only', nargs='?', const='head', choices=STOP_POINTS, default=None,
+                            help='Metadata-only audit: stream each page and stop reading at </head> '
+                                 '(or after the first </h1> with "h1"); only head rules run, no word counts '
+                                 'or fingerprints, and links in the body are not followed')
+    args = arg_parser.parse_args()
+    if args.parse_workers and (args.stream or args.head_only):
+        arg_parser.error('--stream/--head-only parse inside the fetch threads; they cannot be combined with --parse-workers')
+    run_audit(concurrency=args.concurrency, per_host=args.per_host, max_pages=args.max_pages,
+              cache_dir=args.cache_dir, stream=args.stream, checkpoint_path=args.checkpoint, resume=args.resume,
+              parse_workers=args.parse_workers, parser_backend=args.parser_backend, head_only=args.head_only)
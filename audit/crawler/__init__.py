@@ -0,0 +1,7 @@
+"""
+Shared crawl helpers used by the audit scripts.
+
+The modules in this package are plain stdlib code so that the audit scripts
+(`audit/crawl_site.py`, `scripts/seo_deep_crawl.py`, ...) keep working without
+extra installs.
+"""
@@ -0,0 +1,336 @@
+"""
+On-disk HTTP response cache for incremental re-crawls.
+
+Entries are keyed by URL and keep the validators (ETag / Last-Modified), the
+response headers, the body and, optionally, the parse results derived from
+it. `cached_request()` sends If-None-Match / If-Modified-Since and, on a 304,
+returns the stored body so unchanged pages cost a header round trip only.
+
+When a sink factory is passed, a streamed 200 body is teed into the cache file
+while the caller parses it, so caching does not require buffering the page.
+
+Bodies reach the cache already decoded, so entries are stored as identity
+encoded: Content-Encoding / Content-Length / Transfer-Encoding are dropped
+from the stored headers and the coding used on the wire is kept separately
+in `CacheEntry.wire_encoding`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .stream import ChunkSink, SinkFactory, iter_file
+
+HIT = "hit"
+MISS = "miss"
+REVALIDATED = "revalidated"
+BYPASS = "bypass"
+
+# send(extra_request_headers, on_headers) -> (status, response_headers, body)
+# `on_headers(status, headers)` returns a sink or None. When it returns a sink
+# the body is streamed into it and `body` is None; otherwise it is buffered.
+SendFunc = Callable[[Dict[str, str], SinkFactory], Tuple[int, Dict[str, str], Optional[bytes]]]
+
+
+def no_sink(status: int, headers: Any) -> None:
+    return None
+
+
+def _lower_keys(headers: Dict[str, str]) -> Dict[str, str]:
+    return {k.lower(): v for k, v in headers.items()}
+
+
+# Headers that describe the body as it was transferred, not as it is stored
+_WIRE_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def identity_headers(headers: Dict[str, str]) -> Tuple[Dict[str, str], Optional[str]]:
+    """Headers for the decoded body, and the Content-Encoding it had on the wire (None if identity)."""
+    stored = {k: v for k, v in headers.items() if k.lower() not in _WIRE_HEADERS}
+    encoding = _lower_keys(headers).get("content-encoding")
+    return stored, encoding if encoding and encoding.strip().lower() != "identity" else None
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    bytes_saved: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status: int
+    headers: Dict[str, str]
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    max_age: Optional[int] = None
+    parsed: Optional[Dict[str, Any]] = None
+    # Content-Encoding of the original response; the stored body is always decoded
+    wire_encoding: Optional[str] = None
+    body_path: str = field(default="", repr=False)
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """True if the entry can be served without revalidating."""
+        if self.max_age is None:
+            return False
+        return ((now or time.time()) - self.stored_at) < self.max_age
+
+    def validators(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def body(self) -> bytes:
+        with open(self.body_path, "rb") as f:
+            return f.read()
+
+    def iter_body(self) -> Iterable[bytes]:
+        return iter_file(self.body_path)
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.body_path)
+        except OSError:
+            return 0
+
+
+@dataclass
+class CacheResult:
+    status: int
+    headers: Dict[str, str]
+    # None when the body was streamed to a sink, or is served from `entry`
+    # because a sink factory was given.
+    body: Optional[bytes]
+    state: str
+    entry: Optional[CacheEntry] = None
+
+
+class _BodyWriter:
+    """Temporary body file that is moved into place once the stream completes."""
+
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self.path = path
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def discard(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
+
+
+class ResponseCache:
+    """Directory-backed cache; safe to share between fetch threads."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        subdir = os.path.join(self.directory, digest[:2])
+        return os.path.join(subdir, f"{digest}.json"), os.path.join(subdir, f"{digest}.body")
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_meta(self, entry: CacheEntry) -> None:
+        meta_path, _ = self._paths(entry.url)
+        meta = asdict(entry)
+        meta.pop("body_path")
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def count(self, state: str, nbytes: int = 0) -> None:
+        with self._lock:
+            if state == HIT:
+                self.stats.hits += 1
+            elif state == REVALIDATED:
+                self.stats.revalidated += 1
+            elif state == MISS:
+                self.stats.misses += 1
+            self.stats.bytes_saved += nbytes
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        if meta.get("wire_encoding") is None:
+            # Entries written before the headers were stored identity-encoded
+            meta["headers"], meta["wire_encoding"] = identity_headers(meta["headers"])
+        return CacheEntry(body_path=body_path, **meta)
+
+    def prepare(self, url: str, status: int, headers: Dict[str, str]) -> Optional[CacheEntry]:
+        """Build the entry for a response, or None if it is not cacheable."""
+        lowered = _lower_keys(headers)
+        cache_control = parse_cache_control(lowered.get("cache-control", ""))
+        if status != 200 or "no-store" in cache_control:
+            return None
+        max_age = None
+        if "no-cache" not in cache_control and cache_control.get("max-age"):
+            try:
+                max_age = int(cache_control["max-age"] or 0)
+            except ValueError:
+                max_age = None
+        _, body_path = self._paths(url)
+        stored_headers, wire_encoding = identity_headers(headers)
+        return CacheEntry(
+            url=url,
+            status=status,
+            headers=stored_headers,
+            stored_at=time.time(),
+            etag=lowered.get("etag"),
+            last_modified=lowered.get("last-modified"),
+            max_age=max_age,
+            wire_encoding=wire_encoding,
+            body_path=body_path,
+        )
+
+    def store(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> Optional[CacheEntry]:
+        """Store a buffered 200 response; returns None if it is not cacheable."""
+        entry = self.prepare(url, status, headers)
+        if entry is not None:
+            self._write_atomic(entry.body_path, body)
+            self._write_meta(entry)
+        return entry
+
+    def open_body(self, entry: CacheEntry) -> _BodyWriter:
+        return _BodyWriter(entry.body_path)
+
+    def commit(self, entry: CacheEntry, writer: _BodyWriter) -> CacheEntry:
+        writer.commit()
+        self._write_meta(entry)
+        return entry
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str]) -> CacheEntry:
+        """Merge headers from a 304 into the entry and restart its freshness clock."""
+        existing = {k.lower(): k for k in entry.headers}
+        for name, value in headers.items():
+            if name.lower() in ("etag", "last-modified", "cache-control", "expires", "date"):
+                entry.headers[existing.get(name.lower(), name)] = value
+        lowered = _lower_keys(entry.headers)
+        entry.etag = lowered.get("etag")
+        entry.last_modified = lowered.get("last-modified")
+        entry.stored_at = time.time()
+        self._write_meta(entry)
+        return entry
+
+    def save_parsed(self, url: str, parsed: Dict[str, Any]) -> None:
+        """Attach parse results so a later 304 can skip parsing entirely."""
+        entry = self.lookup(url)
+        if entry is not None:
+            entry.parsed = parsed
+            self._write_meta(entry)
+
+
+def cached_request(
+    cache: Optional[ResponseCache],
+    url: str,
+    send: SendFunc,
+    sink_factory: Optional[SinkFactory] = None,
+) -> CacheResult:
+    """Fetch `url` through `send`, using and updating the cache if one is given.
+
+    With a `sink_factory`, network bodies are streamed into the returned sink
+    and cached bodies are left on disk (read them with `entry.iter_body()`).
+    """
+    on_headers = sink_factory or no_sink
+    if cache is None:
+        status, headers, body = send({}, on_headers)
+        return CacheResult(status, headers, body, BYPASS)
+
+    entry = cache.lookup(url)
+    if entry is not None and entry.is_fresh():
+        cache.count(HIT, entry.size())
+        return CacheResult(entry.status, entry.headers, None if sink_factory else entry.body(), HIT, entry)
+
+    pending: Dict[str, Any] = {}
+
+    def tee_headers(status: int, headers: Any) -> Optional[ChunkSink]:
+        sink = on_headers(status, headers)
+        if sink is None:
+            return None
+        new_entry = cache.prepare(url, status, dict(headers))
+        if new_entry is None:
+            return sink
+        writer = cache.open_body(new_entry)
+        pending.update(entry=new_entry, writer=writer, stopped=False)
+
+        def tee(chunk: bytes) -> Optional[bool]:
+            writer.write(chunk)
+            stop = sink(chunk)
+            if stop:
+                pending["stopped"] = True
+            return stop
+
+        return tee
+
+    try:
+        status, headers, body = send(entry.validators() if entry else {}, tee_headers)
+    except BaseException:
+        if "writer" in pending:
+            pending["writer"].discard()
+        raise
+
+    if status == 304 and entry is not None:
+        entry = cache.refresh(entry, headers)
+        cache.count(REVALIDATED, entry.size())
+        return CacheResult(entry.status, entry.headers, None if sink_factory else entry.body(), REVALIDATED, entry)
+
+    cache.count(MISS)
+    new_entry: Optional[CacheEntry] = None
+    if "writer" in pending:
+        if pending["stopped"]:
+            # Partial bodies are never cached.
+            pending["writer"].discard()
+        else:
+            new_entry = cache.commit(pending["entry"], pending["writer"])
+    elif status == 200 and body is not None:
+        new_entry = cache.store(url, status, headers, body)
+    return CacheResult(status, headers, body, MISS, new_entry)
@@ -0,0 +1,105 @@
+"""
+Column arrays and row masks for evaluating audit rules over all pages at once.
+
+A `Mask` holds one 0/1 byte per row. `&`, `|` and `~` combine masks as
+single big-integer operations, and `indices()` / `count()` read them back
+at C speed.
+
+`Categorical` stores a column of repeated values (page types, status codes,
+title lengths) as one code per row. `mask(predicate)` evaluates the
+predicate once per distinct value, and `bytes.translate` broadcasts the
+result to every row without a Python step per row.
+
+This is the stdlib counterpart of NumPy boolean masks, so the audit scripts
+keep running without extra installs:
+`types.isin(["service", "condition"]) & ~has_faq`.
+"""
+
+from __future__ import annotations
+
+from array import array
+from itertools import compress
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Sequence, Union
+
+
+class Mask:
+    """One flag per row, stored as a 0/1 byte."""
+
+    __slots__ = ("flags",)
+
+    def __init__(self, flags: bytes) -> None:
+        self.flags = flags
+
+    @classmethod
+    def of(cls, values: Iterable[Any]) -> "Mask":
+        """Mask from per-row truth values (a Python pass; prefer the column operations)."""
+        return cls(bytes(map(bool, values)))
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def _combine(self, other: "Mask", op: Callable[[int, int], int]) -> "Mask":
+        if len(other) != len(self):
+            raise ValueError(f"Mask lengths differ: {len(self)} != {len(other)}")
+        n = len(self.flags)
+        value = op(int.from_bytes(self.flags, "little"), int.from_bytes(other.flags, "little"))
+        return Mask(value.to_bytes(n, "little"))
+
+    def __and__(self, other: "Mask") -> "Mask":
+        return self._combine(other, int.__and__)
+
+    def __or__(self, other: "Mask") -> "Mask":
+        return self._combine(other, int.__or__)
+
+    def __invert__(self) -> "Mask":
+        return Mask(self.flags.translate(_NOT))
+
+    def count(self) -> int:
+        return self.flags.count(1)
+
+    def indices(self) -> Iterator[int]:
+        """Rows whose flag is set, in order."""
+        return compress(range(len(self.flags)), self.flags)
+
+    def select(self, values: Sequence[Any]) -> Iterator[Any]:
+        """The items of `values` at the flagged rows."""
+        return compress(values, self.flags)
+
+
+_NOT = bytes([1, 0]) + bytes(254)
+
+
+class Categorical:
+    """A column of hashable values stored as one small code per row."""
+
+    def __init__(self, values: Iterable[Hashable]) -> None:
+        values = values if isinstance(values, list) else list(values)
+        # Distinct values in order of first appearance, then each row's code; both passes run in C
+        index: Dict[Hashable, int] = dict.fromkeys(values)  # type: ignore[arg-type]
+        self.categories: List[Hashable] = list(index)
+        for code, value in enumerate(self.categories):
+            index[value] = code
+        codes = map(index.__getitem__, values)
+        # One byte per row while the values fit, so masks are a bytes.translate
+        self.codes: Union[bytes, array] = bytes(codes) if len(self.categories) <= 256 else array("I", codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def mask(self, predicate: Callable[[Any], Any]) -> Mask:
+        """Rows whose value satisfies `predicate`, evaluated once per distinct value."""
+        table = bytes(1 if predicate(value) else 0 for value in self.categories)
+        if isinstance(self.codes, bytes):
+            return Mask(self.codes.translate(table.ljust(256, b"\0")))
+        return Mask(bytes(map(table.__getitem__, self.codes)))
+
+    def isin(self, values: Iterable[Hashable]) -> Mask:
+        wanted = set(values)
+        return self.mask(wanted.__contains__)
+
+    def eq(self, value: Hashable) -> Mask:
+        return self.isin((value,))
+
+    def values(self) -> List[Hashable]:
+        """The column decoded back to one value per row."""
+        return list(map(self.categories.__getitem__, self.codes))
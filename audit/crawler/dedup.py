@@ -0,0 +1,158 @@
+"""
+Near-duplicate detection with MinHash signatures and a banded LSH index.
+
+`MinHasher` turns a stream of words into a MinHash signature of the page's
+3-word shingles using one-permutation hashing: each shingle is hashed once
+(blake2b, so signatures are stable across runs), the hash picks one of
+`NUM_BINS` bins and the bin keeps the minimum of the remaining bits. The
+fraction of bins two signatures agree on estimates the Jaccard similarity of
+their shingle sets, at the cost of one hash per shingle.
+
+`MinHashIndex` finds similar signatures without pairwise comparison: the
+signature is cut into bands of `BAND_ROWS` bins, each band is a hash-table
+key, and only signatures that share a whole band are compared. With 16 bands
+of 4 rows, pages with Jaccard similarity 0.7 share a band with probability
+0.99 while unrelated pages practically never do, so the work stays close
+to linear in the number of pages.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Generic, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+SHINGLE_SIZE = 3
+NUM_BINS = 64
+BAND_ROWS = 4
+# Estimated Jaccard similarity at or above which two pages are near-duplicates.
+DEFAULT_THRESHOLD = 0.7
+# Fewer shingles than this and the signature is too noisy to compare.
+MIN_SHINGLES = 8
+
+# Bin values are 16 bits; EMPTY marks a bin no shingle hashed into.
+EMPTY = 0xFFFF
+_EMPTY_BYTES = EMPTY.to_bytes(2, "big")
+_BIN_BITS = NUM_BINS.bit_length() - 1
+_BAND_BYTES = BAND_ROWS * 2
+
+K = TypeVar("K", bound=Hashable)
+
+
+class MinHasher:
+    """Accumulate word shingles into a MinHash signature; words may arrive in any number of chunks."""
+
+    __slots__ = ("_window", "_mins", "shingles")
+
+    def __init__(self) -> None:
+        self._window: List[str] = []
+        self._mins = [EMPTY] * NUM_BINS
+        self.shingles = 0
+
+    def update(self, words: Sequence[str]) -> None:
+        window = self._window + [w.lower() for w in words]
+        mins = self._mins
+        count = len(window) - SHINGLE_SIZE + 1
+        for i in range(count):
+            shingle = " ".join(window[i:i + SHINGLE_SIZE]).encode("utf-8", "replace")
+            h = int.from_bytes(hashlib.blake2b(shingle, digest_size=4).digest(), "big")
+            b = h & (NUM_BINS - 1)
+            v = (h >> _BIN_BITS) % EMPTY
+            if v < mins[b]:
+                mins[b] = v
+        if count > 0:
+            self.shingles += count
+        self._window = window[-(SHINGLE_SIZE - 1):]
+
+    def digest(self) -> Optional[bytes]:
+        """The signature (NUM_BINS big-endian 16-bit values), or None below MIN_SHINGLES shingles."""
+        if self.shingles < MIN_SHINGLES:
+            return None
+        return b"".join(v.to_bytes(2, "big") for v in self._mins)
+
+
+def minhash(text: str) -> Optional[bytes]:
+    hasher = MinHasher()
+    hasher.update(text.split())
+    return hasher.digest()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity: agreeing bins over bins filled in either signature."""
+    same = filled = 0
+    for i in range(0, len(a), 2):
+        x, y = a[i:i + 2], b[i:i + 2]
+        if x != y:
+            filled += 1
+        elif x != _EMPTY_BYTES:
+            same += 1
+            filled += 1
+    return same / filled if filled else 0.0
+
+
+class MinHashIndex(Generic[K]):
+    """LSH index over MinHash signatures that groups near-duplicates into clusters."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD) -> None:
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._keys: List[K] = []
+        self._signatures: List[bytes] = []
+        self._parent: List[int] = []
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def add(self, key: K, signature: bytes) -> List[Tuple[K, float]]:
+        """Index `signature`; returns the earlier keys at or above the threshold and their similarity."""
+        index = len(self._keys)
+        self._keys.append(key)
+        self._signatures.append(signature)
+        self._parent.append(index)
+        matches: List[Tuple[K, float]] = []
+        seen = set()
+        for band, start in enumerate(range(0, len(signature), _BAND_BYTES)):
+            rows = signature[start:start + _BAND_BYTES]
+            if rows == _EMPTY_BYTES * BAND_ROWS:
+                # Empty bands of short pages would match each other
+                continue
+            bucket = self._buckets.setdefault((band, rows), [])
+            for other in bucket:
+                if other in seen:
+                    continue
+                seen.add(other)
+                self.comparisons += 1
+                score = similarity(signature, self._signatures[other])
+                if score >= self.threshold:
+                    matches.append((self._keys[other], score))
+                    root, other_root = self._find(index), self._find(other)
+                    if root != other_root:
+                        self._parent[max(root, other_root)] = min(root, other_root)
+            bucket.append(index)
+        return matches
+
+    def clusters(self) -> List[List[Tuple[K, bytes]]]:
+        """Groups of two or more near-duplicates as `(key, signature)`, in insertion order.
+
+        Clustering is transitive: A~B and B~C puts A, B and C together.
+        """
+        groups: Dict[int, List[Tuple[K, bytes]]] = {}
+        for i, key in enumerate(self._keys):
+            groups.setdefault(self._find(i), []).append((key, self._signatures[i]))
+        return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicates(items: Iterable[Tuple[K, bytes]], threshold: float = DEFAULT_THRESHOLD) -> List[List[Tuple[K, bytes]]]:
+    index: MinHashIndex[K] = MinHashIndex(threshold)
+    for key, signature in items:
+        index.add(key, signature)
+    return index.clusters()
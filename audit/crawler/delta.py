@@ -0,0 +1,144 @@
+"""
+Page-level deltas between audit reports.
+
+`ReportIndex` keys a report's pages by canonical URL and keeps only hashes:
+one digest per page field (blake2b over canonical JSON) and a digest of the
+whole page, plus the page's issue labels. Comparing two reports is then a
+dict lookup per URL and a digest comparison per field, so a history of
+multi-megabyte reports can be diffed while only one report is loaded at a
+time. Indexes serialise to JSON (`as_dict()` / `from_dict()`) so the index a
+set of artifacts was built from can be stored next to them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .frontier import canonicalize_url
+
+# Fields that change on every run without the page changing.
+VOLATILE_FIELDS = frozenset({"loadTime"})
+DIGEST_SIZE = 8
+
+
+def digest(value: Any) -> str:
+    """Stable hex digest of a JSON-serialisable value."""
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+@dataclass
+class PageEntry:
+    url: str
+    digest: str
+    fields: Dict[str, str]
+    issues: Tuple[str, ...] = ()
+
+
+class ReportIndex:
+    """Per-URL field digests and issue labels of one report."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.pages: Dict[str, PageEntry] = {}
+
+    @classmethod
+    def build(
+        cls,
+        name: str,
+        pages: Iterable[Mapping[str, Any]],
+        issues: Optional[Callable[[Mapping[str, Any]], Iterable[str]]] = None,
+    ) -> "ReportIndex":
+        """Index `pages`; `issues(page)` lists its issue labels (default: the page's "issues" field)."""
+        index = cls(name)
+        for page in pages:
+            # The raw "url" is one of the fields: a page respelled under the same
+            # canonical key shows up as a changed "url"
+            fields = {k: digest(v) for k, v in page.items() if k not in VOLATILE_FIELDS}
+            labels = issues(page) if issues is not None else page.get("issues") or ()
+            key = canonicalize_url(page["url"]) or page["url"]
+            index.pages[key] = PageEntry(page["url"], digest(sorted(fields.items())), fields, tuple(sorted(set(labels))))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "pages": {
+                key: {"url": e.url, "digest": e.digest, "fields": e.fields, "issues": list(e.issues)}
+                for key, e in self.pages.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ReportIndex":
+        index = cls(data["name"])
+        for key, e in data["pages"].items():
+            index.pages[key] = PageEntry(e["url"], e["digest"], e["fields"], tuple(e["issues"]))
+        return index
+
+
+@dataclass
+class ReportDelta:
+    """What changed from report `old` to report `new` (URLs as written in the reports)."""
+
+    old: str
+    new: str
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # URL -> names of the fields whose digest changed
+    changed: Dict[str, List[str]] = field(default_factory=dict)
+    issues_added: List[Tuple[str, str]] = field(default_factory=list)
+    issues_resolved: List[Tuple[str, str]] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def changed_fields(self) -> Set[str]:
+        return {name for names in self.changed.values() for name in names}
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "old": self.old,
+            "new": self.new,
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+            "unchanged": self.unchanged,
+            "issues_added": [list(item) for item in self.issues_added],
+            "issues_resolved": [list(item) for item in self.issues_resolved],
+        }
+
+
+def diff(old: ReportIndex, new: ReportIndex) -> ReportDelta:
+    """Compare two indexes page by page; unchanged pages cost one digest comparison."""
+    delta = ReportDelta(old.name, new.name)
+    for key, entry in new.pages.items():
+        before = old.pages.get(key)
+        if before is None:
+            delta.added.append(entry.url)
+            delta.issues_added.extend((entry.url, issue) for issue in entry.issues)
+            continue
+        if before.digest == entry.digest:
+            delta.unchanged += 1
+            continue
+        names = sorted(name for name in before.fields.keys() | entry.fields.keys()
+                       if before.fields.get(name) != entry.fields.get(name))
+        if names:
+            delta.changed[entry.url] = names
+        if before.issues != entry.issues:
+            old_issues, new_issues = set(before.issues), set(entry.issues)
+            delta.issues_added.extend((entry.url, i) for i in entry.issues if i not in old_issues)
+            delta.issues_resolved.extend((entry.url, i) for i in before.issues if i not in new_issues)
+    for key, entry in old.pages.items():
+        if key not in new.pages:
+            delta.removed.append(entry.url)
+            delta.issues_resolved.extend((entry.url, issue) for issue in entry.issues)
+    return delta
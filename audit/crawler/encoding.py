@@ -0,0 +1,158 @@
+"""
+HTTP content-coding negotiation and streaming decompression.
+
+`ACCEPT_ENCODING` advertises gzip and deflate, plus br when a Brotli decoder
+(`brotli` or `brotlicffi`) is installed. `decode_chunks()` undoes the
+response's Content-Encoding chunk by chunk, so compressed pages can still be
+streamed into the parser, and counts the bytes on the wire and after decoding
+in a `TransferSize` as they pass. A body in a coding it has no decoder for
+(e.g. br without Brotli installed) raises `ContentDecodingError` instead of
+reaching the parser or the cache still compressed.
+"""
+
+from __future__ import annotations
+
+import http.client
+import zlib
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional
+
+try:  # Optional Brotli support
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depends on environment
+    try:
+        import brotlicffi as brotli  # type: ignore
+    except ImportError:
+        brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+
+SUPPORTED_ENCODINGS = ("gzip", "deflate") + (("br",) if BROTLI_AVAILABLE else ())
+ACCEPT_ENCODING = ", ".join(SUPPORTED_ENCODINGS)
+# Legacy aliases servers may still send.
+_ALIASES = {"x-gzip": "gzip"}
+
+
+class ContentDecodingError(http.client.HTTPException):
+    """The body could not be decoded with its declared Content-Encoding."""
+
+
+@dataclass
+class TransferSize:
+    """Body bytes of one response as transferred and after content decoding.
+
+    `complete` is False when the body was not read to the end (e.g. a
+    head-only parse stopped the download), in which case both counts cover
+    only the part that was read.
+    """
+
+    encoding: str = ""
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+    complete: bool = False
+
+    @property
+    def ratio(self) -> float:
+        """Decoded size over wire size (1.0 for uncompressed bodies)."""
+        return self.decoded_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    def as_dict(self) -> dict:
+        return {
+            "encoding": self.encoding,
+            "wire_bytes": self.wire_bytes,
+            "decoded_bytes": self.decoded_bytes,
+            "ratio": round(self.ratio, 2),
+            "complete": self.complete,
+        }
+
+
+def content_codings(header: Optional[str]) -> List[str]:
+    """The codings named in a Content-Encoding header, in the order they were applied."""
+    codings = []
+    for token in (header or "").split(","):
+        token = token.strip().lower()
+        if token and token != "identity":
+            codings.append(_ALIASES.get(token, token))
+    return codings
+
+
+class _Inflater:
+    """deflate decoder; RFC 9110 deflate is zlib-wrapped, but some servers send raw deflate."""
+
+    def __init__(self) -> None:
+        self._obj: Any = None
+        self._head = b""
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._obj is None:
+            self._head += data
+            if len(self._head) < 2:
+                return b""
+            data, self._head = self._head, b""
+            zlib_wrapped = data[0] & 0x0F == 8 and int.from_bytes(data[:2], "big") % 31 == 0
+            self._obj = zlib.decompressobj(zlib.MAX_WBITS if zlib_wrapped else -zlib.MAX_WBITS)
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush() if self._obj is not None else b""
+
+
+class _Unbrotli:
+    def __init__(self) -> None:
+        self._obj = brotli.Decompressor()
+        # brotli names the method process(), brotlicffi decompress()
+        self._process = getattr(self._obj, "process", None) or self._obj.decompress
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._process(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _decoder(coding: str) -> Any:
+    if coding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if coding == "deflate":
+        return _Inflater()
+    if coding == "br" and BROTLI_AVAILABLE:
+        return _Unbrotli()
+    return None
+
+
+def decode_chunks(chunks: Iterable[bytes], content_encoding: Optional[str], transfer: TransferSize) -> Iterator[bytes]:
+    """Yield the decoded body of `chunks`, updating `transfer` as they pass.
+
+    Raises `ContentDecodingError` on the first body bytes if a coding has no
+    decoder here; an empty body (e.g. a 304) is fine whatever its header says.
+    """
+    codings = content_codings(content_encoding)
+    decoders = [_decoder(coding) for coding in reversed(codings)]
+    unsupported = [coding for coding, d in zip(reversed(codings), decoders) if d is None]
+    transfer.encoding = ", ".join(codings)
+
+    def run(data: bytes, final: bool) -> bytes:
+        if unsupported:
+            if data:
+                raise ContentDecodingError(f"No decoder for {', '.join(unsupported)} body "
+                                           f"(supported: {ACCEPT_ENCODING})")
+            return data
+        try:
+            for d in decoders:
+                data = d.decompress(data)
+                if final:
+                    data += d.flush()
+        except Exception as exc:
+            raise ContentDecodingError(f"Cannot decode {transfer.encoding} body: {exc}") from exc
+        transfer.decoded_bytes += len(data)
+        return data
+
+    for chunk in chunks:
+        transfer.wire_bytes += len(chunk)
+        data = run(chunk, False)
+        if data:
+            yield data
+    tail = run(b"", True)
+    if tail:
+        yield tail
+    transfer.complete = True
@@ -0,0 +1,119 @@
+"""
+Concurrent fetch engine.
+
+Runs a blocking fetch function on a thread pool with a global concurrency
+limit and a per-host connection cap, yielding results as they complete so the
+caller can parse pages (and queue newly discovered URLs) while other requests
+are still in flight.
+
+An optional `process(url, result)` stage runs when a fetch completes: if it
+returns a Future (e.g. the page handed to a process pool for parsing), the
+host's connection slot is released at once and the result is yielded only
+when that Future is done, so fetching and CPU-bound parsing overlap.
+"""
+
+from __future__ import annotations
+
+import urllib.parse
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_HOST = 4
+
+
+def host_key(url: str) -> str:
+    """Return the scheme://host[:port] key used for per-host accounting."""
+    parsed = urllib.parse.urlsplit(url)
+    return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+
+class FetchEngine:
+    """Fetch URLs concurrently and hand back results in completion order."""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Any],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        process: Optional[Callable[[str, Any], Optional[Future]]] = None,
+    ) -> None:
+        if concurrency < 1 or per_host < 1:
+            raise ValueError("concurrency and per_host must be >= 1")
+        self.fetch = fetch
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fetch")
+        self._pending: Dict[str, Deque[str]] = {}
+        self._hosts: Deque[str] = deque()
+        self._inflight: Counter = Counter()
+        self._futures: Dict[Future, Tuple[str, str]] = {}
+        self.process = process
+        # Fetched results waiting for their process() Future
+        self._processing: Dict[Future, Tuple[str, Any]] = {}
+
+    def __enter__(self) -> "FetchEngine":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def pending(self) -> int:
+        """Number of URLs queued, in flight or being processed."""
+        return sum(len(q) for q in self._pending.values()) + len(self._futures) + len(self._processing)
+
+    def submit(self, url: str) -> None:
+        """Queue a URL; it is dispatched once a slot for its host is free."""
+        host = host_key(url)
+        queue = self._pending.get(host)
+        if queue is None:
+            queue = self._pending[host] = deque()
+            self._hosts.append(host)
+        queue.append(url)
+        self._dispatch()
+
+    def _next_host(self) -> Optional[str]:
+        # Round-robin over hosts that have queued work and a free connection.
+        for _ in range(len(self._hosts)):
+            host = self._hosts[0]
+            self._hosts.rotate(-1)
+            if self._pending[host] and self._inflight[host] < self.per_host:
+                return host
+        return None
+
+    def _dispatch(self) -> None:
+        while len(self._futures) < self.concurrency:
+            host = self._next_host()
+            if host is None:
+                return
+            url = self._pending[host].popleft()
+            self._inflight[host] += 1
+            self._futures[self._executor.submit(self.fetch, url)] = (host, url)
+
+    def results(self) -> Iterator[Tuple[str, Any]]:
+        """Yield `(url, result)` pairs until nothing is queued or in flight.
+
+        URLs submitted while iterating are picked up by the same loop.
+        """
+        self._dispatch()
+        while self._futures or self._processing:
+            done, _ = wait([*self._futures, *self._processing], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in self._processing:
+                    yield self._processing.pop(future)
+                    continue
+                host, url = self._futures.pop(future)
+                self._inflight[host] -= 1
+                self._dispatch()
+                result = future.result()
+                stage = self.process(url, result) if self.process is not None else None
+                if stage is None:
+                    yield url, result
+                else:
+                    self._processing[stage] = (url, result)
+            self._dispatch()
@@ -0,0 +1,151 @@
+"""
+Crawl frontier: URL canonicalization, hashed dedup and a FIFO queue.
+
+Every URL is reduced to one canonical form before it is checked against the
+seen-set, so `/about`, `/about/`, `/about#team` and the production-domain
+spelling of the same page are only crawled once. Seed URLs (`add()`, e.g. from
+the sitemap) are popped before discovered links (`add_link()`), so seeds can
+be fed in lazily without losing their priority.
+
+An `on_queue(url, is_seed)` callback sees every newly queued URL (used by the
+crawl checkpoint), and `restore()` reloads a checkpointed crawl.
+"""
+
+from __future__ import annotations
+
+import urllib.parse
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _origin(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def canonicalize_url(url: str, aliases: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """Return the canonical form of an absolute http(s) URL, or None.
+
+    - scheme and host are lower-cased and default ports dropped
+    - origins listed in `aliases` are rewritten (e.g. production -> localhost)
+    - the fragment is removed and query parameters are sorted
+    - a trailing slash is removed from every path except the root
+    """
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+    if aliases:
+        target = aliases.get(f"{scheme}://{netloc}")
+        if target:
+            target_parts = urllib.parse.urlsplit(target)
+            scheme, netloc = target_parts.scheme, target_parts.netloc
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = ""
+    if parts.query:
+        params = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        query = urllib.parse.urlencode(sorted(params))
+
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ""))
+
+
+class Frontier:
+    """FIFO crawl queues (seeds first, then links) backed by a hashed seen-set."""
+
+    def __init__(
+        self,
+        base_url: str,
+        aliases: Optional[Iterable[str]] = None,
+        on_queue: Optional[Callable[[str, bool], Any]] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.origin = _origin(self.base_url)
+        # Every alias origin (e.g. the production domain) maps onto base_url.
+        self.aliases: Dict[str, str] = {_origin(a): self.origin for a in aliases or ()}
+        self._seen: Set[str] = set()
+        self._seeds: Deque[str] = deque()
+        self._queue: Deque[str] = deque()
+        self.on_queue = on_queue
+
+    def __len__(self) -> int:
+        return len(self._seeds) + len(self._queue)
+
+    def __bool__(self) -> bool:
+        return bool(self._seeds or self._queue)
+
+    def __contains__(self, url: str) -> bool:
+        canonical = self.canonicalize(url)
+        return canonical is not None and canonical in self._seen
+
+    @property
+    def seen_count(self) -> int:
+        """Number of distinct URLs discovered so far (queued or crawled)."""
+        return len(self._seen)
+
+    def canonicalize(self, url: str) -> Optional[str]:
+        if url.startswith("//"):
+            url = f"{self.origin.split(':', 1)[0]}:{url}"
+        elif url.startswith("/"):
+            url = f"{self.base_url}{url}"
+        return canonicalize_url(url, self.aliases)
+
+    def is_internal(self, canonical_url: str) -> bool:
+        return _origin(canonical_url) == self.origin
+
+    @property
+    def seeds_queued(self) -> int:
+        return len(self._seeds)
+
+    def add(self, url: str) -> bool:
+        """Queue a seed URL if its canonical form has not been seen; returns True if queued."""
+        canonical = self.canonicalize(url)
+        if canonical is None or canonical in self._seen:
+            return False
+        self._seen.add(canonical)
+        self._seeds.append(canonical)
+        if self.on_queue is not None:
+            self.on_queue(canonical, True)
+        return True
+
+    def add_link(self, href: str) -> bool:
+        """Queue a discovered link if it is internal (relative, base or alias origin)."""
+        canonical = self.canonicalize(href)
+        if canonical is None or not self.is_internal(canonical) or canonical in self._seen:
+            return False
+        self._seen.add(canonical)
+        self._queue.append(canonical)
+        if self.on_queue is not None:
+            self.on_queue(canonical, False)
+        return True
+
+    def restore(self, done: Iterable[str], pending: Iterable[Tuple[str, bool]]) -> None:
+        """Reload saved state: `done` URLs are marked seen, `pending` `(url, is_seed)` are queued again.
+
+        URLs are expected in canonical form (as passed to `on_queue`); `on_queue`
+        is not called for them.
+        """
+        self._seen.update(done)
+        for url, seed in pending:
+            if url not in self._seen:
+                self._seen.add(url)
+                (self._seeds if seed else self._queue).append(url)
+
+    def pop(self) -> str:
+        return self._seeds.popleft() if self._seeds else self._queue.popleft()
@@ -0,0 +1,115 @@
+"""
+JSON-LD node walking and a crawl-wide schema index.
+
+`iter_nodes()` visits every node object of a JSON-LD document at any depth
+(top level, `@graph` members, and nodes nested in properties such as
+`publisher`, `mainEntity` or `about`). It uses an explicit stack, so deeply
+nested markup cannot hit the recursion limit.
+
+`SchemaIndex` inverts the nodes of every page it is given into two maps:
+schema type -> URLs and `@id` -> the nodes carrying it. Presence questions
+over a whole crawl are then dict and set lookups, e.g. "which condition pages
+lack FAQPage" is `index.lacking("FAQPage", condition_urls)`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+def iter_nodes(data: Any) -> Iterator[Dict[str, Any]]:
+    """Every object in a JSON-LD document (a blob, or a list of blobs), in document order."""
+    stack = [data]
+    pop, push = stack.pop, stack.extend
+    while stack:
+        obj = pop()
+        if isinstance(obj, dict):
+            yield obj
+            # Reversed so the first child is popped first; scalars are popped and dropped
+            push(reversed(obj.values()))
+        elif isinstance(obj, list):
+            push(reversed(obj))
+
+
+def node_types(node: Dict[str, Any]) -> List[str]:
+    """The `@type` values of one node (a single type or a list of them)."""
+    types = node.get("@type")
+    if not types:
+        return []
+    if isinstance(types, list):
+        return [str(t) for t in types]
+    return [str(types)]
+
+
+def schema_types(data: Any) -> List[str]:
+    """Distinct schema types anywhere in `data`, in order of first appearance."""
+    found: Dict[str, None] = {}
+    for node in iter_nodes(data):
+        if "@type" in node:
+            found.update(dict.fromkeys(node_types(node)))
+    return list(found)
+
+
+class SchemaIndex:
+    """Schema type -> URLs and `@id` -> nodes over the JSON-LD of many pages."""
+
+    def __init__(self) -> None:
+        self._urls: Dict[str, Dict[str, None]] = {}
+        self._types: Dict[str, Dict[str, None]] = {}
+        self._ids: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._types
+
+    def add(self, url: str, data: Any) -> List[str]:
+        """Index the JSON-LD `data` of `url`; returns the distinct types found in `data`.
+
+        Adding to a URL that is already indexed extends its types (e.g. one
+        call per `<script type="application/ld+json">` block).
+        """
+        found: Dict[str, None] = {}
+        for node in iter_nodes(data):
+            for t in node_types(node):
+                found[t] = None
+            node_id = node.get("@id")
+            if node_id:
+                self._ids.setdefault(str(node_id), []).append((url, node))
+        types = self._types.setdefault(url, {})
+        for t in found:
+            if t not in types:
+                types[t] = None
+                self._urls.setdefault(t, {})[url] = None
+        return list(found)
+
+    def types(self) -> List[str]:
+        """Every schema type seen, in order of first appearance."""
+        return list(self._urls)
+
+    def types_of(self, url: str) -> List[str]:
+        return list(self._types.get(url, ()))
+
+    def urls(self, schema_type: str) -> List[str]:
+        """URLs with at least one node of `schema_type`, in the order they were added."""
+        return list(self._urls.get(schema_type, ()))
+
+    def has(self, url: str, schema_type: str) -> bool:
+        return url in self._urls.get(schema_type, ())
+
+    def lacking(self, schema_type: str, urls: Iterable[str]) -> List[str]:
+        """The `urls` without a node of `schema_type`."""
+        present = self._urls.get(schema_type, {})
+        return [url for url in urls if url not in present]
+
+    def nodes(self, node_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(url, node) for every node with this `@id`: its definitions and references."""
+        return self._ids.get(node_id, [])
+
+    def as_dict(self) -> Dict[str, Dict[str, List[str]]]:
+        """JSON-friendly form: type -> URLs, and `@id` -> the URLs it appears on."""
+        return {
+            "types": {t: list(urls) for t, urls in self._urls.items()},
+            "ids": {node_id: list(dict.fromkeys(url for url, _ in nodes)) for node_id, nodes in self._ids.items()},
+        }
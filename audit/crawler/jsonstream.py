@@ -0,0 +1,316 @@
+"""
+Incremental JSON reader for large reports.
+
+Lighthouse and audit reports are megabytes of JSON of which the scripts read
+a few members: `audits.<id>`, `categories`, `pages[*]`. `json.load` builds
+every object first, including the base64 screenshots. The readers here
+scan the file in chunks instead:
+- they walk to a member path;
+- they materialize only the values asked for, each decoded by the C scanner
+  behind `json.loads`;
+- they step over everything else without building it. A regular
+  expression consumes everything between two brackets, strings included,
+  in one match, so even a multi-megabyte string is crossed at C speed.
+
+Memory stays at a chunk or two plus the values returned, and reading stops
+as soon as the requested data has been seen.
+
+    with open(path, encoding="utf-8") as f:
+        report = load(f, keys=("finalUrl", "categories", "audits"), skip=LIGHTHOUSE_SKIP)
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import IO, Any, Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+# Lighthouse members holding screenshots (base64 images) and other data the
+# audit scripts never read.
+LIGHTHOUSE_SKIP = (
+    "fullPageScreenshot",
+    "i18n",
+    "timing",
+    "audits.screenshot-thumbnails",
+    "audits.final-screenshot",
+    "audits.full-page-screenshot",
+)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_CONTAINER_RUN = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,\]}\s]")
+_DECODER = json.JSONDecoder()
+# A key without escapes, which is nearly every key, needs no decoding
+_PLAIN_KEY = re.compile(r'"([^"\\]*)"')
+
+
+class _Reader:
+    """Chunked cursor over a text stream; text before the cursor is dropped on every refill."""
+
+    def __init__(self, fp: IO[str], chunk_size: int = CHUNK_SIZE) -> None:
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self, size: int = 0) -> bool:
+        """Drop the consumed text and append at least one more chunk (or `size` characters)."""
+        data = self._fp.read(max(size, self._chunk_size))
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"{message} near {self.buf[self.pos:self.pos + 40]!r}")
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of input)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expected {char!r}")
+        self.pos += 1
+
+    def _skip_string(self) -> None:
+        self.pos += 1  # opening quote
+        while True:
+            m = _STRING_SPECIAL.search(self.buf, self.pos)
+            if m is None:
+                self.pos = len(self.buf)
+            elif m.group() == '"':
+                self.pos = m.end()
+                return
+            elif m.end() < len(self.buf):
+                self.pos = m.end() + 1  # backslash and the escaped character
+                continue
+            else:
+                self.pos = m.start()  # rescan the backslash once more text is in
+            if not self._fill():
+                raise self.error("Unterminated string")
+
+    def skip_value(self) -> None:
+        char = self.peek()
+        if char == '"':
+            self._skip_string()
+        elif char in ("{", "["):
+            depth = 0
+            while True:
+                # Everything up to the next bracket, whole strings included, in one match
+                self.pos = _CONTAINER_RUN.match(self.buf, self.pos).end()
+                if self.pos == len(self.buf):
+                    if not self._fill():
+                        raise self.error("Unterminated container")
+                    continue
+                if self.buf[self.pos] == '"':
+                    # A string the buffer cuts off; finish it without rescanning its start
+                    self._skip_string()
+                    continue
+                depth += 1 if self.buf[self.pos] in "{[" else -1
+                self.pos += 1
+                if depth == 0:
+                    return
+        elif char:
+            while True:
+                m = _SCALAR_END.search(self.buf, self.pos)
+                if m is not None:
+                    self.pos = m.start()
+                    return
+                self.pos = len(self.buf)
+                if not self._fill():
+                    return
+        else:
+            raise self.error("Unexpected end of input")
+
+    def read_value(self) -> Any:
+        """Decode the value at the cursor with the C scanner, reading on until it is complete."""
+        char = self.peek()
+        if len(self.buf) - self.pos < self._chunk_size:
+            # Top up first so that only values larger than a chunk need a retry
+            self._fill()
+        if char not in '"[{':
+            # A number is only complete once the character after it is in
+            while _SCALAR_END.search(self.buf, self.pos) is None and self._fill():
+                pass
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Most likely cut off by the end of the buffer; doubling what is
+                # read keeps a value spanning many chunks linear to decode
+                if not self._fill(len(self.buf) - self.pos):
+                    raise
+                continue
+            self.pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Yield the keys of the object at the cursor; the caller consumes each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self.error("Expected a key")
+            m = _PLAIN_KEY.match(self.buf, self.pos)
+            if m is not None:
+                key, self.pos = m.group(1), m.end()
+            else:
+                key = self.read_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self.error("Expected ',' or '}'")
+
+    def items(self) -> Iterator[int]:
+        """Yield the indexes of the array at the cursor; the caller consumes each value."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self.error("Expected ',' or ']'")
+
+    def descend(self, path: Sequence[Any]) -> None:
+        """Move the cursor to the value at `path` (object keys and array indexes)."""
+        for step in path:
+            found = False
+            children = self.items() if isinstance(step, int) else self.members()
+            for name in children:
+                if name == step:
+                    found = True
+                    break
+                self.skip_value()
+            if not found:
+                raise KeyError(step)
+
+    def read_object(self, keys: Optional[Collection[str]], skip: "_SkipPaths", prefix: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        wanted = set(keys) if keys is not None else None
+        for key in self.members():
+            if wanted is not None and key not in wanted:
+                self.skip_value()
+                continue
+            name = skip.match(prefix, key)
+            if name in skip.paths:
+                self.skip_value()
+            else:
+                result[key] = self.read_pruned(skip, name)
+            if wanted is not None and len(result) == len(wanted):
+                # Everything asked for is read; the rest of the input is never scanned
+                break
+        return result
+
+    def read_array(self, skip: "_SkipPaths", prefix: str) -> List[Any]:
+        name = skip.match(prefix, "*")
+        return [self.read_pruned(skip, name) for _ in self.items()]
+
+    def read_pruned(self, skip: "_SkipPaths", name: str) -> Any:
+        """Read the value at the cursor, which sits at member path `name`, without the paths in `skip`."""
+        if name in skip.parents:
+            char = self.peek()
+            if char == "{":
+                return self.read_object(None, skip, name + ".")
+            if char == "[":
+                return self.read_array(skip, name + ".")
+        return self.read_value()
+
+
+class _SkipPaths:
+    """Dotted member paths to drop, and the values that contain them.
+
+    A `*` step matches any member name or array item, e.g. "pages.*.structuredData";
+    where a member is also named explicitly, only the named paths apply to it.
+    """
+
+    def __init__(self, skip: Collection[str]) -> None:
+        self.paths = frozenset(skip)
+        self.parents = frozenset(path[:i] for path in self.paths for i, c in enumerate(path) if c == ".")
+
+    def match(self, prefix: str, key: str) -> str:
+        """The path of member `key` under `prefix`, as written in `skip` (named or `*`)."""
+        name = prefix + key
+        if name in self.paths or name in self.parents:
+            return name
+        return prefix + "*"
+
+
+def load(
+    fp: IO[str],
+    path: Sequence[Any] = (),
+    keys: Optional[Collection[str]] = None,
+    skip: Collection[str] = (),
+    chunk_size: int = CHUNK_SIZE,
+) -> Any:
+    """Read the value at `path`; for an object keep only `keys` and drop the dotted member paths in `skip`.
+
+    `skip` paths are relative to `path` and may use `*` for any member or array item.
+
+    Raises KeyError if `path` does not exist and ValueError on malformed JSON.
+    """
+    reader = _Reader(fp, chunk_size)
+    reader.descend(path)
+    char = reader.peek()
+    if char == "{" and (keys is not None or skip):
+        return reader.read_object(keys, _SkipPaths(skip), "")
+    if char == "[" and skip:
+        return reader.read_array(_SkipPaths(skip), "")
+    return reader.read_value()
+
+
+def iter_object(
+    fp: IO[str], path: Sequence[Any] = (), skip: Collection[str] = (), chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, Any]]:
+    """Yield `(key, value)` for each member of the object at `path`, except the keys in `skip`."""
+    reader = _Reader(fp, chunk_size)
+    reader.descend(path)
+    for key in reader.members():
+        if key in skip:
+            reader.skip_value()
+        else:
+            yield key, reader.read_value()
+
+
+def iter_keys(fp: IO[str], path: Sequence[Any] = (), chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield the member names of the object at `path` without reading their values."""
+    reader = _Reader(fp, chunk_size)
+    reader.descend(path)
+    for key in reader.members():
+        reader.skip_value()
+        yield key
+
+
+def iter_array(
+    fp: IO[str], path: Sequence[Any] = (), skip: Collection[str] = (), chunk_size: int = CHUNK_SIZE
+) -> Iterator[Any]:
+    """Yield the items of the array at `path` one at a time; `skip` drops members of object items."""
+    reader = _Reader(fp, chunk_size)
+    reader.descend(path)
+    for _ in reader.items():
+        if skip and reader.peek() == "{":
+            yield reader.read_object(None, _SkipPaths(skip), "")
+        else:
+            yield reader.read_value()
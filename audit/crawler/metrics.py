@@ -0,0 +1,369 @@
+"""
+SQLite store of per-page SEO and performance metrics across report runs.
+
+The audit scripts have written many report formats over time: SEO audits
+with a `pages` array or with pages keyed by URL, Lighthouse JSON (bare or
+wrapped in a `lighthouse` member), and PageSpeed runs as a list of URLs.
+`extract_rows()` normalizes each one to `MetricsRow`s. There is one row per
+URL per report, with the report date, HTTP status, word count, issue labels
+and Core Web Vitals in milliseconds (CLS unitless).
+
+`MetricsStore.ingest()` adds reports to the store incrementally. A report
+whose size and mtime match the last ingest is not opened again. A report
+that has changed has its rows replaced. Trend queries group the `pages`
+table by date (or month) off an index on (page_type, date), so they answer
+in milliseconds even with years of reports ingested.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .jsonstream import LIGHTHOUSE_SKIP, load
+
+# Top-level members any supported report format reads from.
+REPORT_KEYS = (
+    "timestamp", "fetchTime", "generatedAt", "auditDate", "date",
+    "finalUrl", "audits", "categories", "lighthouse", "pages",
+)
+# Bulky members none of the metrics come from.
+REPORT_SKIP = LIGHTHOUSE_SKIP + tuple(f"lighthouse.{path}" for path in LIGHTHOUSE_SKIP) + (
+    "pages.*.structuredData",
+    "pages.*.internalLinks",
+    "pages.*.externalLinks",
+    "pages.*.images",
+    "pages.*.h2Tags",
+    "pages.*.recommendations",
+    "pages.*.metadata.structuredData",
+    "pages.*.metadata.internalLinks",
+    "pages.*.metadata.externalLinks",
+    "pages.*.metadata.images",
+)
+
+# Metric column -> Lighthouse audit id; the audit's numericValue is in ms (CLS unitless)
+LIGHTHOUSE_AUDITS = {
+    "lcp": "largest-contentful-paint",
+    "cls": "cumulative-layout-shift",
+    "inp": "interaction-to-next-paint",
+    "fcp": "first-contentful-paint",
+    "tbt": "total-blocking-time",
+    "si": "speed-index",
+}
+METRICS = ("status", "word_count", "issue_count", "performance") + tuple(LIGHTHOUSE_AUDITS)
+AGGREGATES = ("avg", "sum", "min", "max", "count")
+# Lighthouse audits below this score count as issues (as in analyze_lighthouse.py)
+PASSING_SCORE = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    report_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    url TEXT NOT NULL,
+    page_type TEXT NOT NULL,
+    source TEXT NOT NULL,
+    status INTEGER,
+    word_count INTEGER,
+    issue_count INTEGER,
+    performance REAL,
+    lcp REAL,
+    cls REAL,
+    inp REAL,
+    fcp REAL,
+    tbt REAL,
+    si REAL
+);
+CREATE TABLE IF NOT EXISTS issues (
+    report_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    url TEXT NOT NULL,
+    page_type TEXT NOT NULL,
+    issue TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_by_type ON pages (page_type, date);
+CREATE INDEX IF NOT EXISTS pages_by_url ON pages (url, date);
+CREATE INDEX IF NOT EXISTS pages_by_report ON pages (report_id);
+CREATE INDEX IF NOT EXISTS issues_by_type ON issues (page_type, date, issue);
+CREATE INDEX IF NOT EXISTS issues_by_report ON issues (report_id);
+"""
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+@dataclass
+class MetricsRow:
+    url: str
+    date: str
+    source: str
+    status: Optional[int] = None
+    word_count: Optional[int] = None
+    issues: Tuple[str, ...] = ()
+    performance: Optional[float] = None
+    lcp: Optional[float] = None
+    cls: Optional[float] = None
+    inp: Optional[float] = None
+    fcp: Optional[float] = None
+    tbt: Optional[float] = None
+    si: Optional[float] = None
+
+
+def _date(value: Any) -> Optional[str]:
+    m = _DATE.search(value) if isinstance(value, str) else None
+    return m.group() if m else None
+
+
+def _get(data: Any, *path: str) -> Any:
+    for key in path:
+        if not isinstance(data, Mapping):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _first_number(*values: Any) -> Optional[float]:
+    for value in values:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def _issue_labels(issues: Any) -> Tuple[str, ...]:
+    labels = []
+    for issue in issues if isinstance(issues, list) else ():
+        if isinstance(issue, Mapping):
+            issue = issue.get("type") or issue.get("id") or issue.get("message") or issue.get("title")
+        if isinstance(issue, str) and issue:
+            labels.append(issue)
+    return tuple(labels)
+
+
+def report_date(report: Any, path: str) -> str:
+    """The date a report was taken: its own timestamp, else the date in its file name, else its mtime."""
+    if isinstance(report, Mapping):
+        for key in ("timestamp", "fetchTime", "generatedAt", "auditDate", "date"):
+            date = _date(report.get(key))
+            if date:
+                return date
+        date = _date(_get(report, "lighthouse", "fetchTime"))
+        if date:
+            return date
+    return _date(os.path.basename(path)) or time.strftime("%Y-%m-%d", time.gmtime(os.path.getmtime(path)))
+
+
+def _lighthouse_row(lhr: Mapping[str, Any], date: str) -> Optional[MetricsRow]:
+    audits = lhr.get("audits")
+    url = lhr.get("finalUrl") or lhr.get("requestedUrl")
+    if not isinstance(audits, Mapping) or not url:
+        return None
+    row = MetricsRow(url, _date(lhr.get("fetchTime")) or date, "lighthouse")
+    for column, audit_id in LIGHTHOUSE_AUDITS.items():
+        setattr(row, column, _first_number(_get(audits, audit_id, "numericValue")))
+    if row.inp is None:
+        row.inp = _first_number(_get(audits, "experimental-interaction-to-next-paint", "numericValue"))
+    score = _first_number(_get(lhr, "categories", "performance", "score"))
+    row.performance = score * 100 if score is not None else None
+    row.issues = tuple(sorted(
+        audit_id for audit_id, audit in audits.items()
+        if isinstance(audit, Mapping) and _first_number(audit.get("score")) is not None
+        and audit["score"] < PASSING_SCORE
+    ))
+    return row
+
+
+def _page_row(url: str, page: Mapping[str, Any], date: str) -> MetricsRow:
+    status = page.get("statusCode")
+    if not isinstance(status, int):
+        status = page.get("status") if isinstance(page.get("status"), int) else _get(page, "html", "status")
+    row = MetricsRow(
+        url,
+        date,
+        "seo",
+        status=status if isinstance(status, int) else None,
+        word_count=_first_number(page.get("wordCount"), _get(page, "metadata", "wordCount"),
+                                 _get(page, "metrics", "content", "wordCount")),
+        issues=_issue_labels(page.get("issues")),
+    )
+    # Older reports embed a PageSpeed mobile run per page, with timings in seconds
+    mobile = page.get("mobile")
+    if isinstance(mobile, Mapping) and isinstance(mobile.get("metrics"), Mapping):
+        for column in LIGHTHOUSE_AUDITS:
+            value = _first_number(mobile["metrics"].get(column))
+            if value is not None:
+                setattr(row, column, value if column == "cls" else value * 1000)
+        row.performance = _first_number(_get(mobile, "scores", "performance"))
+    return row
+
+
+def extract_rows(report: Any, date: str) -> Iterator[MetricsRow]:
+    """Normalize one parsed report (any supported format) to rows; `date` is used where rows carry none."""
+    if isinstance(report, list):
+        # PageSpeed runs: [{timestamp, url, performance: {score, metrics}}]
+        for run in report:
+            metrics = _get(run, "performance", "metrics")
+            if not isinstance(metrics, Mapping) or not run.get("url"):
+                continue
+            row = MetricsRow(run["url"], _date(run.get("timestamp")) or date, "pagespeed")
+            for column in LIGHTHOUSE_AUDITS:
+                setattr(row, column, _first_number(metrics.get(column)))
+            row.performance = _first_number(_get(run, "performance", "score"))
+            yield row
+        return
+    if not isinstance(report, Mapping):
+        return
+    for lhr in (report, report.get("lighthouse")):
+        if isinstance(lhr, Mapping):
+            row = _lighthouse_row(lhr, date)
+            if row is not None:
+                yield row
+    pages = report.get("pages")
+    if isinstance(pages, Mapping):
+        pages = [dict(page, url=url) for url, page in pages.items() if isinstance(page, Mapping)]
+    for page in pages if isinstance(pages, list) else ():
+        if isinstance(page, Mapping) and isinstance(page.get("url"), str):
+            yield _page_row(page["url"], page, date)
+
+
+def read_report(path: str) -> Tuple[str, List[MetricsRow]]:
+    """Parse `path` (skipping screenshots and per-page bulk) and return its date and rows."""
+    with open(path, "r", encoding="utf-8") as f:
+        report = load(f, keys=REPORT_KEYS, skip=REPORT_SKIP)
+    date = report_date(report, path)
+    return date, list(extract_rows(report, date))
+
+
+class MetricsStore:
+    """Per-URL metrics of every ingested report, queryable as trends."""
+
+    def __init__(self, path: str, page_type: Callable[[str], str]) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._page_type = page_type
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def __enter__(self) -> "MetricsStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def ingest(self, paths: Iterable[str]) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """Add new or changed reports.
+
+        Returns `{path: rows}` for the reports (re)read and `{path: error}` for
+        those that could not be parsed; the latter are recorded with no rows so
+        they are only retried once the file changes.
+        """
+        ingested, errors = {}, {}
+        for path in paths:
+            path = os.path.normpath(path)
+            stat = os.stat(path)
+            known = self._db.execute("SELECT id, size, mtime FROM reports WHERE path = ?", (path,)).fetchone()
+            if known is not None and known[1:] == (stat.st_size, stat.st_mtime):
+                continue
+            try:
+                date, rows = read_report(path)
+            except ValueError as exc:
+                errors[path] = str(exc)
+                rows = []
+            with self._db:
+                if known is not None:
+                    for table in ("pages", "issues", "reports"):
+                        column = "id" if table == "reports" else "report_id"
+                        self._db.execute(f"DELETE FROM {table} WHERE {column} = ?", (known[0],))
+                report_id = self._db.execute(
+                    "INSERT INTO reports (path, size, mtime, rows) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime, len(rows)),
+                ).lastrowid
+                self._insert(report_id, rows)
+            if path not in errors:
+                ingested[path] = len(rows)
+        return ingested, errors
+
+    def _insert(self, report_id: int, rows: Sequence[MetricsRow]) -> None:
+        page_rows, issue_rows = [], []
+        for row in rows:
+            page_type = self._page_type(row.url)
+            page_rows.append((
+                report_id, row.date, row.url, page_type, row.source, row.status, row.word_count,
+                len(row.issues), row.performance, row.lcp, row.cls, row.inp, row.fcp, row.tbt, row.si,
+            ))
+            issue_rows.extend((report_id, row.date, row.url, page_type, issue) for issue in row.issues)
+        self._db.executemany(f"INSERT INTO pages VALUES ({', '.join('?' * 15)})", page_rows)
+        self._db.executemany("INSERT INTO issues VALUES (?, ?, ?, ?, ?)", issue_rows)
+
+    @staticmethod
+    def _where(since: Optional[str], until: Optional[str], page_type: Optional[str],
+               source: Optional[str] = None) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for clause, value in (("date >= ?", since), ("date <= ?", until),
+                              ("page_type = ?", page_type), ("source = ?", source)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def trend(
+        self,
+        metric: str,
+        agg: str = "avg",
+        by_type: bool = True,
+        monthly: bool = False,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        page_type: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> List[Tuple[str, str, Optional[float], int]]:
+        """`(period, page_type, agg(metric), rows)` per date (or month) and page type, oldest first.
+
+        Only rows with a value for `metric` count, so reports that do not
+        measure it (e.g. CWV in an SEO crawl) add no empty periods.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS)}")
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {agg!r}; expected one of {', '.join(AGGREGATES)}")
+        period = "substr(date, 1, 7)" if monthly else "date"
+        group = "page_type" if by_type else "'all'"
+        where, params = self._where(since, until, page_type, source)
+        where = f"{where} AND {metric} IS NOT NULL" if where else f" WHERE {metric} IS NOT NULL"
+        sql = (f"SELECT {period} AS period, {group} AS grp, {agg}({metric}), COUNT(*) FROM pages{where} "
+               f"GROUP BY period, grp ORDER BY period, grp")
+        return self._db.execute(sql, params).fetchall()
+
+    def issue_trend(
+        self,
+        monthly: bool = False,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        page_type: Optional[str] = None,
+    ) -> List[Tuple[str, str, int]]:
+        """`(period, issue, pages)` per date (or month) and issue label, oldest first."""
+        period = "substr(date, 1, 7)" if monthly else "date"
+        where, params = self._where(since, until, page_type)
+        sql = (f"SELECT {period} AS period, issue, COUNT(*) FROM issues{where} "
+               f"GROUP BY period, issue ORDER BY period, COUNT(*) DESC, issue")
+        return self._db.execute(sql, params).fetchall()
+
+    def url_history(self, url: str) -> List[Tuple[Any, ...]]:
+        """Every row stored for `url`, oldest first, with the metric columns in `METRICS` order."""
+        sql = f"SELECT date, source, {', '.join(METRICS)} FROM pages WHERE url = ? ORDER BY date, source"
+        return self._db.execute(sql, (url,)).fetchall()
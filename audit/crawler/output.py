@@ -0,0 +1,95 @@
+"""
+Incremental report writers.
+
+Crawls append one JSON line per finished page to `.jsonl` files
+(`JsonlWriter`) instead of collecting results in lists, and the CSV / JSON /
+Markdown reports are derived afterwards by streaming those files back
+(`iter_jsonl`, `write_json_array`, `write_json_object`, `write_json_stream`).
+Memory use therefore stays flat however many pages are crawled.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import IO, Any, Dict, Iterable, Iterator, Tuple
+
+
+class JsonlWriter:
+    """Append-only JSON Lines file; each `write()` is one line, flushed as it is written."""
+
+    def __init__(self, path: str, append: bool = False) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.count = 0
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def write(self, obj: Any) -> None:
+        self._file.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def iter_jsonl(path: str) -> Iterator[Any]:
+    """Yield the objects of a JSON Lines file; a truncated last line (interrupted write) is skipped."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def write_json_array(items: Iterable[Any], path: str) -> int:
+    """Write `items` as a JSON array, one element per line; returns the number written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for item in items:
+            f.write(("," if count else "") + "\n  " + json.dumps(item, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    return count
+
+
+def write_json_object(pairs: Iterable[Tuple[str, Any]], path: str) -> int:
+    """Write `(key, value)` pairs as a JSON object, one member per line; returns the number written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for key, value in pairs:
+            f.write(("," if count else "") + "\n  " + json.dumps(key) + ": " + json.dumps(value, ensure_ascii=False))
+            count += 1
+        f.write("\n}\n" if count else "}\n")
+    return count
+
+
+def write_json_stream(fp: IO[str], head: Dict[str, Any], key: str, items: Iterable[Any]) -> int:
+    """Write `head` as an indented JSON object with `items` streamed in as the array under `key`."""
+    body = json.dumps(head, indent=2)
+    # Reopen the object after its last member (json.dumps ends with "\n}").
+    fp.write(body[:-2] + ",\n" if head else "{\n")
+    fp.write(f"  {json.dumps(key)}: [")
+    count = 0
+    for item in items:
+        fp.write(("," if count else "") + "\n    " + json.dumps(item))
+        count += 1
+    fp.write("\n  ]\n}\n" if count else "]\n}\n")
+    return count
@@ -0,0 +1,378 @@
+"""
+Single-pass page parser with pluggable rules.
+
+`PageParser` tokenizes a document once and extracts the on-page signals every
+tool needs (title, meta, canonical, headings, links, images, JSON-LD, visible
+word count) into a `PageData`. Rules plug into the same pass: a rule lists the
+start tags it wants (`tags`) and the phrases it looks for in the visible text
+(`phrases`). Tag events are dispatched through a per-tag table, and the
+visible text (normalized while it is tokenized) is searched once at the end
+for the distinct phrases of all rules with plain substring checks, so adding
+rules adds almost no parsing cost. `finish()` lets
+every rule inspect the page and report `Issue`s. With `fingerprint=True` the
+visible text outside nav/header/footer is also shingled into a MinHash
+signature (`PageData.minhash`) for near-duplicate detection (see `dedup`).
+
+Tokenizing is pluggable: the extraction above consumes start-tag, end-tag and
+text events, which come from the stdlib `html.parser` by default (no extra
+installs) or, with `backend="lxml"` when lxml is installed, from libxml2's
+incremental C parser. Both backends deliver whole text nodes, so they produce
+the same `PageData`.
+
+With `stop_after="head"` (or `"h1"`) parsing ends at `</head>` / `<body>` (or
+after the first `</h1>`): `feed()` returns True from then on so a streaming
+fetcher can stop downloading, and the page is marked `partial`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .dedup import MinHasher
+
+try:  # Optional C tokenizer
+    from lxml import etree  # type: ignore
+
+    LXML_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on environment
+    etree = None
+    LXML_AVAILABLE = False
+
+Attrs = Dict[str, str]
+
+HTML_PARSER = "html.parser"
+LXML = "lxml"
+BACKENDS = (HTML_PARSER, LXML)
+DEFAULT_BACKEND = HTML_PARSER
+
+# stop_after value -> (start tag, end tag) at which parsing stops.
+STOP_POINTS: Dict[str, Tuple[Optional[str], str]] = {
+    "head": ("body", "head"),
+    "h1": (None, "h1"),
+}
+
+HEADINGS = ("h1", "h2", "h3")
+# Elements whose text is not visible page copy.
+SKIP_TAGS = ("script", "style")
+# Site-wide template regions left out of the content fingerprint.
+BOILERPLATE_TAGS = ("nav", "header", "footer")
+
+
+@dataclass
+class Issue:
+    rule: str
+    type: str
+    severity: str
+    message: str
+    fix: str = ""
+
+    def as_dict(self) -> Dict[str, str]:
+        return asdict(self)
+
+
+@dataclass
+class PageData:
+    title: Optional[str] = None
+    meta: Dict[str, str] = field(default_factory=dict)
+    canonical: Optional[str] = None
+    h1: List[str] = field(default_factory=list)
+    h2: List[str] = field(default_factory=list)
+    h3: List[str] = field(default_factory=list)
+    # Raw, non-empty href values in document order.
+    links: List[str] = field(default_factory=list)
+    images: int = 0
+    images_missing_alt: List[str] = field(default_factory=list)
+    ld_json: List[str] = field(default_factory=list)
+    word_count: int = 0
+    # MinHash signature of the main visible text; only computed with
+    # fingerprint=True and None when the page has too little text.
+    minhash: Optional[bytes] = None
+    # Lower-cased visible text; only collected when a rule needs phrases or
+    # collect_text is set.
+    text: str = ""
+    # Phrases (lower-cased) found in the visible text.
+    phrases: Set[str] = field(default_factory=set)
+    # Free-form values set by rules (e.g. has_booking_cta).
+    facts: Dict[str, Any] = field(default_factory=dict)
+    issues: List[Issue] = field(default_factory=list)
+    parse_error: Optional[str] = None
+    # True when parsing stopped early (stop_after) and the rest was not read.
+    partial: bool = False
+
+
+class Rule:
+    """Base class for page rules.
+
+    `tags`: start tags for which `start()` is called during parsing.
+    `phrases`: lower-case phrases to look for in the visible text; the ones
+    found end up in `page.phrases` before `finish()` runs.
+    `needs_body`: False for rules that only look at `<head>` data, which are
+    the only ones that give meaningful results on head-only parses.
+    Rules must keep per-page state on the `PageData` (e.g. `page.facts`), so
+    one instance can be shared by many parsers.
+    """
+
+    name = "rule"
+    tags: Tuple[str, ...] = ()
+    phrases: Tuple[str, ...] = ()
+    needs_body = True
+
+    def start(self, tag: str, attrs: Attrs, page: PageData) -> None:
+        pass
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        return ()
+
+    def issue(self, type_: str, severity: str, message: str, fix: str = "") -> Issue:
+        return Issue(self.name, type_, severity, message, fix)
+
+
+def _normalize_phrases(phrases: Iterable[str]) -> Tuple[str, ...]:
+    # Lower-cased, single-spaced and deduplicated, to match `PageData.text`.
+    return tuple(sorted({" ".join(p.lower().split()) for p in phrases if p.strip()}))
+
+
+class _StopParsing(Exception):
+    """Raised from a handler to abandon the rest of the current feed."""
+
+
+def available_backends() -> List[str]:
+    return [name for name in BACKENDS if name != LXML or LXML_AVAILABLE]
+
+
+def resolve_backend(name: Optional[str]) -> str:
+    """`name` if it can be used here, else the default backend (e.g. lxml not installed)."""
+    if name is None:
+        return DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {name!r} (choose from {', '.join(BACKENDS)})")
+    return name if name in available_backends() else DEFAULT_BACKEND
+
+
+class _StdlibTokenizer(HTMLParser):
+    """html.parser tokenizer whose events go straight to the `PageParser` handlers."""
+
+    def __init__(self, target: "PageParser") -> None:
+        super().__init__(convert_charrefs=True)
+        # Instance attributes shadow the no-op handlers, so there is no extra call per event
+        self.handle_starttag = target.handle_starttag  # type: ignore[assignment]
+        self.handle_endtag = target.handle_endtag  # type: ignore[assignment]
+        self.handle_data = target.handle_data  # type: ignore[assignment]
+
+
+class _LxmlTarget:
+    """lxml parser target forwarding to the `PageParser` handlers.
+
+    libxml2 may split one text node over several `data()` calls (entities,
+    feed boundaries); text is buffered until the next tag so the handlers see
+    it in one piece, as with html.parser.
+    """
+
+    def __init__(self, target: "PageParser") -> None:
+        self._target = target
+        self._text: List[str] = []
+
+    def _flush(self) -> None:
+        if self._text:
+            text = "".join(self._text)
+            self._text = []
+            self._target.handle_data(text)
+
+    def start(self, tag: str, attrib: Any) -> None:
+        self._flush()
+        self._target.handle_starttag(tag, attrib.items())
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        self._target.handle_endtag(tag)
+
+    def data(self, text: str) -> None:
+        self._text.append(text)
+
+    def close(self) -> None:
+        self._flush()
+
+
+class _LxmlTokenizer:
+    def __init__(self, target: "PageParser") -> None:
+        # Text arrives decoded; feeding it as UTF-8 with the encoding forced keeps
+        # libxml2 from re-decoding it according to a <meta charset>
+        self._parser = etree.HTMLParser(target=_LxmlTarget(target), encoding="utf-8", recover=True,
+                                        no_network=True, huge_tree=True)
+
+    def feed(self, data: str) -> None:
+        self._parser.feed(data.encode("utf-8"))
+
+    def close(self) -> None:
+        self._parser.close()
+
+
+class PageParser:
+    """Fills a `PageData` and feeds rule plugins in one pass over a document.
+
+    Feed decoded text with `feed()` (whole or in chunks), then call `finish()`.
+    `backend` selects the tokenizer (see `resolve_backend()`); `stop_after`
+    ("head" or "h1", see `STOP_POINTS`) ends parsing early.
+    """
+
+    def __init__(self, rules: Sequence[Rule] = (), collect_text: bool = False, fingerprint: bool = False,
+                 backend: Optional[str] = None, stop_after: Optional[str] = None) -> None:
+        self.backend = resolve_backend(backend)
+        if stop_after is not None and stop_after not in STOP_POINTS:
+            raise ValueError(f"stop_after must be one of {', '.join(STOP_POINTS)}")
+        self._stop_start, self._stop_end = STOP_POINTS[stop_after] if stop_after else (None, None)
+        self._tokenizer = _LxmlTokenizer(self) if self.backend == LXML else _StdlibTokenizer(self)
+        self.rules = list(rules)
+        self.page = PageData()
+        self._dispatch: Dict[str, List[Rule]] = {}
+        for rule in self.rules:
+            for tag in rule.tags:
+                self._dispatch.setdefault(tag, []).append(rule)
+        self._phrases = _normalize_phrases(p for rule in self.rules for p in rule.phrases)
+        self._collect_text = collect_text or bool(self._phrases)
+        self._text: List[str] = []
+        self._title: List[str] = []
+        self._in_title = False
+        self._heading: Optional[str] = None
+        self._heading_text: List[str] = []
+        self._skip_depth = 0
+        self._boilerplate_depth = 0
+        self._hasher = MinHasher() if fingerprint else None
+        self._in_ld_json = False
+        self._finished = False
+
+    def feed(self, data: str) -> bool:
+        """Parse more of the document; returns True once the stop point was reached."""
+        if self.page.partial:
+            return True
+        try:
+            self._tokenizer.feed(data)
+        except _StopParsing:
+            pass
+        return self.page.partial
+
+    def close(self) -> None:
+        if self.page.partial:
+            return
+        try:
+            self._tokenizer.close()
+        except _StopParsing:
+            pass
+
+    def _stop(self) -> None:
+        self.page.partial = True
+        raise _StopParsing
+
+    def handle_starttag(self, tag: str, attrs: Iterable[Tuple[str, Optional[str]]]) -> None:
+        if tag == self._stop_start:
+            self._stop()
+        attrs_dict = {k.lower(): (v or "").strip() for k, v in attrs}
+        page = self.page
+        if tag == "title":
+            self._in_title = True
+            self._title = []
+        elif tag == "meta":
+            name = attrs_dict.get("name") or attrs_dict.get("property")
+            content = attrs_dict.get("content")
+            if name and content:
+                page.meta[name.lower()] = content
+        elif tag == "link":
+            href = attrs_dict.get("href")
+            if "canonical" in attrs_dict.get("rel", "").lower() and href:
+                page.canonical = href
+        elif tag in HEADINGS:
+            self._heading = tag
+            self._heading_text = []
+        elif tag == "a":
+            href = attrs_dict.get("href")
+            if href:
+                page.links.append(href)
+        elif tag == "img":
+            page.images += 1
+            src = attrs_dict.get("src", "")
+            if src and not attrs_dict.get("alt"):
+                page.images_missing_alt.append(src)
+        elif tag in BOILERPLATE_TAGS:
+            self._boilerplate_depth += 1
+        elif tag in SKIP_TAGS:
+            self._skip_depth += 1
+            if tag == "script" and attrs_dict.get("type") == "application/ld+json":
+                self._in_ld_json = True
+                page.ld_json.append("")
+        rules = self._dispatch.get(tag)
+        if rules:
+            for rule in rules:
+                rule.start(tag, attrs_dict, page)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        elif tag in HEADINGS and self._heading == tag:
+            text = " ".join(self._heading_text).strip()
+            if text:
+                getattr(self.page, tag).append(text)
+            self._heading = None
+            self._heading_text = []
+        elif tag in BOILERPLATE_TAGS:
+            self._boilerplate_depth = max(0, self._boilerplate_depth - 1)
+        elif tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            if tag == "script":
+                self._in_ld_json = False
+        if tag == self._stop_end:
+            self._stop()
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self._title.append(data.strip())
+            return
+        if self._heading:
+            self._heading_text.append(data.strip())
+        if self._in_ld_json:
+            self.page.ld_json[-1] += data
+        if not self._skip_depth:
+            words = data.split()
+            if words:
+                self.page.word_count += len(words)
+                if self._collect_text:
+                    self._text.append(" ".join(words))
+                if self._hasher is not None and not self._boilerplate_depth:
+                    self._hasher.update(words)
+
+    def finish(self) -> PageData:
+        """Flush the parser, run the phrase scan and every rule; returns the page."""
+        if self._finished:
+            return self.page
+        self._finished = True
+        page = self.page
+        try:
+            self.close()
+        except Exception as exc:  # noqa: BLE001 - keep whatever was extracted
+            page.parse_error = page.parse_error or str(exc)
+        page.title = " ".join(chunk for chunk in self._title if chunk).strip() or None
+        if self._hasher is not None:
+            # A fingerprint of part of the text would not be comparable
+            page.minhash = None if page.partial else self._hasher.digest()
+            self._hasher = None
+        if self._collect_text:
+            page.text = " ".join(self._text).lower()
+            self._text = []
+        if self._phrases:
+            text = page.text
+            page.phrases = {phrase for phrase in self._phrases if phrase in text}
+        for rule in self.rules:
+            page.issues.extend(rule.finish(page))
+        return page
+
+
+def parse_html(html: str, rules: Sequence[Rule] = (), collect_text: bool = False, fingerprint: bool = False,
+               backend: Optional[str] = None, stop_after: Optional[str] = None) -> PageData:
+    """Parse a whole document in one pass and evaluate `rules` on it."""
+    parser = PageParser(rules, collect_text, fingerprint, backend, stop_after)
+    try:
+        parser.feed(html)
+    except Exception as exc:  # noqa: BLE001
+        parser.page.parse_error = str(exc)
+    return parser.finish()
@@ -0,0 +1,380 @@
+"""
+Keep-alive HTTP connection pool.
+
+Reuses HTTP/1.1 connections per scheme/host/port so a crawl pays the TCP and
+TLS handshake once per connection instead of once per request. Every response
+carries a `RequestTiming` breakdown (DNS, connect, TLS, wait, download) and,
+once its body is read, a `TransferSize` (bytes on the wire and decoded).
+Requests advertise gzip/deflate (and br when available) and response bodies
+are decompressed as they stream. When `httpx` with HTTP/2 support is
+installed, `ConnectionPool(http2=True)` routes requests through a
+multiplexed HTTP/2 client instead.
+"""
+
+from __future__ import annotations
+
+import http.client
+import ssl
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .encoding import ACCEPT_ENCODING, TransferSize, decode_chunks
+from .timing import RequestTiming, TimedHTTPConnection, TimedHTTPSConnection
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 20
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 64 * 1024
+# Unread bodies up to this size are drained so the connection can be reused.
+MAX_DRAIN_BYTES = 256 * 1024
+
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+# Errors that mean an idle keep-alive connection was closed by the server.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+try:  # Optional HTTP/2 support
+    import httpx  # type: ignore
+    import h2  # type: ignore  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on environment
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+PoolKey = Tuple[str, str, int]
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    connections_opened: int = 0
+    connections_reused: int = 0
+    stale_retries: int = 0
+    redirects: int = 0
+    http2_requests: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        http1 = self.requests - self.http2_requests
+        return self.connections_reused / http1 if http1 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["reuse_ratio"] = round(self.reuse_ratio, 3)
+        return data
+
+
+def charset_from_headers(headers: Any, default: str = "utf-8") -> str:
+    """Return the charset declared in a Content-Type header."""
+    content_type = headers.get("content-type") or headers.get("Content-Type") or ""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"\'')
+    return default
+
+
+def pool_key(url: str) -> Tuple[PoolKey, str]:
+    """Return the pool key and request target (path + query) for a URL."""
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    port = parts.port or (443 if scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return (scheme, (parts.hostname or "").lower(), port), target
+
+
+class PooledResponse:
+    """Streaming response that hands its connection back to the pool on close."""
+
+    def __init__(
+        self,
+        pool: "ConnectionPool",
+        key: PoolKey,
+        conn: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+        url: str,
+        timing: RequestTiming,
+        decompress: bool = True,
+    ) -> None:
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.http_version = "HTTP/1.1" if response.version == 11 else "HTTP/1.0"
+        self.timing = timing
+        self.transfer = TransferSize()
+        self._decompress = decompress
+        self._headers_at = time.perf_counter()
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _mark_downloaded(self) -> None:
+        if not self.timing.download_ms:
+            self.timing.download_ms = (time.perf_counter() - self._headers_at) * 1000.0
+
+    def _raw_chunks(self, chunk_size: int) -> Iterator[bytes]:
+        while True:
+            chunk = self._response.read1(chunk_size)
+            if not chunk:
+                self._mark_downloaded()
+                return
+            yield chunk
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield body chunks as they arrive from the socket, decompressed unless the pool was told not to."""
+        encoding = self.headers.get("Content-Encoding") if self._decompress else None
+        return decode_chunks(self._raw_chunks(chunk_size), encoding, self.transfer)
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_chunks())
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        self._mark_downloaded()
+        response = self._response
+        reusable = not response.will_close
+        if reusable and not response.isclosed():
+            remaining = response.length
+            if remaining is not None and remaining <= MAX_DRAIN_BYTES:
+                try:
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    reusable = False
+            else:
+                reusable = False
+        response.close()
+        self._pool._release(self._key, conn, reusable)
+
+
+class _Http2Response:
+    """Adapter giving an httpx streaming response the PooledResponse interface."""
+
+    def __init__(self, response: Any, timing: RequestTiming, decompress: bool = True) -> None:
+        self._response = response
+        self.url = str(response.url)
+        self.status = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+        self.http_version = response.http_version
+        # httpx does not expose connection phases; only wait/download are measured.
+        self.timing = timing
+        self.transfer = TransferSize()
+        self._decompress = decompress
+        self._headers_at = time.perf_counter()
+
+    def __enter__(self) -> "_Http2Response":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _raw_chunks(self, chunk_size: int) -> Iterator[bytes]:
+        yield from self._response.iter_raw(chunk_size)
+        self._mark_downloaded()
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        # iter_raw() skips httpx's own decoding so wire bytes can be counted
+        encoding = self.headers.get("Content-Encoding") if self._decompress else None
+        return decode_chunks(self._raw_chunks(chunk_size), encoding, self.transfer)
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_chunks())
+
+    def _mark_downloaded(self) -> None:
+        if not self.timing.download_ms:
+            self.timing.download_ms = (time.perf_counter() - self._headers_at) * 1000.0
+
+    def close(self) -> None:
+        self._mark_downloaded()
+        self._response.close()
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive connections keyed by scheme/host/port.
+
+    `pool_size` is the number of idle connections kept open per host; extra
+    connections opened under concurrency are closed when released. With
+    `decompress` (the default) requests send `Accept-Encoding` unless the
+    caller sets one, and `iter_chunks()`/`read()` return decoded bodies.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+        headers: Optional[Dict[str, str]] = None,
+        http2: bool = False,
+        decompress: bool = True,
+    ) -> None:
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.decompress = decompress
+        self.default_headers = dict(headers or {})
+        if decompress and not any(name.lower() == "accept-encoding" for name in self.default_headers):
+            self.default_headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.stats = PoolStats()
+        self._idle: Dict[PoolKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+        self._http2_client = None
+        if http2 and HTTP2_AVAILABLE:
+            self._http2_client = httpx.Client(
+                http2=True,
+                timeout=timeout,
+                follow_redirects=True,
+                max_redirects=MAX_REDIRECTS,
+                limits=httpx.Limits(max_keepalive_connections=pool_size),
+            )
+
+    @property
+    def http2(self) -> bool:
+        return self._http2_client is not None
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+        if self._http2_client is not None:
+            self._http2_client.close()
+
+    def idle_connections(self) -> int:
+        """Return the number of idle connections currently held."""
+        with self._lock:
+            return sum(len(conns) for conns in self._idle.values())
+
+    def _new_connection(self, key: PoolKey) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return TimedHTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context)
+        return TimedHTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key: PoolKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.stats.connections_reused += 1
+                return idle.pop(), True
+            self.stats.connections_opened += 1
+        return self._new_connection(key), False
+
+    def _release(self, key: PoolKey, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.pool_size:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def _exchange(
+        self, conn: http.client.HTTPConnection, method: str, target: str, headers: Dict[str, str], timing: RequestTiming
+    ) -> http.client.HTTPResponse:
+        if conn.sock is None:
+            conn.connect()
+            timing.dns_ms, timing.connect_ms, timing.tls_ms = getattr(conn, "connect_timing", (0.0, 0.0, 0.0))
+        start = time.perf_counter()
+        conn.request(method, target, headers=headers)
+        sent = time.perf_counter()
+        response = conn.getresponse()
+        timing.send_ms = (sent - start) * 1000.0
+        timing.wait_ms = (time.perf_counter() - sent) * 1000.0
+        return response
+
+    def _send(
+        self, url: str, method: str, headers: Dict[str, str]
+    ) -> Tuple[PoolKey, http.client.HTTPConnection, http.client.HTTPResponse, RequestTiming]:
+        key, target = pool_key(url)
+        conn, reused = self._acquire(key)
+        timing = RequestTiming(reused_connection=reused)
+        try:
+            return key, conn, self._exchange(conn, method, target, headers, timing), timing
+        except STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+        # The idle connection had been closed by the server; retry once on a fresh one.
+        with self._lock:
+            self.stats.stale_retries += 1
+            self.stats.connections_reused -= 1
+            self.stats.connections_opened += 1
+        conn = self._new_connection(key)
+        timing = RequestTiming()
+        try:
+            return key, conn, self._exchange(conn, method, target, headers, timing), timing
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+
+    def request(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        follow_redirects: bool = True,
+    ) -> Any:
+        """Send a request and return a streaming response.
+
+        The caller must close the response (or use it as a context manager)
+        so the connection is returned to the pool.
+        """
+        merged = {**self.default_headers, **(headers or {})}
+        with self._lock:
+            self.stats.requests += 1
+            if self._http2_client is not None:
+                self.stats.http2_requests += 1
+        started = time.perf_counter()
+        if self._http2_client is not None:
+            request = self._http2_client.build_request(method, url, headers=merged)
+            raw = self._http2_client.send(request, stream=True)
+            return _Http2Response(raw, RequestTiming(wait_ms=(time.perf_counter() - started) * 1000.0), self.decompress)
+
+        for hop in range(MAX_REDIRECTS + 1):
+            hop_started = time.perf_counter()
+            key, conn, raw, timing = self._send(url, method, merged)
+            if hop:
+                timing.redirect_ms = (hop_started - started) * 1000.0
+            response = PooledResponse(self, key, conn, raw, url, timing, self.decompress)
+            location = raw.getheader("Location")
+            if not (follow_redirects and raw.status in REDIRECT_CODES and location):
+                return response
+            response.close()
+            with self._lock:
+                self.stats.redirects += 1
+            url = urllib.parse.urljoin(url, location)
+            if raw.status == 303:
+                method = "GET"
+        raise http.client.HTTPException(f"Too many redirects for {url}")
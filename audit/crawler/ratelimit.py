@@ -0,0 +1,177 @@
+"""
+Adaptive per-host politeness limiter.
+
+Each host gets a token bucket refilled at one token per `delay` seconds. The
+delay starts at `initial_delay`, never drops below `min_delay` (the robots.txt
+Crawl-delay when one is declared), doubles on 429/5xx responses and shrinks
+again while responses are fast. A `Retry-After` header pauses the host until
+the given time. The limiter is thread-safe, so it can sit in front of the
+FetchEngine worker threads as well as a sequential crawl loop.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_DELAY = 60.0
+# Delay used for the first backoff when no delay was configured.
+BACKOFF_START = 0.5
+BACKOFF_FACTOR = 2.0
+# Multiplier applied to the delay after each healthy response.
+RAMP_UP_FACTOR = 0.8
+# Responses slower than this do not speed the crawl up.
+HEALTHY_LATENCY_MS = 1000.0
+# Statuses that mean the server wants us to slow down.
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+# Statuses worth retrying once the limiter lets the next request through.
+RETRY_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Return the number of seconds a `Retry-After` header asks us to wait."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - (now or time.time()))
+
+
+def _host(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc.lower()}"
+
+
+@dataclass
+class RateLimitStats:
+    requests: int = 0
+    throttled: int = 0
+    retry_after: int = 0
+    waited_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["waited_seconds"] = round(self.waited_seconds, 3)
+        return data
+
+
+class _Bucket:
+    def __init__(self, delay: float, burst: int) -> None:
+        self.delay = delay
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float, burst: int) -> None:
+        if self.delay <= 0:
+            self.tokens = float(burst)
+        else:
+            self.tokens = min(float(burst), self.tokens + (now - self.updated) / self.delay)
+        self.updated = now
+
+
+class AdaptiveRateLimiter:
+    """Token-bucket limiter whose per-host rate follows the server's health.
+
+    Call `acquire(url)` before each request and `record(url, status, ...)`
+    after the response headers arrive.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 0.0,
+        min_delay: float = 0.0,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        burst: int = 1,
+        healthy_latency_ms: float = HEALTHY_LATENCY_MS,
+    ) -> None:
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+        self.min_delay = max(0.0, min_delay)
+        self.max_delay = max(max_delay, self.min_delay)
+        self.initial_delay = min(max(initial_delay, self.min_delay), self.max_delay)
+        self.burst = burst
+        self.healthy_latency_ms = healthy_latency_ms
+        self.stats = RateLimitStats()
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def set_min_delay(self, min_delay: float) -> None:
+        """Raise or lower the floor, e.g. once robots.txt Crawl-delay is known."""
+        with self._lock:
+            self.min_delay = max(0.0, min_delay)
+            self.max_delay = max(self.max_delay, self.min_delay)
+            self.initial_delay = max(self.initial_delay, self.min_delay)
+            for bucket in self._buckets.values():
+                bucket.delay = max(bucket.delay, self.min_delay)
+
+    def delay_for(self, url: str) -> float:
+        """Current delay between requests to the host of `url`."""
+        with self._lock:
+            bucket = self._buckets.get(_host(url))
+            return bucket.delay if bucket else self.initial_delay
+
+    def _bucket(self, host: str) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.initial_delay, self.burst)
+        return bucket
+
+    def acquire(self, url: str) -> float:
+        """Block until a request to `url`'s host is allowed; returns seconds waited."""
+        host = _host(url)
+        waited = 0.0
+        while True:
+            with self._lock:
+                bucket = self._bucket(host)
+                now = time.monotonic()
+                bucket.refill(now, self.burst)
+                if now >= bucket.blocked_until and bucket.tokens >= 1.0:
+                    bucket.tokens -= 1.0
+                    self.stats.requests += 1
+                    self.stats.waited_seconds += waited
+                    return waited
+                pause = max(bucket.blocked_until - now, (1.0 - bucket.tokens) * bucket.delay)
+            time.sleep(pause)
+            waited += pause
+
+    def record(
+        self,
+        url: str,
+        status: int,
+        latency_ms: Optional[float] = None,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """Adapt the host's rate to a response (status 0 means a failed request)."""
+        host = _host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            if status in THROTTLE_STATUSES or status == 0:
+                self.stats.throttled += 1
+                backoff = bucket.delay * BACKOFF_FACTOR if bucket.delay else max(BACKOFF_START, self.min_delay)
+                bucket.delay = min(self.max_delay, max(backoff, self.min_delay))
+                # Make the next request wait for a fresh token.
+                bucket.tokens = min(bucket.tokens, 0.0)
+                seconds = parse_retry_after(retry_after)
+                if seconds is not None:
+                    self.stats.retry_after += 1
+                    bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + min(seconds, self.max_delay))
+            elif latency_ms is not None and latency_ms <= self.healthy_latency_ms:
+                delay = bucket.delay * RAMP_UP_FACTOR
+                # Snap to the floor once the remaining delay is negligible.
+                bucket.delay = self.min_delay if delay - self.min_delay < 0.01 else delay
+
+    def delays(self) -> Dict[str, float]:
+        with self._lock:
+            return {host: round(bucket.delay, 3) for host, bucket in self._buckets.items()}
@@ -0,0 +1,172 @@
+"""
+robots.txt parsing and compiled rule matching.
+
+`parse_robots_txt()` groups rules by user-agent (consecutive User-agent lines
+share one group; repeated groups for an agent are merged).
+`RobotsTxt.matcher(user_agent)` selects the most specific group and compiles
+its rules once: plain path prefixes go into a character trie, and rules with
+`*` or a `$` anchor go into a single regex whose alternatives are ordered
+longest pattern first. A lookup is one trie walk plus at most one regex match,
+and the most specific (longest) matching rule wins, with Allow winning ties,
+as in Google's and RFC 9309's resolution order.
+"""
+
+from __future__ import annotations
+
+import re
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# (allow, pattern)
+Rule = Tuple[bool, str]
+
+
+@dataclass
+class RobotsGroup:
+    agents: List[str]
+    rules: List[Rule] = field(default_factory=list)
+    crawl_delay: Optional[float] = None
+
+
+@dataclass
+class RobotsTxt:
+    groups: List[RobotsGroup] = field(default_factory=list)
+    sitemaps: List[str] = field(default_factory=list)
+
+    def group_for(self, user_agent: str) -> RobotsGroup:
+        """Merge the groups of the most specific agent token found in `user_agent`.
+
+        Falls back to the `*` group, or an empty group if there is none.
+        """
+        ua = user_agent.lower()
+        best = ""
+        for group in self.groups:
+            for agent in group.agents:
+                if agent != "*" and agent in ua and len(agent) > len(best):
+                    best = agent
+        target = best or "*"
+        merged = RobotsGroup(agents=[target])
+        for group in self.groups:
+            if target in group.agents:
+                merged.rules.extend(group.rules)
+                if group.crawl_delay is not None:
+                    merged.crawl_delay = group.crawl_delay
+        return merged
+
+    def matcher(self, user_agent: str) -> "RobotsMatcher":
+        group = self.group_for(user_agent)
+        return RobotsMatcher(group.rules, group.crawl_delay)
+
+
+def parse_robots_txt(text: str) -> RobotsTxt:
+    robots = RobotsTxt()
+    current: Optional[RobotsGroup] = None
+    in_agents = False
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if not line or ":" not in line:
+            continue
+        name, _, value = line.partition(":")
+        name, value = name.strip().lower(), value.strip()
+        if name == "user-agent":
+            if not in_agents or current is None:
+                current = RobotsGroup(agents=[])
+                robots.groups.append(current)
+                in_agents = True
+            current.agents.append(value.lower())
+            continue
+        in_agents = False
+        if name == "sitemap":
+            if value:
+                robots.sitemaps.append(value)
+        elif current is None:
+            continue
+        elif name in ("allow", "disallow"):
+            # An empty Disallow allows everything; it adds no rule.
+            if value:
+                current.rules.append((name == "allow", value))
+        elif name == "crawl-delay":
+            try:
+                current.crawl_delay = float(value)
+            except ValueError:
+                pass
+    return robots
+
+
+class _TrieNode:
+    __slots__ = ("children", "allow", "disallow")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.allow = False
+        self.disallow = False
+
+
+def _wildcard_regex(pattern: str) -> str:
+    anchored = pattern.endswith("$")
+    body = pattern[:-1] if anchored else pattern
+    regex = ".*".join(re.escape(part) for part in body.split("*"))
+    return regex + ("$" if anchored else "")
+
+
+class RobotsMatcher:
+    """Answer allow/disallow for URLs against one compiled rule group."""
+
+    def __init__(self, rules: List[Rule], crawl_delay: Optional[float] = None) -> None:
+        self.crawl_delay = crawl_delay
+        self.rules = list(rules)
+        self._root = _TrieNode()
+        wildcard: List[Rule] = []
+        for allow, pattern in rules:
+            if "*" in pattern or pattern.endswith("$"):
+                wildcard.append((allow, pattern))
+                continue
+            node = self._root
+            for char in pattern:
+                node = node.children.setdefault(char, _TrieNode())
+            if allow:
+                node.allow = True
+            else:
+                node.disallow = True
+        # Longest pattern first, Allow before Disallow on equal length, so the
+        # first alternative that matches is the winning rule.
+        wildcard.sort(key=lambda rule: (-len(rule[1]), not rule[0]))
+        self._wildcard_rules = wildcard
+        self._regex: Optional[Pattern[str]] = None
+        if wildcard:
+            self._regex = re.compile("|".join(f"({_wildcard_regex(p)})" for _, p in wildcard), re.DOTALL)
+
+    def _prefix_match(self, path: str) -> Tuple[int, bool]:
+        """Return (length, allow) of the longest matching prefix rule, length -1 if none."""
+        best_len, best_allow = -1, True
+        node = self._root
+        for depth, char in enumerate(path, 1):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.allow:
+                best_len, best_allow = depth, True
+            elif node.disallow:
+                best_len, best_allow = depth, False
+        return best_len, best_allow
+
+    def allowed(self, url: str) -> bool:
+        """True if `url` (absolute, or a path with optional query) may be crawled."""
+        if "://" in url:
+            parts = urllib.parse.urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path = f"{path}?{parts.query}"
+        else:
+            path = url or "/"
+        if path == "/robots.txt":
+            return True
+        best_len, best_allow = self._prefix_match(path)
+        if self._regex is not None:
+            match = self._regex.match(path)
+            if match is not None and match.lastindex is not None:
+                allow, pattern = self._wildcard_rules[match.lastindex - 1]
+                if len(pattern) > best_len or (len(pattern) == best_len and allow):
+                    best_len, best_allow = len(pattern), allow
+        return best_allow
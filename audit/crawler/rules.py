@@ -0,0 +1,191 @@
+"""
+Built-in page rules for `crawler.page.PageParser`.
+
+Rules are registered by name with `@register`; `default_rules()` returns one
+instance of each default rule in registration order. Rules that need
+arguments (e.g. `KeywordPlacementRule`) are instantiated by the caller and
+appended to the list.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Type
+
+from .page import Attrs, Issue, PageData, Rule
+
+HIGH = "High"
+MEDIUM = "Medium"
+LOW = "Low"
+
+TITLE_MAX_LENGTH = 60
+MIN_WORDS = 300
+
+RULES: Dict[str, Type[Rule]] = {}
+DEFAULT_RULES: List[str] = []
+
+
+def register(default: bool = True) -> Callable[[Type[Rule]], Type[Rule]]:
+    """Class decorator adding a rule to the registry (and the default set)."""
+
+    def wrap(cls: Type[Rule]) -> Type[Rule]:
+        RULES[cls.name] = cls
+        if default:
+            DEFAULT_RULES.append(cls.name)
+        return cls
+
+    return wrap
+
+
+def default_rules(exclude: Iterable[str] = (), head_only: bool = False) -> List[Rule]:
+    """Fresh instances of the default rules; `head_only` keeps the ones that need no `<body>`."""
+    skipped = set(exclude)
+    return [RULES[name]() for name in DEFAULT_RULES
+            if name not in skipped and not (head_only and RULES[name].needs_body)]
+
+
+@register()
+class TitleRule(Rule):
+    name = "title"
+    needs_body = False
+
+    def __init__(self, max_length: int = TITLE_MAX_LENGTH) -> None:
+        self.max_length = max_length
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        if not page.title:
+            yield self.issue("Missing Title", HIGH, "Missing <title> tag", "Add title tag")
+        elif len(page.title) > self.max_length:
+            yield self.issue(
+                "Title Too Long", MEDIUM, f"Title exceeds {self.max_length} characters ({len(page.title)})", "Shorten title"
+            )
+
+
+@register()
+class MetaDescriptionRule(Rule):
+    name = "meta_description"
+    needs_body = False
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        if not page.meta.get("description"):
+            yield self.issue("Missing Meta Description", HIGH, "Missing meta description", "Add meta description")
+
+
+@register()
+class H1Rule(Rule):
+    name = "h1"
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        count = len(page.h1)
+        if count == 0:
+            yield self.issue("Missing H1", HIGH, "Expected 1 H1, found 0", "Add H1 tag")
+        elif count > 1:
+            yield self.issue("Multiple H1", MEDIUM, f"Expected 1 H1, found {count}", "Use only one H1")
+
+
+@register()
+class CanonicalRule(Rule):
+    name = "canonical"
+    needs_body = False
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        if not page.canonical:
+            yield self.issue("Missing Canonical", HIGH, "Missing canonical tag", "Add canonical tag")
+
+
+@register()
+class ThinContentRule(Rule):
+    name = "thin_content"
+
+    def __init__(self, min_words: int = MIN_WORDS) -> None:
+        self.min_words = min_words
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        if page.word_count < self.min_words:
+            yield self.issue("Thin Content", MEDIUM, f"Low word count ({page.word_count})", "Add more content")
+
+
+@register()
+class ImageAltRule(Rule):
+    name = "image_alt"
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        if page.images_missing_alt:
+            yield self.issue(
+                "Images Missing Alt",
+                MEDIUM,
+                f"{len(page.images_missing_alt)} images missing alt text",
+                "Add descriptive alt text",
+            )
+
+
+@register()
+class YMYLClaimsRule(Rule):
+    """Absolute outcome claims are a YMYL (medical) trust risk."""
+
+    name = "ymyl_claims"
+    phrases = ("100% success", "guarantee", "risk-free", "permanent cure", "miracle cure", "no side effects")
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        found = sorted(p for p in self.phrases if p in page.phrases)
+        if found:
+            yield self.issue(
+                "YMYL Absolute Claim",
+                HIGH,
+                f"YMYL risk: avoid absolute claims ({', '.join(found)})",
+                "Remove guarantees and absolute outcome claims",
+            )
+
+
+@register()
+class BookingCTARule(Rule):
+    """Booking / WhatsApp calls to action, from the visible copy and link targets."""
+
+    name = "booking_cta"
+    tags = ("a", "form")
+    phrases = ("book appointment", "schedule consultation", "book now", "book a consultation", "whatsapp")
+    BOOKING_PHRASES = phrases[:4]
+    BOOKING_PATHS = ("/appointments", "book-appointment")
+    WHATSAPP_HOSTS = ("wa.me", "api.whatsapp.com")
+
+    def start(self, tag: str, attrs: Attrs, page: PageData) -> None:
+        target = attrs.get("href") or attrs.get("action") or ""
+        if not target:
+            return
+        if any(path in target for path in self.BOOKING_PATHS):
+            page.facts["has_internal_booking_link"] = True
+        if any(host in target for host in self.WHATSAPP_HOSTS):
+            page.facts["has_whatsapp_link"] = True
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        facts = page.facts
+        facts["has_booking_cta"] = any(p in page.phrases for p in self.BOOKING_PHRASES)
+        facts.setdefault("has_internal_booking_link", False)
+        facts["has_whatsapp_cta"] = facts.pop("has_whatsapp_link", False) or "whatsapp" in page.phrases
+        if not facts["has_booking_cta"]:
+            yield self.issue("Missing Booking CTA", MEDIUM, "Missing clear booking CTA", "Add a booking call to action")
+
+
+@register(default=False)
+class KeywordPlacementRule(Rule):
+    """Target keyword present in the title and H1 (per-page keyword)."""
+
+    name = "keyword_placement"
+
+    def __init__(self, keyword: str = "") -> None:
+        self.keyword = keyword.strip()
+
+    def finish(self, page: PageData) -> Iterable[Issue]:
+        keyword = self.keyword.lower()
+        if not keyword:
+            return
+        if keyword not in (page.title or "").lower():
+            yield self.issue(
+                "Keyword Missing In Title", MEDIUM, f"Target keyword '{self.keyword}' missing in <title>",
+                "Work the target keyword into the title",
+            )
+        if not any(keyword in h1.lower() for h1 in page.h1):
+            yield self.issue(
+                "Keyword Missing In H1", MEDIUM, f"Target keyword '{self.keyword}' missing in <H1>",
+                "Work the target keyword into the H1",
+            )
+
@@ -0,0 +1,202 @@
+"""
+Streaming sitemap reader.
+
+`iter_sitemap()` feeds raw (optionally gzip-compressed) chunks into an
+`XMLPullParser` and yields one record per `<url>` or `<sitemap>` entry,
+clearing each element once it is read so memory stays flat however large the
+file is. `SitemapReader` follows `<sitemapindex>` children on a small thread
+pool and hands `(loc, lastmod, changefreq, priority)` records to the consumer
+through a bounded queue, so a crawl can start on the first URLs while the
+remaining child sitemaps are still downloading.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import xml.etree.ElementTree as ET
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+URL = "url"
+SITEMAP = "sitemap"
+GZIP_MAGIC = b"\x1f\x8b"
+DEFAULT_WORKERS = 4
+MAX_DEPTH = 3
+# Records buffered between the fetch threads and the consumer.
+QUEUE_SIZE = 1000
+
+# fetch(url) -> raw body chunks; raise to report a failed sitemap.
+FetchChunks = Callable[[str], Iterable[bytes]]
+
+
+class SitemapRecord(NamedTuple):
+    loc: str
+    lastmod: Optional[str] = None
+    changefreq: Optional[str] = None
+    priority: Optional[float] = None
+
+
+@dataclass
+class SitemapStats:
+    sitemaps: int = 0
+    indexes: int = 0
+    urls: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _decompressed(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Pass chunks through, gunzipping on the fly if the body starts with the gzip magic."""
+    chunks = iter(chunks)
+    decompressor = None
+    head = b""
+    for chunk in chunks:
+        if decompressor is None:
+            head += chunk
+            if len(head) < len(GZIP_MAGIC):
+                continue
+            if not head.startswith(GZIP_MAGIC):
+                yield head
+                yield from chunks
+                return
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            chunk, head = head, b""
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    if head:
+        yield head
+    if decompressor is not None:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+def _record(elem: ET.Element) -> Optional[SitemapRecord]:
+    fields: Dict[str, str] = {}
+    for child in elem:
+        if child.text:
+            fields[_local(child.tag)] = child.text.strip()
+    loc = fields.get("loc")
+    if not loc:
+        return None
+    priority: Optional[float] = None
+    if fields.get("priority"):
+        try:
+            priority = float(fields["priority"])
+        except ValueError:
+            priority = None
+    return SitemapRecord(loc, fields.get("lastmod"), fields.get("changefreq"), priority)
+
+
+def iter_sitemap(chunks: Iterable[bytes]) -> Iterator[Tuple[str, SitemapRecord]]:
+    """Yield `(kind, record)` for each entry of a urlset or sitemapindex.
+
+    `kind` is URL for `<url>` entries and SITEMAP for `<sitemap>` entries of
+    an index. Raises `ET.ParseError` on malformed XML (after yielding the
+    entries that preceded the error).
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: Optional[ET.Element] = None
+
+    def drain() -> Iterator[Tuple[str, SitemapRecord]]:
+        nonlocal root
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            kind = _local(elem.tag)
+            if kind in (URL, SITEMAP) and elem is not root:
+                record = _record(elem)
+                if record is not None:
+                    yield kind, record
+                elem.clear()
+                if root is not None:
+                    root.clear()
+
+    for chunk in _decompressed(chunks):
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+
+class SitemapReader:
+    """Read a sitemap (or sitemap index tree) lazily, fetching children concurrently."""
+
+    def __init__(self, fetch: FetchChunks, workers: int = DEFAULT_WORKERS, max_depth: int = MAX_DEPTH) -> None:
+        self.fetch = fetch
+        self.workers = workers
+        self.max_depth = max_depth
+        self.stats = SitemapStats()
+        self.errors: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def _read_one(self, url: str, depth: int, out: "queue.Queue", stop: threading.Event) -> None:
+        def put(item: tuple) -> bool:
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        is_index = False
+        try:
+            for kind, record in iter_sitemap(self.fetch(url)):
+                if kind == SITEMAP:
+                    is_index = True
+                    if not put((SITEMAP, record, depth + 1)):
+                        return
+                elif not put((URL, record, depth)):
+                    return
+        except Exception as exc:  # noqa: BLE001 - one bad child must not end the read
+            with self._lock:
+                self.stats.errors += 1
+                self.errors.append((url, str(exc)))
+        finally:
+            with self._lock:
+                self.stats.sitemaps += 1
+                self.stats.indexes += int(is_index)
+            put((None, None, depth))
+
+    def read(self, url: str) -> Iterator[SitemapRecord]:
+        """Yield URL records from `url` and, recursively, from its child sitemaps.
+
+        Records of a single file keep their order; records of different child
+        sitemaps may interleave. Closing the generator stops the fetch threads.
+        """
+        out: "queue.Queue" = queue.Queue(maxsize=QUEUE_SIZE)
+        stop = threading.Event()
+        seen: Set[str] = {url}
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sitemap")
+        executor.submit(self._read_one, url, 0, out, stop)
+        outstanding = 1
+        try:
+            while outstanding:
+                kind, record, depth = out.get()
+                if kind is None:
+                    outstanding -= 1
+                elif kind == SITEMAP:
+                    if depth <= self.max_depth and record.loc not in seen:
+                        seen.add(record.loc)
+                        executor.submit(self._read_one, record.loc, depth, out, stop)
+                        outstanding += 1
+                else:
+                    with self._lock:
+                        self.stats.urls += 1
+                    yield record
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,81 @@
+"""
+Helpers for consuming response bodies chunk by chunk.
+
+A *sink* is a callable that receives raw body chunks and may return True to
+stop reading. A *sink factory* is called once the status line and headers are
+known and returns a sink, or None to have the body buffered as usual.
+"""
+
+from __future__ import annotations
+
+import codecs
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+ChunkSink = Callable[[bytes], Optional[bool]]
+SinkFactory = Callable[[int, Mapping[str, str]], Optional[ChunkSink]]
+
+
+class TextFeed:
+    """Decode byte chunks with an incremental decoder and pass text on.
+
+    Multi-byte characters split across chunk boundaries are held back by the
+    decoder until the rest of the sequence arrives. With `hold_from="<"` the
+    text after the last `<` is also held back, so an HTML parser is only ever
+    fed up to a tag boundary and sees each text node in one `handle_data`
+    call, exactly as when the whole document is fed at once.
+    """
+
+    def __init__(self, feed: Callable[[str], Any], charset: str = "utf-8", hold_from: Optional[str] = None) -> None:
+        try:
+            decoder_cls = codecs.getincrementaldecoder(charset)
+        except LookupError:
+            decoder_cls = codecs.getincrementaldecoder("utf-8")
+        self._decoder = decoder_cls(errors="replace")
+        self._feed = feed
+        self._hold_from = hold_from
+        self._pending = ""
+        self.bytes_in = 0
+
+    def __call__(self, chunk: bytes) -> Optional[bool]:
+        self.bytes_in += len(chunk)
+        text = self._decoder.decode(chunk)
+        if self._hold_from is not None:
+            text = self._pending + text
+            cut = text.rfind(self._hold_from)
+            if cut < 0:
+                self._pending = text
+                return None
+            text, self._pending = text[:cut], text[cut:]
+        if text:
+            return self._feed(text)
+        return None
+
+    def close(self) -> None:
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        if text:
+            self._feed(text)
+
+
+def html_feed(feed: Callable[[str], Any], charset: str = "utf-8") -> TextFeed:
+    """TextFeed for HTMLParser.feed that only splits the input at tag starts."""
+    return TextFeed(feed, charset, hold_from="<")
+
+
+def pump(chunks: Iterable[bytes], sink: ChunkSink) -> bool:
+    """Send chunks to `sink` until exhausted; returns True if the sink stopped early."""
+    for chunk in chunks:
+        if sink(chunk):
+            return True
+    return False
+
+
+def iter_file(path: str, chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,106 @@
+"""
+Request timing breakdown.
+
+`TimedHTTPConnection` / `TimedHTTPSConnection` resolve, connect and handshake
+as separate, individually timed steps so the pool can report where the time
+of a request went: DNS lookup, TCP connect, TLS handshake, server wait (time
+from request sent to response headers) and body download. All measurements
+use `time.perf_counter()`, which is monotonic.
+"""
+
+from __future__ import annotations
+
+import http.client
+import socket
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+def _ms(seconds: float) -> float:
+    return seconds * 1000.0
+
+
+@dataclass
+class RequestTiming:
+    """Per-request phase durations in milliseconds.
+
+    DNS, connect and TLS are zero when a pooled connection was reused.
+    `ttfb_ms` is the time from starting the request (including redirects) to
+    receiving the response headers; `total_ms` adds the body download.
+    """
+
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0
+    tls_ms: float = 0.0
+    send_ms: float = 0.0
+    wait_ms: float = 0.0
+    download_ms: float = 0.0
+    redirect_ms: float = 0.0
+    reused_connection: bool = False
+
+    @property
+    def ttfb_ms(self) -> float:
+        return self.redirect_ms + self.dns_ms + self.connect_ms + self.tls_ms + self.send_ms + self.wait_ms
+
+    @property
+    def total_ms(self) -> float:
+        return self.ttfb_ms + self.download_ms
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "dns_ms": round(self.dns_ms, 2),
+            "connect_ms": round(self.connect_ms, 2),
+            "tls_ms": round(self.tls_ms, 2),
+            "send_ms": round(self.send_ms, 2),
+            "wait_ms": round(self.wait_ms, 2),
+            "download_ms": round(self.download_ms, 2),
+            "redirect_ms": round(self.redirect_ms, 2),
+            "ttfb_ms": round(self.ttfb_ms, 2),
+            "total_ms": round(self.total_ms, 2),
+            "reused_connection": self.reused_connection,
+        }
+
+
+def _open_socket(conn: http.client.HTTPConnection) -> Tuple[float, float]:
+    """Resolve and connect `conn.host`, returning (dns_ms, connect_ms)."""
+    start = time.perf_counter()
+    addresses = socket.getaddrinfo(conn.host, conn.port, 0, socket.SOCK_STREAM)
+    resolved = time.perf_counter()
+    error: Optional[OSError] = None
+    for family, socktype, proto, _, address in addresses:
+        sock = socket.socket(family, socktype, proto)
+        try:
+            if conn.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:  # type: ignore[attr-defined]
+                sock.settimeout(conn.timeout)
+            sock.connect(address)
+        except OSError as exc:
+            error = exc
+            sock.close()
+            continue
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.sock = sock
+        return _ms(resolved - start), _ms(time.perf_counter() - resolved)
+    raise error or OSError(f"getaddrinfo returned no addresses for {conn.host}")
+
+
+class TimedHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        super().__init__(*args, **kwargs)
+        self.connect_timing = (0.0, 0.0, 0.0)
+
+    def connect(self) -> None:
+        dns_ms, connect_ms = _open_socket(self)
+        self.connect_timing = (dns_ms, connect_ms, 0.0)
+
+
+class TimedHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        super().__init__(*args, **kwargs)
+        self.connect_timing = (0.0, 0.0, 0.0)
+
+    def connect(self) -> None:
+        dns_ms, connect_ms = _open_socket(self)
+        start = time.perf_counter()
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)  # type: ignore[attr-defined]
+        self.connect_timing = (dns_ms, connect_ms, _ms(time.perf_counter() - start))
@@ -1,9 +1,8 @@
-import time
 import csv
-import urllib.request
-import urllib.error
 import os
 
+from crawler.pool import ConnectionPool
+
 URLS = [
     "https://www.drsayuj.info",
     "https://www.drsayuj.info/services/minimally-invasive-spine-surgery",
@@ -15,43 +14,61 @@ URLS = [
 OUTPUT_DIR = "audit/headers"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+PHASES = ['dns_ms', 'connect_ms', 'tls_ms', 'wait_ms', 'download_ms', 'total_ms']
+
 def check_headers():
     report_md = "# Headers & Performance Report\n\n"
     ttfb_data = []
 
+    # pool_size=0 closes every connection after use, so each URL is measured
+    # on a fresh connection with its full DNS / connect / TLS cost.
+    pool = ConnectionPool(pool_size=0, timeout=20, headers={'User-Agent': 'SEO-Audit-Bot/1.0'})
     for url in URLS:
         print(f"Checking {url}...")
         try:
-            start_time = time.time()
-            req = urllib.request.Request(url, headers={'User-Agent': 'SEO-Audit-Bot/1.0'})
-            with urllib.request.urlopen(req) as response:
-                end_time = time.time()
-                ttfb = (end_time - start_time) * 1000 # ms
-                headers = response.info()
+            with pool.request(url) as response:
+                response.read()
+                headers = response.headers
+                timing = response.timing
 
                 report_md += f"## {url}\n\n"
-                report_md += f"- **TTFB**: {ttfb:.2f} ms\n"
-                report_md += f"- **Status**: {response.getcode()}\n"
+                report_md += f"- **TTFB**: {timing.ttfb_ms:.2f} ms\n"
+                report_md += (f"  - DNS {timing.dns_ms:.2f} ms, Connect {timing.connect_ms:.2f} ms, "
+                              f"TLS {timing.tls_ms:.2f} ms, Wait {timing.wait_ms:.2f} ms\n")
+                if timing.redirect_ms:
+                    report_md += f"  - Redirects {timing.redirect_ms:.2f} ms\n"
+                report_md += f"- **Download**: {timing.download_ms:.2f} ms (total {timing.total_ms:.2f} ms)\n"
+                transfer = response.transfer
+                report_md += (f"- **Transfer**: {transfer.wire_bytes / 1024:.1f} KB "
+                              f"({transfer.decoded_bytes / 1024:.1f} KB decoded, {transfer.encoding or 'identity'}, "
+                              f"{transfer.ratio:.2f}x)\n")
+                report_md += f"- **Status**: {response.status}\n"
                 report_md += "### Headers\n```\n"
                 report_md += str(headers)
                 report_md += "```\n\n"
 
+                phases = timing.as_dict()
                 ttfb_data.append({
                     'url': url,
-                    'ttfb_ms': round(ttfb, 2),
+                    'ttfb_ms': phases['ttfb_ms'],
+                    **{phase: phases[phase] for phase in PHASES},
                     'cache_control': headers.get('Cache-Control', 'N/A'),
                     'content_encoding': headers.get('Content-Encoding', 'N/A'),
+                    'wire_bytes': transfer.wire_bytes,
+                    'decoded_bytes': transfer.decoded_bytes,
                     'server': headers.get('Server', 'N/A')
                 })
         except Exception as e:
             report_md += f"## {url}\n\nError: {str(e)}\n\n"
             print(f"Error checking {url}: {e}")
+    pool.close()
 
     with open(os.path.join(OUTPUT_DIR, "headers_report.md"), "w") as f:
         f.write(report_md)
 
     with open(os.path.join(OUTPUT_DIR, "ttfb_table.csv"), "w", newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['url', 'ttfb_ms', 'cache_control', 'content_encoding', 'server'])
+        writer = csv.DictWriter(f, fieldnames=['url', 'ttfb_ms', *PHASES, 'cache_control', 'content_encoding',
+                                               'wire_bytes', 'decoded_bytes', 'server'])
         writer.writeheader()
         writer.writerows(ttfb_data)
 
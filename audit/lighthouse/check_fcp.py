@@ -1,12 +1,15 @@
-import json
 import glob
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crawler.jsonstream import LIGHTHOUSE_SKIP, load
 
 LIGHTHOUSE_DIR = "audit/lighthouse"
 
 def analyze_report(filepath):
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = load(f, keys=('audits',), skip=LIGHTHOUSE_SKIP)
 
     categories = data.get('categories', {})
     audits = data.get('audits', {})
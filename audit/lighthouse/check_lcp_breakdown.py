@@ -1,9 +1,16 @@
 import json
+import os
+import sys
 
-with open('audit/lighthouse/home.report.json') as f:
-    data = json.load(f)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crawler.jsonstream import load
+
+with open('audit/lighthouse/home.report.json', encoding='utf-8') as f:
+    try:
+        audit = load(f, path=('audits', 'lcp-breakdown-insight'))
+    except KeyError:
+        audit = None
 
-audit = data['audits'].get('lcp-breakdown-insight')
 if audit:
     print(json.dumps(audit, indent=2))
 else:
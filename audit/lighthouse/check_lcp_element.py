@@ -1,11 +1,14 @@
 import json
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crawler.jsonstream import load
+
 try:
-    with open('audit/lighthouse/home.report.json') as f:
-        data = json.load(f)
+    with open('audit/lighthouse/home.report.json', encoding='utf-8') as f:
+        lcp_element = load(f, path=('audits', 'largest-contentful-paint-element', 'details', 'items', 0))
 
-    lcp_element = data['audits']['largest-contentful-paint-element']['details']['items'][0]
     print("LCP Element:")
     print(json.dumps(lcp_element, indent=2))
 except Exception as e:
@@ -1,6 +1,8 @@
-import json
+import os
+import sys
 
-with open('audit/lighthouse/home.report.json') as f:
-    data = json.load(f)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crawler.jsonstream import iter_keys
 
-print(list(data['audits'].keys()))
+with open('audit/lighthouse/home.report.json', encoding='utf-8') as f:
+    print(list(iter_keys(f, ('audits',))))
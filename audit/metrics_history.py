@@ -0,0 +1,78 @@
+import glob
+import time
+
+from crawler.metrics import AGGREGATES, METRICS, MetricsStore
+from process_audit import determine_page_type
+
+# Configuration
+STORE_PATH = "audit/history/metrics.sqlite"
+REPORT_GLOBS = [
+    "reports/seo/*.json",
+    "reports/performance/*.json",
+    "audit/lighthouse/*.report.json",
+]
+
+def report_files():
+    return sorted(path for pattern in REPORT_GLOBS for path in glob.glob(pattern))
+
+def ingest(store, paths):
+    start = time.perf_counter()
+    ingested, errors = store.ingest(paths)
+    for path, rows in ingested.items():
+        print(f"Ingested {path}: {rows} rows")
+    for path, error in errors.items():
+        print(f"Skipping {path}: {error}")
+    skipped = len(paths) - len(ingested) - len(errors)
+    print(f"{len(ingested)} reports ingested, {skipped} unchanged, {len(errors)} unreadable "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+def format_value(value):
+    if value is None:
+        return ''
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+def trend(store, args):
+    start = time.perf_counter()
+    if args.metric == 'issues':
+        rows = store.issue_trend(monthly=args.monthly, since=args.since, until=args.until, page_type=args.page_type)
+        header = ['period', 'issue', 'pages']
+    else:
+        rows = store.trend(args.metric, agg=args.agg, by_type=not args.all_types, monthly=args.monthly,
+                           since=args.since, until=args.until, page_type=args.page_type, source=args.source)
+        header = ['period', 'page_type', f'{args.agg}({args.metric})', 'rows']
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(" | ".join(header))
+    for row in rows:
+        print(" | ".join(format_value(v) for v in row))
+    print(f"\n{len(rows)} rows in {elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Store per-page SEO and performance metrics from every report "
+                                                     "and query their trends.")
+    arg_parser.add_argument('--store', default=STORE_PATH, help='SQLite metrics store')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = commands.add_parser('ingest', help='Add new or changed reports to the store')
+    ingest_parser.add_argument('reports', nargs='*',
+                               help=f'Report files (default: {", ".join(REPORT_GLOBS)})')
+
+    trend_parser = commands.add_parser('trend', help='Aggregate a metric per report date and page type')
+    trend_parser.add_argument('metric', choices=METRICS + ('issues',),
+                              help='Metric column, or "issues" for page counts per issue label')
+    trend_parser.add_argument('--agg', choices=AGGREGATES, default='avg')
+    trend_parser.add_argument('--since', help='First date (YYYY-MM-DD) to include')
+    trend_parser.add_argument('--until', help='Last date (YYYY-MM-DD) to include')
+    trend_parser.add_argument('--page-type', help='Only this page type (see process_audit.determine_page_type)')
+    trend_parser.add_argument('--source', choices=['seo', 'lighthouse', 'pagespeed'], help='Only rows from these reports')
+    trend_parser.add_argument('--monthly', action='store_true', help='Group by month instead of report date')
+    trend_parser.add_argument('--all-types', action='store_true', help='One row per period across page types')
+    args = arg_parser.parse_args()
+
+    with MetricsStore(args.store, determine_page_type) as metrics_store:
+        if args.command == 'ingest':
+            ingest(metrics_store, args.reports or report_files())
+        else:
+            trend(metrics_store, args)
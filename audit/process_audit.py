@@ -1,22 +1,66 @@
 import json
 import csv
+import hashlib
 import os
 import sys
 from urllib.parse import urlparse
-from collections import defaultdict, Counter
+from collections import Counter
+from operator import itemgetter, not_
 import glob
 
+from crawler.columns import Categorical, Mask
+from crawler.delta import ReportIndex, diff
+from crawler.frontier import canonicalize_url
+from crawler.graph import LinkGraph, click_depth, orphans, pagerank
+from crawler.jsonld import SchemaIndex, schema_types as jsonld_types
+from crawler.jsonstream import iter_array, load
+import crawler.columns
+import crawler.delta
+import crawler.frontier
+import crawler.graph
+import crawler.jsonld
+
 # Configuration
 REPORT_DIR = "reports/seo"
 AUDIT_DIR = "audit"
+REPORT_PATTERN = "comprehensive-seo-audit-*.json"
+DELTA_DIR = os.path.join(AUDIT_DIR, "delta")
+# Index (per-URL field hashes) of the report the artifacts were last built from
+MANIFEST = os.path.join(DELTA_DIR, "manifest.json")
+
+# Artifact -> report page fields it is derived from. Added or removed pages
+# affect every artifact.
+ARTIFACT_FIELDS = {
+    'crawl/url_inventory.csv': {'statusCode', 'canonical', 'title', 'metaDescription', 'h1Tags', 'wordCount',
+                                'internalLinks'},
+    'crawl/url_inventory.json': {'statusCode', 'canonical', 'title', 'metaDescription', 'h1Tags', 'wordCount',
+                                 'internalLinks'},
+    'crawl/crawl_summary.md': {'internalLinks'},
+    'onpage/onpage_issues.csv': {'issues', 'title'},
+    'tech/tech_issues.csv': {'statusCode', 'canonical'},
+    'schema/schema_inventory.json': {'structuredData'},
+    'schema/schema_issues.csv': {'structuredData'},
+    'schema/schema_index.json': {'structuredData'},
+}
+# Artifacts holding issue rows; rewritten whenever a page's issue labels change
+ISSUE_ARTIFACTS = {'onpage/onpage_issues.csv', 'tech/tech_issues.csv', 'schema/schema_issues.csv'}
+# Code the artifacts and issue labels are derived by. The manifest records a
+# hash of it, so a rule change rebuilds every artifact instead of being hidden
+# behind unchanged page hashes
+RULE_SOURCES = [os.path.abspath(__file__), crawler.columns.__file__, crawler.delta.__file__,
+                crawler.frontier.__file__, crawler.graph.__file__, crawler.jsonld.__file__]
 
 def get_latest_report():
-    files = glob.glob(os.path.join(REPORT_DIR, "comprehensive-seo-audit-*.json"))
+    files = glob.glob(os.path.join(REPORT_DIR, REPORT_PATTERN))
     if not files:
         return None
     # Sort by modification time
     return max(files, key=os.path.getmtime)
 
+def list_reports():
+    # The date in the file name orders the history (copies share an mtime)
+    return sorted(glob.glob(os.path.join(REPORT_DIR, REPORT_PATTERN)), key=os.path.basename)
+
 def determine_page_type(url):
     path = urlparse(url).path
     if path == "/" or path == "":
@@ -33,35 +77,144 @@ def determine_page_type(url):
         return "appointment"
     return "other"
 
-def process_audit():
-    json_file = get_latest_report()
-    if not json_file:
-        print("No audit report found.")
-        sys.exit(1)
+def page_schema_types(page):
+    # Every @type in the page's JSON-LD, nested nodes included (e.g. a FAQPage
+    # under mainEntity or a Physician under publisher)
+    return jsonld_types(page.get('structuredData') or [])
 
-    print(f"Processing {json_file}...")
+# Issue rules: (artifact, conditions, issue, severity, fix). A page gets the
+# row when every (field, test) condition holds for its rule_fields(); '{field}'
+# in the issue is filled in from the page. page_findings() checks them page by
+# page, batch_findings() as column masks, so each rule is only written here
+ISSUE_RULES = [
+    ('onpage', [('title_length', lambda length: length < 30)], 'Title too short', 'Low', 'Expand title'),
+    ('tech', [('status', lambda status: status != 200)], 'Status {status}', 'High', 'Fix error'),
+    ('tech', [('has_canonical', not_)], 'Missing Canonical', 'High', 'Add canonical tag'),
+    ('schema', [('has_schema', bool), ('page_type', lambda p_type: p_type in ['service', 'condition']),
+                ('has_faq', not_)], 'Missing FAQPage Schema', 'Medium', 'Add FAQ schema'),
+    ('schema', [('has_schema', not_), ('page_type', lambda p_type: p_type not in ['other'])],
+     'No Structured Data', 'High', 'Implement Schema'),
+]
 
-    with open(json_file, 'r') as f:
-        data = json.load(f)
+def rule_fields(page, p_type, schema_types):
+    # The page fields ISSUE_RULES test
+    return {
+        'page_type': p_type,
+        'status': page.get('statusCode'),
+        'has_canonical': bool(page.get('canonical')),
+        'title_length': len(page.get('title', '') or ''),
+        'has_schema': bool(page.get('structuredData')),
+        'has_faq': 'FAQPage' in schema_types,
+    }
 
-    pages = data.get('pages', [])
-    if not pages:
-        print("No page data found in report.")
-        sys.exit(1)
+def reported_issue_severity(issue):
+    # Severity of an issue listed in the report's own 'issues' for a page
+    return 'High' if 'Missing' in issue or 'Multiple' in issue else 'Medium'
+
+def page_findings(page, p_type, schema_types=None):
+    # On-page, technical and schema issue rows plus the schema types of one page;
+    # schema_types can be passed in when the page's JSON-LD was already walked
+    url = page['url']
+    if not page.get('structuredData'):
+        schema_types = []
+    elif schema_types is None:
+        schema_types = page_schema_types(page)
+    fields = rule_fields(page, p_type, schema_types)
+
+    findings = {'onpage': [], 'tech': [], 'schema': []}
+    for issue in page.get('issues') or []:
+        findings['onpage'].append([url, issue, reported_issue_severity(issue), 'Fix issue'])
+    for artifact, conditions, issue, severity, fix in ISSUE_RULES:
+        for name, test in conditions:
+            if not test(fields[name]):
+                break
+        else:
+            findings[artifact].append([url, issue.format(**fields), severity, fix])
+
+    return findings['onpage'], findings['tech'], schema_types, findings['schema']
 
-    # Calculate inlinks
-    inlinks = defaultdict(int)
+def batch_findings(pages, p_types, schema_types=None):
+    # The rows of page_findings() for every page at once: the rule fields are
+    # loaded into columns and each of ISSUE_RULES becomes one mask over all
+    # pages, with every test run once per distinct value of its field. Rows
+    # come out in page order, and in page_findings() order within a page
+    if schema_types is None:
+        schema_types = [page_schema_types(page) if page.get('structuredData') else [] for page in pages]
+    else:
+        schema_types = [types if page.get('structuredData') else [] for page, types in zip(pages, schema_types)]
+    fields = [rule_fields(page, p_type, types) for page, p_type, types in zip(pages, p_types, schema_types)]
+    columns = {name: Categorical([page_fields[name] for page_fields in fields]) for name in fields[0]} if fields else {}
+
+    # (page index, row) per artifact
+    findings = {'onpage': [], 'tech': [], 'schema': []}
+    severities = {}
+    for i, page in enumerate(pages):
+        for issue in page.get('issues') or []:
+            if issue not in severities:
+                severities[issue] = reported_issue_severity(issue)
+            findings['onpage'].append((i, [page['url'], issue, severities[issue], 'Fix issue']))
+    for artifact, conditions, issue, severity, fix in ISSUE_RULES:
+        mask = Mask(b'\x01' * len(pages))
+        for name, test in conditions:
+            mask = mask & columns[name].mask(test)
+        for i in mask.indices():
+            findings[artifact].append((i, [pages[i]['url'], issue.format(**fields[i]), severity, fix]))
+
+    # sorted() is stable, so the rows of one page keep the order they were added in
+    onpage_issues, tech_issues, schema_issues = (
+        [row for _, row in sorted(findings[artifact], key=itemgetter(0))] for artifact in ('onpage', 'tech', 'schema'))
+    return onpage_issues, tech_issues, schema_types, schema_issues
+
+def issue_labels(page):
+    # Every issue type reported for a page, for the report deltas
+    onpage_issues, tech_issues, _, schema_issues = page_findings(page, determine_page_type(page['url']))
+    return [row[1] for row in onpage_issues + tech_issues + schema_issues]
+
+def load_report(json_file):
+    # Only the members the artifacts use; discovery, recommendations etc. are skipped unparsed
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return load(f, keys=('site', 'pages'))
+
+def iter_report_pages(json_file):
+    # One page at a time, for callers that only hash them
+    with open(json_file, 'r', encoding='utf-8') as f:
+        try:
+            yield from iter_array(f, ('pages',))
+        except KeyError:
+            return
+
+def build_artifacts(data, batch=False):
+    # Derive every artifact of one report; returns {artifact path: writer(f)}.
+    # batch evaluates the issue rules with batch_findings() instead of page by page
+    pages = data['pages']
+
+    # Internal link graph over canonical URLs (so "/about/" and "/about#x" are one
+    # node): audited (sitemap) pages get ids 0..n-1, link targets follow
+    def canonical(url):
+        return canonicalize_url(url) or url
+
+    graph = LinkGraph()
+    urls = graph.urls
     for page in pages:
-        if 'internalLinks' in page:
-            for link in page['internalLinks']:
-                # Normalize link
-                if link.startswith('/'):
-                    full_link = data['site'] + link
-                elif link.startswith(data['site']):
-                    full_link = link
-                else:
-                    continue
-                inlinks[full_link] += 1
+        urls.id(canonical(page['url']))
+    for page in pages:
+        targets = []
+        for link in page.get('internalLinks', []):
+            # Normalize link
+            if link.startswith('/'):
+                targets.append(data['site'] + link)
+            elif link.startswith(data['site']):
+                targets.append(link)
+        graph.add_links(urls.id(canonical(page['url'])), (urls.id(canonical(t)) for t in targets))
+
+    links = graph.csr()
+    incoming = links.transpose()
+    inlinks = incoming.degrees()
+    # Scaled so the average page is 1.0
+    ranks = [r * links.nodes for r in pagerank(links, incoming=incoming)]
+    home = next((urls.get(canonical(p['url'])) for p in pages if determine_page_type(p['url']) == 'home'), None)
+    depths = click_depth(links, home) if home is not None else None
+    orphan_ids = set(orphans(inlinks, {urls.get(canonical(p['url'])) for p in pages}, home))
 
     # Prepare data for inventory
     inventory = []
@@ -71,15 +224,22 @@ def process_audit():
     schema_issues = []
 
     page_types = Counter()
+    p_types = [determine_page_type(page['url']) for page in pages]
+    # One walk over every page's JSON-LD feeds both the per-page rules and the
+    # crawl-wide index (schema type -> URLs, @id -> URLs)
+    schemas = SchemaIndex()
+    page_schema = [schemas.add(page['url'], page.get('structuredData') or []) for page in pages]
+    if batch:
+        onpage_issues, tech_issues, batch_schema_types, schema_issues = batch_findings(pages, p_types, page_schema)
 
-    for page in pages:
+    for i, (page, p_type) in enumerate(zip(pages, p_types)):
         url = page['url']
-        p_type = determine_page_type(url)
         page_types[p_type] += 1
 
         # Inventory Record
         h1 = page['h1Tags'][0] if page.get('h1Tags') else ""
 
+        url_id = urls.get(canonical(url))
         rec = {
             'url': url,
             'status_code': page.get('statusCode', 0),
@@ -90,101 +250,209 @@ def process_audit():
             'h1': h1,
             'word_count': page.get('wordCount', 0),
             'page_type': p_type,
-            'inlinks': inlinks.get(url, 0)
+            'inlinks': inlinks[url_id],
+            'pagerank': round(ranks[url_id], 4),
+            'click_depth': depths[url_id] if depths is not None and depths[url_id] >= 0 else '',
+            'orphan': url_id in orphan_ids
         }
         inventory.append(rec)
 
-        # Schema Inventory
-        if page.get('structuredData'):
-            schema_types = []
-            for sd in page['structuredData']:
-                if '@type' in sd:
-                    schema_types.append(sd['@type'])
-                if '@graph' in sd:
-                     for node in sd['@graph']:
-                         if '@type' in node:
-                             schema_types.append(node['@type'])
-            schema_inventory[url] = schema_types
-
-            # Basic Schema Checks
-            if p_type in ['service', 'condition']:
-                if 'FAQPage' not in schema_types:
-                    schema_issues.append([url, 'Missing FAQPage Schema', 'Medium', 'Add FAQ schema'])
-                if 'MedicalWebPage' not in schema_types and 'WebPage' not in schema_types:
-                     pass # WebPage is common
-
-            if 'Physician' not in schema_types and 'Person' not in schema_types:
-                 # Check if it's implicitly part of MedicalClinic
-                 pass
-
-        else:
-            schema_inventory[url] = []
-            if p_type not in ['other']:
-                schema_issues.append([url, 'No Structured Data', 'High', 'Implement Schema'])
-
-        # OnPage Issues
-        if page.get('issues'):
-            for issue in page['issues']:
-                severity = 'High' if 'Missing' in issue or 'Multiple' in issue else 'Medium'
-                onpage_issues.append([url, issue, severity, 'Fix issue'])
-
-        if len(page.get('title', '') or '') < 30:
-            onpage_issues.append([url, 'Title too short', 'Low', 'Expand title'])
+        if batch:
+            schema_inventory[url] = batch_schema_types[i]
+            continue
+        page_onpage, page_tech, schema_types, page_schema_issues = page_findings(page, p_type, page_schema[i])
+        schema_inventory[url] = schema_types
+        onpage_issues.extend(page_onpage)
+        tech_issues.extend(page_tech)
+        schema_issues.extend(page_schema_issues)
 
-        # Tech Issues
-        if page.get('statusCode') != 200:
-            tech_issues.append([url, f"Status {page.get('statusCode')}", 'High', 'Fix error'])
-
-        if not page.get('canonical'):
-            tech_issues.append([url, 'Missing Canonical', 'High', 'Add canonical tag'])
-        elif page.get('canonical') != url:
-            # Self-referencing check
-            pass # Non-self-referencing is fine if intentional, but check for conflicts
-
-    # Write files
+    def issues_csv(rows):
+        def write(f):
+            writer = csv.writer(f)
+            writer.writerow(['url', 'issue_type', 'severity', 'recommended_fix'])
+            writer.writerows(rows)
+        return write
 
     # 1. URL Inventory CSV
-    with open(os.path.join(AUDIT_DIR, 'crawl/url_inventory.csv'), 'w', newline='') as f:
+    def url_inventory_csv(f):
         writer = csv.DictWriter(f, fieldnames=inventory[0].keys())
         writer.writeheader()
         writer.writerows(inventory)
 
-    # 2. URL Inventory JSON
-    with open(os.path.join(AUDIT_DIR, 'crawl/url_inventory.json'), 'w') as f:
-        json.dump(inventory, f, indent=2)
-
     # 3. Crawl Summary MD
-    with open(os.path.join(AUDIT_DIR, 'crawl/crawl_summary.md'), 'w') as f:
+    def crawl_summary(f):
         f.write(f"# Crawl Summary\n\n")
         f.write(f"- **Total URLs**: {len(inventory)}\n")
-        f.write(f"- **Indexable**: {len(inventory)} (Assumed)\n\n")
+        f.write(f"- **Indexable**: {len(inventory)} (Assumed)\n")
+        f.write(f"- **Orphan Pages** (no internal inlinks): {len(orphan_ids)}\n\n")
         f.write("## Page Types\n")
         for pt, count in page_types.items():
             f.write(f"- {pt}: {count}\n")
 
-    # 4. OnPage Issues CSV
-    with open(os.path.join(AUDIT_DIR, 'onpage/onpage_issues.csv'), 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['url', 'issue_type', 'severity', 'recommended_fix'])
-        writer.writerows(onpage_issues)
+    # 8. Schema Index, with the pages that still lack the schema their type needs
+    def schema_index(f):
+        index = schemas.as_dict()
+        needs_faq = (page['url'] for page, p_type in zip(pages, p_types)
+                     if p_type in ['service', 'condition'] and page.get('structuredData'))
+        index['lacking'] = {'FAQPage': list(dict.fromkeys(schemas.lacking('FAQPage', needs_faq)))}
+        json.dump(index, f, indent=2)
+
+    return {
+        'crawl/url_inventory.csv': url_inventory_csv,
+        # 2. URL Inventory JSON
+        'crawl/url_inventory.json': lambda f: json.dump(inventory, f, indent=2),
+        'crawl/crawl_summary.md': crawl_summary,
+        # 4. OnPage Issues CSV
+        'onpage/onpage_issues.csv': issues_csv(onpage_issues),
+        # 5. Tech Issues CSV
+        'tech/tech_issues.csv': issues_csv(tech_issues),
+        # 6. Schema Inventory
+        'schema/schema_inventory.json': lambda f: json.dump(schema_inventory, f, indent=2),
+        # 7. Schema Issues
+        'schema/schema_issues.csv': issues_csv(schema_issues),
+        'schema/schema_index.json': schema_index,
+    }
+
+def write_artifacts(artifacts, names=None):
+    for name, write in artifacts.items():
+        if names is None or name in names:
+            with open(os.path.join(AUDIT_DIR, name), 'w', newline='') as f:
+                write(f)
+
+def rules_version():
+    digest = hashlib.blake2b(digest_size=8)
+    for path in RULE_SOURCES:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def save_manifest(index):
+    os.makedirs(DELTA_DIR, exist_ok=True)
+    with open(MANIFEST, 'w') as f:
+        json.dump({'rules': rules_version(), **index.as_dict()}, f)
+
+def load_manifest():
+    # None when there is no manifest, or it was built by different rules
+    try:
+        with open(MANIFEST, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('rules') != rules_version():
+            print("Rules changed since the artifacts were built; rebuilding all of them.")
+            return None
+        return ReportIndex.from_dict(manifest)
+    except (OSError, ValueError, KeyError):
+        return None
+
+def affected_artifacts(delta):
+    # Every artifact lists pages by URL, so added or removed pages, or a page
+    # whose URL is spelled differently under the same canonical key (its 'url'
+    # field digest changes), rewrite all of them
+    if delta.added or delta.removed or 'url' in delta.changed_fields:
+        return set(ARTIFACT_FIELDS)
+    changed = delta.changed_fields
+    names = {name for name, fields in ARTIFACT_FIELDS.items() if fields & changed}
+    if delta.issues_added or delta.issues_resolved:
+        names |= ISSUE_ARTIFACTS
+    return names
+
+def process_audit(batch=False):
+    json_file = get_latest_report()
+    if not json_file:
+        print("No audit report found.")
+        sys.exit(1)
+
+    print(f"Processing {json_file}...")
 
-    # 5. Tech Issues CSV
-    with open(os.path.join(AUDIT_DIR, 'tech/tech_issues.csv'), 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['url', 'issue_type', 'severity', 'recommended_fix'])
-        writer.writerows(tech_issues)
+    data = load_report(json_file)
 
-    # 6. Schema Inventory
-    with open(os.path.join(AUDIT_DIR, 'schema/schema_inventory.json'), 'w') as f:
-        json.dump(schema_inventory, f, indent=2)
+    pages = data.get('pages', [])
+    if not pages:
+        print("No page data found in report.")
+        sys.exit(1)
 
-    # 7. Schema Issues
-    with open(os.path.join(AUDIT_DIR, 'schema/schema_issues.csv'), 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['url', 'issue_type', 'severity', 'recommended_fix'])
-        writer.writerows(schema_issues)
+    # Write files
+    write_artifacts(build_artifacts(data, batch))
+    save_manifest(ReportIndex.build(os.path.basename(json_file), pages, issue_labels))
 
     print("Processing complete. Artifacts generated.")
 
+def write_delta_reports(deltas):
+    with open(os.path.join(DELTA_DIR, 'report_deltas.json'), 'w') as f:
+        json.dump([d.as_dict() for d in deltas], f, indent=2)
+
+    with open(os.path.join(DELTA_DIR, 'delta_summary.md'), 'w') as f:
+        f.write("# Audit Report Deltas\n\n")
+        f.write("| From | To | Added | Removed | Changed | Unchanged | Issues Added | Issues Resolved |\n")
+        f.write("|---|---|---|---|---|---|---|---|\n")
+        for d in deltas:
+            f.write(f"| {d.old} | {d.new} | {len(d.added)} | {len(d.removed)} | {len(d.changed)} | {d.unchanged} "
+                    f"| {len(d.issues_added)} | {len(d.issues_resolved)} |\n")
+        for d in deltas:
+            f.write(f"\n## {d.old} → {d.new}\n\n")
+            if not d and not d.issues_added and not d.issues_resolved:
+                f.write("No page changes.\n")
+                continue
+            sections = [
+                ("Added Pages", d.added),
+                ("Removed Pages", d.removed),
+                ("Changed Pages", [f"{url} ({', '.join(fields)})" for url, fields in d.changed.items()]),
+                ("Issues Added", [f"{url}: {issue}" for url, issue in d.issues_added]),
+                ("Issues Resolved", [f"{url}: {issue}" for url, issue in d.issues_resolved]),
+            ]
+            for title, items in sections:
+                if items:
+                    f.write(f"### {title} ({len(items)})\n\n")
+                    f.writelines(f"- {item}\n" for item in items)
+                    f.write("\n")
+
+def process_history(json_files=None, batch=False):
+    # Diff consecutive reports, then rewrite only the artifacts the newest
+    # report changes relative to the one they were last built from
+    json_files = json_files or list_reports()
+    deltas = []
+    previous = latest = None
+    for json_file in json_files:
+        # Pages are streamed into the index; only their hashes are kept
+        index = ReportIndex.build(os.path.basename(json_file), iter_report_pages(json_file), issue_labels)
+        if not index:
+            print(f"Skipping {json_file}: no page data.")
+            continue
+        if previous is not None:
+            delta = diff(previous, index)
+            deltas.append(delta)
+            print(f"{delta.old} -> {delta.new}: {len(delta.added)} added, {len(delta.removed)} removed, "
+                  f"{len(delta.changed)} changed, {len(delta.issues_added)} issues added, "
+                  f"{len(delta.issues_resolved)} resolved")
+        previous, latest = index, json_file
+
+    if previous is None:
+        print("No audit report with page data found.")
+        sys.exit(1)
+    os.makedirs(DELTA_DIR, exist_ok=True)
+    write_delta_reports(deltas)
+
+    built = load_manifest()
+    names = set(ARTIFACT_FIELDS) if built is None else affected_artifacts(diff(built, previous))
+    names |= {name for name in ARTIFACT_FIELDS if not os.path.exists(os.path.join(AUDIT_DIR, name))}
+    if names:
+        write_artifacts(build_artifacts(load_report(latest), batch), names)
+    save_manifest(previous)
+    print(f"Artifacts for {previous.name}: {len(names)} rewritten "
+          f"({', '.join(sorted(names)) or 'none'}), {len(ARTIFACT_FIELDS) - len(names)} unchanged.")
+
 if __name__ == "__main__":
-    process_audit()
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Build the audit artifacts from the SEO audit reports.")
+    arg_parser.add_argument('reports', nargs='*',
+                            help=f'Reports to diff, oldest first (implies --delta; default: every {REPORT_PATTERN})')
+    arg_parser.add_argument('--delta', action='store_true',
+                            help=f'Diff the report history into {DELTA_DIR}/ and rewrite only the artifacts '
+                                 f'the newest report changes')
+    arg_parser.add_argument('--batch', action='store_true',
+                            help='Evaluate the issue rules as column masks over all pages at once')
+    args = arg_parser.parse_args()
+    if args.delta or args.reports:
+        process_history(args.reports, args.batch)
+    else:
+        process_audit(args.batch)
@@ -11,6 +11,10 @@ from code_interpreter import CodeInterpreter, SupportedLanguage
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("daily-sandbox")
 
+# Shared page parser and rule plugins, copied into the sandbox as a package
+CRAWLER_DIR = os.path.join("audit", "crawler")
+CRAWLER_MODULES = ("__init__.py", "dedup.py", "page.py", "rules.py")
+
 async def main() -> None:
     logger.info("🚀 Starting Daily OpenSandbox Improvement Task...")
 
@@ -36,18 +40,21 @@ async def main() -> None:
             logger.warning("seo/keyword-registry.json not found. Using an empty JSON array.")
             keyword_registry_data = "[]"
 
-        # 2. Write the keyword registry into the sandbox filesystem
-        logger.info("Writing keyword registry to the isolated environment...")
-        await sandbox.files.write_files([
-            WriteEntry(path="/tmp/keyword-registry.json", data=keyword_registry_data, mode=644)
-        ])
+        # 2. Write the keyword registry and the shared page parser/rules (audit/crawler)
+        # into the sandbox filesystem, so pages are checked with the same rules as the crawlers
+        logger.info("Writing keyword registry and crawler rules to the isolated environment...")
+        entries = [WriteEntry(path="/tmp/keyword-registry.json", data=keyword_registry_data, mode=644)]
+        for module in CRAWLER_MODULES:
+            with open(os.path.join(CRAWLER_DIR, module), "r") as f:
+                entries.append(WriteEntry(path=f"/tmp/crawler/{module}", data=f.read(), mode=644))
+        await sandbox.files.write_files(entries)
 
         # 3. Create a Code Interpreter
         interpreter = await CodeInterpreter.create(sandbox)
 
         # 4. Execute a shell command to install dependencies
-        logger.info("Installing beautifulsoup4 and requests inside the sandbox...")
-        execution = await sandbox.commands.run("pip install beautifulsoup4 requests")
+        logger.info("Installing requests inside the sandbox...")
+        execution = await sandbox.commands.run("pip install requests")
         if execution.logs.stdout:
             logger.info(f"Pip Output: {execution.logs.stdout[0].text.strip()}")
 
@@ -57,10 +64,14 @@ async def main() -> None:
 import json
 import datetime
 import requests
-from bs4 import BeautifulSoup
+import sys
 import time
 import random
 
+sys.path.insert(0, "/tmp")
+from crawler.page import parse_html
+from crawler.rules import KeywordPlacementRule, default_rules
+
 def analyze_page(url, target_keyword):
     start_time = time.time()
     try:
@@ -72,41 +83,9 @@ def analyze_page(url, target_keyword):
     if response.status_code != 200:
         return {"url": url, "error": f"HTTP {response.status_code}", "status": "failed"}
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    title = soup.title.string.strip() if soup.title and soup.title.string else ""
-    desc_tag = soup.find('meta', attrs={'name': 'description'})
-    description = desc_tag['content'].strip() if desc_tag and 'content' in desc_tag.attrs else ""
-    h1_tags = [h1.get_text(strip=True) for h1 in soup.find_all('h1')]
-
-    recommendations = []
-
-    # Check if target keyword is present in important elements
-    kw_lower = target_keyword.lower()
-    if kw_lower and kw_lower not in title.lower():
-        recommendations.append(f"Target keyword '{target_keyword}' missing in <title>.")
-    if kw_lower and not any(kw_lower in h1.lower() for h1 in h1_tags):
-        recommendations.append(f"Target keyword '{target_keyword}' missing in <H1>.")
-
-    # Core checks
-    if len(title) > 60: recommendations.append("Title exceeds 60 characters.")
-    if not title: recommendations.append("Missing <title> tag.")
-    if not description: recommendations.append("Missing meta description.")
-    if len(h1_tags) == 0: recommendations.append("Missing <H1> tag.")
-    elif len(h1_tags) > 1: recommendations.append(f"Found {len(h1_tags)} <H1> tags; should be 1.")
-
-    # YMYL / Medical safety check
-    text_content = soup.get_text().lower()
-    if "100% success" in text_content or "guarantee" in text_content:
-        recommendations.append("YMYL Risk: Avoid absolute claims like '100% success' or 'guarantee'.")
-
-    # Local SEO / Conversion
-    has_booking_cta = any(cta in text_content for cta in ["book appointment", "schedule consultation", "book now", "book a consultation"])
-    has_internal_booking_link = "/appointments" in response.text or "book-appointment" in response.text
-    has_whatsapp_cta = "wa.me" in response.text or "api.whatsapp.com" in response.text or "whatsapp" in text_content
-
-    if not has_booking_cta:
-        recommendations.append("Missing clear Booking CTA.")
+    # One parse of the page evaluates every rule (SEO, YMYL claims, booking CTA, alt text, keyword)
+    page = parse_html(response.text, default_rules() + [KeywordPlacementRule(target_keyword)])
+    recommendations = [issue.message + "." for issue in page.issues]
 
     if response_time > 2.0:
         recommendations.append(f"Page load time ({response_time:.2f}s) may impact Core Web Vitals (LCP).")
@@ -118,12 +97,13 @@ def analyze_page(url, target_keyword):
         "status_code": response.status_code,
         "response_time_seconds": round(response_time, 2),
         "seo_data": {
-            "title": title,
-            "description_length": len(description),
-            "h1_count": len(h1_tags),
-            "has_booking_cta": has_booking_cta,
-            "has_internal_booking_link": has_internal_booking_link,
-            "has_whatsapp_cta": has_whatsapp_cta
+            "title": page.title or "",
+            "description_length": len(page.meta.get("description", "")),
+            "h1_count": len(page.h1),
+            "word_count": page.word_count,
+            "has_booking_cta": page.facts["has_booking_cta"],
+            "has_internal_booking_link": page.facts["has_internal_booking_link"],
+            "has_whatsapp_cta": page.facts["has_whatsapp_cta"]
         },
         "recommendations": recommendations
     }
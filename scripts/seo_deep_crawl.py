@@ -8,333 +8,543 @@ collecting on-page metadata for reporting.
 
 from __future__ import annotations
 
+import argparse
 import json
-import re
 import sys
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
 from collections import deque
-from dataclasses import dataclass, asdict, field
-from html.parser import HTMLParser
-from typing import Any, Dict, List, Optional, Set, Tuple
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+AUDIT_DIR = Path(__file__).resolve().parent.parent / "audit"
+sys.path.insert(0, str(AUDIT_DIR))
+
+from crawler.cache import HIT, REVALIDATED, CacheResult, ResponseCache, cached_request  # noqa: E402
+from crawler.checkpoint import CrawlCheckpoint  # noqa: E402
+from crawler.encoding import TransferSize  # noqa: E402
+from crawler.graph import IdSet, LinkGraph  # noqa: E402
+from crawler.output import JsonlWriter, iter_jsonl, write_json_stream  # noqa: E402
+from crawler.page import BACKENDS, DEFAULT_BACKEND, STOP_POINTS, PageData as ParsedPage, PageParser, parse_html, resolve_backend  # noqa: E402
+from crawler.pool import DEFAULT_POOL_SIZE, ConnectionPool, charset_from_headers  # noqa: E402
+from crawler.ratelimit import RETRY_STATUSES, AdaptiveRateLimiter  # noqa: E402
+from crawler.robots import RobotsMatcher, parse_robots_txt  # noqa: E402
+from crawler.rules import default_rules  # noqa: E402
+from crawler.sitemap import SitemapReader  # noqa: E402
+from crawler.stream import SinkFactory, html_feed, pump  # noqa: E402
 
 BASE_URL = "https://www.drsayuj.info"
-SITEMAP_URL = f"{BASE_URL}/sitemap-main.xml"
+SITEMAP_URL = f"{BASE_URL}/sitemap.xml"
 ROBOTS_URL = f"{BASE_URL}/robots.txt"
 USER_AGENT = "Mozilla/5.0 (compatible; CodexSEO/1.0; +https://www.drsayuj.info)"
 TIMEOUT = 20
 MAX_PAGES = 120
+# Starting delay between requests; it adapts to the server's responses and
+# never drops below the robots.txt Crawl-delay.
 CRAWL_DELAY = 0.2
+MAX_RETRIES = 2
 FOLLOW_INTERNAL_LINKS = False
+# Feed HTML to the parser chunk by chunk while it downloads (--stream).
+STREAM = False
+POOL_SIZE = DEFAULT_POOL_SIZE
+# Visited URLs, queued links and page results are saved here as the crawl runs;
+# --resume continues from it instead of starting over.
+CHECKPOINT_PATH = str(AUDIT_DIR / ".cache" / "seo_deep_crawl.sqlite")
+RESUME = False
+# One JSON line per crawled page, appended as pages finish; the "pages" array
+# of the JSON report is streamed from it.
+PAGES_JSONL = str(AUDIT_DIR / "crawl" / "seo_deep_pages.jsonl")
+
+# Shared keep-alive pool used by the page crawl, robots.txt and sitemap fetches.
+POOL = ConnectionPool(pool_size=POOL_SIZE, timeout=TIMEOUT, headers={"User-Agent": USER_AGENT})
+# Optional conditional-GET cache (enabled with --cache-dir).
+CACHE: Optional[ResponseCache] = None
+LIMITER = AdaptiveRateLimiter(initial_delay=CRAWL_DELAY)
+# On-page checks, evaluated while each page is parsed.
+RULES = default_rules()
+# HTML tokenizer (--parser-backend); lxml is used only when installed.
+PARSER_BACKEND = DEFAULT_BACKEND
+# --head-only: stop reading each page at </head> ("head") or its first </h1> ("h1").
+STOP_AFTER: Optional[str] = None
+
+
+def configure_pool(pool_size: int = POOL_SIZE, http2: bool = False) -> ConnectionPool:
+    """Replace the shared connection pool (used by the CLI options)."""
+    global POOL
+    POOL.close()
+    POOL = ConnectionPool(pool_size=pool_size, timeout=TIMEOUT, headers={"User-Agent": USER_AGENT}, http2=http2)
+    return POOL
+
+
+def _send(
+    url: str, extra_headers: Dict[str, str], on_headers: SinkFactory, transfers: Optional[List[TransferSize]] = None
+) -> Tuple[int, Dict[str, str], Optional[bytes]]:
+    for attempt in range(MAX_RETRIES + 1):
+        LIMITER.acquire(url)
+        try:
+            response = POOL.request(url, headers=extra_headers)
+        except Exception:
+            LIMITER.record(url, 0)
+            raise
+        if transfers is not None:
+            transfers.append(response.transfer)
+        with response:
+            status = response.status or 0
+            headers = {k.lower(): v for k, v in response.headers.items()}
+            LIMITER.record(url, status, response.timing.ttfb_ms, headers.get("retry-after"))
+            if status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                continue
+            return _read_body(response, status, headers, on_headers)
+    raise AssertionError("unreachable")
+
+
+def _read_body(
+    response: Any, status: int, headers: Dict[str, str], on_headers: SinkFactory
+) -> Tuple[int, Dict[str, str], Optional[bytes]]:
+    sink = on_headers(status, headers)
+    if sink is not None:
+        pump(response.iter_chunks(), sink)
+        return status, headers, None
+    if status >= 400 or any(token in headers.get("content-type", "") for token in ("text", "json", "xml")):
+        body = response.read()
+    else:
+        body = b""
+    return status, headers, body
+
+
+def fetch_response(
+    url: str, sink_factory: Optional[SinkFactory] = None, transfers: Optional[List[TransferSize]] = None
+) -> CacheResult:
+    """Fetch URL through the shared pool, revalidating against the cache if enabled.
+
+    The `TransferSize` of every response received is appended to `transfers`.
+    """
+    return cached_request(
+        CACHE,
+        url,
+        lambda extra_headers, on_headers: _send(url, extra_headers, on_headers, transfers),
+        sink_factory,
+    )
 
 
 def fetch_url(url: str) -> Tuple[int, Dict[str, str], str]:
     """Fetch URL, returning status, headers, and decoded body (if text)."""
-    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
     try:
-        with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
-            status = response.getcode() or 0
-            headers = {k.lower(): v for k, v in response.headers.items()}
-            charset = response.headers.get_content_charset() or "utf-8"
-            if any(token in headers.get("content-type", "") for token in ("text", "json", "xml")):
-                body_bytes = response.read()
-                body = body_bytes.decode(charset, errors="replace")
-            else:
-                body = ""
-            return status, headers, body
-    except urllib.error.HTTPError as err:
-        try:
-            body = err.read().decode("utf-8", errors="replace")
-        except Exception:
-            body = ""
-        return err.code, {k.lower(): v for k, v in err.headers.items()} if err.headers else {}, body
+        res = fetch_response(url)
     except Exception as exc:  # noqa: BLE001
         return 0, {}, f"ERROR: {exc}"
+    return res.status, res.headers, res.body.decode(charset_from_headers(res.headers), errors="replace")
+
 
+@dataclass
+class FetchedPage:
+    status: int
+    headers: Dict[str, str]
+    body: str = ""
+    parsed: Optional[Dict[str, Any]] = None
+    parsed_cached: bool = False
+    # None when a fresh cache entry was served without a request.
+    transfer: Optional[TransferSize] = None
+
+
+def fetch_page(url: str, stream: bool = False) -> FetchedPage:
+    """Fetch a page; in streaming mode the HTML is parsed while it downloads."""
+    parser: Optional[PageParser] = None
+    feed = None
+
+    def start_parser(status: int, headers: Any) -> Any:
+        nonlocal parser, feed
+        if status != 200 or "html" not in headers.get("content-type", ""):
+            return None
+        parser = PageParser(RULES, backend=PARSER_BACKEND, stop_after=STOP_AFTER)
+
+        def feed_text(text: str) -> Optional[bool]:
+            # True stops the download once the parser has reached STOP_AFTER.
+            if parser.page.parse_error:
+                return None
+            try:
+                return parser.feed(text)
+            except Exception as exc:  # noqa: BLE001
+                parser.page.parse_error = str(exc)
+            return None
 
-def parse_robots() -> Dict[str, List[str]]:
-    """Parse robots.txt to collect Disallow directives."""
+        feed = html_feed(feed_text, charset_from_headers(headers))
+        return feed
+
+    transfers: List[TransferSize] = []
+    try:
+        res = fetch_response(url, start_parser if stream else None, transfers)
+    except Exception as exc:  # noqa: BLE001
+        return FetchedPage(0, {}, f"ERROR: {exc}")
+
+    page = FetchedPage(res.status, res.headers, transfer=transfers[-1] if transfers else None)
+    # Parse results stored before the rules ran (no "issues") or with another
+    # --head-only setting are re-parsed.
+    stored = res.entry.parsed if res.entry is not None and res.state in (HIT, REVALIDATED) else None
+    if stored and "issues" in stored and stored.get("partial", False) == bool(STOP_AFTER):
+        page.parsed, page.parsed_cached = stored, True
+    elif stream:
+        if parser is None and res.body is None and res.entry is not None:
+            # Cached body without stored parse results: parse it from disk.
+            sink = start_parser(res.status, res.headers)
+            if sink is not None:
+                pump(res.entry.iter_body(), sink)
+        if parser is not None:
+            feed.close()
+            page.parsed = parser_result(parser.finish())
+    if res.body is not None:
+        page.body = res.body.decode(charset_from_headers(res.headers), errors="replace")
+    return page
+
+
+def parse_robots() -> Tuple[Dict[str, Any], RobotsMatcher]:
+    """Fetch robots.txt and compile the rule group that applies to USER_AGENT."""
     status, _, body = fetch_url(ROBOTS_URL)
-    disallow: List[str] = []
-    if status == 200 and body:
-        for line in body.splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if line.lower().startswith("user-agent"):
-                continue
-            if line.lower().startswith("disallow"):
-                parts = line.split(":", 1)
-                if len(parts) == 2:
-                    path = parts[1].strip()
-                    disallow.append(path or "/")
-    return {"disallow": disallow}
-
-
-def parse_sitemap_urls(sitemap_body: str) -> List[str]:
-    """Extract URLs from sitemap XML."""
-    matches = re.findall(r"<loc>(.*?)</loc>", sitemap_body)
-    urls: List[str] = []
-    for match in matches:
-        url = match.strip()
-        if url:
-            urls.append(url)
-    return urls
-
-
-def should_crawl(url: str, disallow_paths: List[str]) -> bool:
-    """Return True if URL path is allowed per robots rules."""
-    parsed = urllib.parse.urlparse(url)
-    path = parsed.path or "/"
-    for disallow in disallow_paths:
-        if disallow == "/":
-            return False
-        if disallow and path.startswith(disallow):
-            return False
-    return True
+    robots_txt = parse_robots_txt(body if status == 200 else "")
+    group = robots_txt.group_for(USER_AGENT)
+    summary = {
+        "userAgent": group.agents[0],
+        "disallow": [pattern for allow, pattern in group.rules if not allow],
+        "allow": [pattern for allow, pattern in group.rules if allow],
+        "crawlDelay": group.crawl_delay,
+        "sitemaps": robots_txt.sitemaps,
+    }
+    return summary, RobotsMatcher(group.rules, group.crawl_delay)
 
 
-@dataclass
-class PageData:
-    url: str
-    status: int
-    content_type: str
-    title: Optional[str] = None
-    meta_description: Optional[str] = None
-    meta_robots: Optional[str] = None
-    canonical: Optional[str] = None
-    h1: List[str] = field(default_factory=list)
-    h2: List[str] = field(default_factory=list)
-    h3: List[str] = field(default_factory=list)
-    internal_links: List[str] = field(default_factory=list)
-    external_links: List[str] = field(default_factory=list)
-    images_missing_alt: List[str] = field(default_factory=list)
-    structured_data: List[Dict[str, Any]] = field(default_factory=list)
-    word_count: int = 0
-    issues: List[str] = field(default_factory=list)
-
-
-class SEOHTMLParser(HTMLParser):
-    """Lightweight HTML parser to extract on-page SEO signals."""
-
-    def __init__(self) -> None:
-        super().__init__()
-        self.reset_state()
-
-    def reset_state(self) -> None:
-        self.title_chunks: List[str] = []
-        self.in_title = False
-        self.current_heading: Optional[str] = None
-        self.heading_buffer: List[str] = []
-        self.meta: Dict[str, str] = {}
+def fetch_sitemap(url: str) -> Iterator[bytes]:
+    """Stream one sitemap file (plain or .xml.gz) through the shared pool."""
+    LIMITER.acquire(url)
+    with POOL.request(url) as response:
+        LIMITER.record(url, response.status, response.timing.ttfb_ms, response.headers.get("retry-after"))
+        if response.status != 200:
+            raise OSError(f"HTTP Error {response.status}")
+        yield from response.iter_chunks()
+
+
+def should_crawl(url: str, robots: RobotsMatcher) -> bool:
+    """Return True if URL path is allowed per robots rules."""
+    return robots.allowed(url)
+
+
+class PageRecord:
+    """Compact per-page record.
+
+    The page URL and its external links are ids into the crawl's `UrlTable`;
+    internal links are not copied but referenced as the page's edge range in the
+    `LinkGraph`. Heading lists are tuples and the structured data is kept as
+    compact JSON text. `as_dict()` expands it to the report shape.
+    """
+
+    __slots__ = (
+        "url", "status", "content_type", "title", "meta_description", "meta_robots", "canonical",
+        "h1", "h2", "h3", "links", "external_links", "images_missing_alt", "structured_data",
+        "word_count", "facts", "issues", "transfer",
+    )
+
+    def __init__(self, url: int, status: int, content_type: str) -> None:
+        self.url = url
+        self.status = status
+        self.content_type = sys.intern(content_type)
+        self.title: Optional[str] = None
+        self.meta_description: Optional[str] = None
+        self.meta_robots: Optional[str] = None
         self.canonical: Optional[str] = None
-        self.h1: List[str] = []
-        self.h2: List[str] = []
-        self.h3: List[str] = []
-        self.internal_links: Set[str] = set()
-        self.external_links: Set[str] = set()
-        self.images_missing_alt: List[str] = []
-        self.ld_json_blobs: List[str] = []
-        self.in_ld_json = False
-
-    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
-        attrs_dict = {k.lower(): (v or "").strip() for k, v in attrs}
-        if tag == "title":
-            self.in_title = True
-            self.title_chunks.clear()
-        elif tag == "meta":
-            name = attrs_dict.get("name") or attrs_dict.get("property")
-            content = attrs_dict.get("content")
-            if name and content:
-                self.meta[name.lower()] = content
-        elif tag == "link":
-            rel = attrs_dict.get("rel", "").lower()
-            href = attrs_dict.get("href")
-            if "canonical" in rel and href:
-                self.canonical = href.strip()
-        elif tag in {"h1", "h2", "h3"}:
-            self.current_heading = tag
-            self.heading_buffer = []
-        elif tag == "a":
-            href = attrs_dict.get("href", "")
-            if not href:
-                return
-            href = href.split("#", 1)[0].strip()
-            if not href or href.startswith("mailto:") or href.startswith("tel:") or href.startswith("javascript:"):
-                return
-            resolved = urllib.parse.urljoin(BASE_URL, href)
-            parsed = urllib.parse.urlparse(resolved)
-            if parsed.netloc and parsed.netloc != urllib.parse.urlparse(BASE_URL).netloc:
-                self.external_links.add(resolved)
-            else:
-                self.internal_links.add(resolved)
-        elif tag == "img":
-            src = attrs_dict.get("src", "").strip()
-            alt = attrs_dict.get("alt")
-            if src and (alt is None or not alt.strip()):
-                self.images_missing_alt.append(src)
-        elif tag == "script":
-            if attrs_dict.get("type") == "application/ld+json":
-                self.in_ld_json = True
-                self.ld_json_blobs.append("")
-
-    def handle_endtag(self, tag: str) -> None:
-        if tag == "title":
-            self.in_title = False
-        elif tag in {"h1", "h2", "h3"} and self.current_heading == tag:
-            text = " ".join(self.heading_buffer).strip()
-            if text:
-                if tag == "h1":
-                    self.h1.append(text)
-                elif tag == "h2":
-                    self.h2.append(text)
-                elif tag == "h3":
-                    self.h3.append(text)
-            self.current_heading = None
-            self.heading_buffer = []
-        elif tag == "script" and self.in_ld_json:
-            self.in_ld_json = False
-
-    def handle_data(self, data: str) -> None:
-        if self.in_title:
-            self.title_chunks.append(data.strip())
-        if self.current_heading:
-            self.heading_buffer.append(data.strip())
-        if self.in_ld_json and self.ld_json_blobs:
-            self.ld_json_blobs[-1] += data
-
-    def result(self) -> Dict[str, Any]:
-        structured_data: List[Dict[str, Any]] = []
-        for blob in self.ld_json_blobs:
-            try:
-                parsed = json.loads(blob)
-                if isinstance(parsed, list):
-                    structured_data.extend(parsed)
-                else:
-                    structured_data.append(parsed)
-            except json.JSONDecodeError:
-                continue
+        self.h1: Tuple[str, ...] = ()
+        self.h2: Tuple[str, ...] = ()
+        self.h3: Tuple[str, ...] = ()
+        self.links = (0, 0)
+        self.external_links = array("I")
+        self.images_missing_alt: Tuple[str, ...] = ()
+        self.structured_data = "[]"
+        self.word_count = 0
+        self.facts: Optional[Dict[str, Any]] = None
+        self.issues: List[str] = []
+        self.transfer: Optional[Dict[str, Any]] = None
+
+    def as_dict(self, graph: LinkGraph) -> Dict[str, Any]:
+        urls = graph.urls
         return {
-            "title": " ".join(chunk for chunk in self.title_chunks if chunk).strip() or None,
-            "meta": self.meta,
+            "url": urls.url(self.url),
+            "status": self.status,
+            "content_type": self.content_type,
+            "title": self.title,
+            "meta_description": self.meta_description,
+            "meta_robots": self.meta_robots,
             "canonical": self.canonical,
-            "h1": self.h1,
-            "h2": self.h2,
-            "h3": self.h3,
-            "internal_links": sorted(self.internal_links),
-            "external_links": sorted(self.external_links),
-            "images_missing_alt": self.images_missing_alt,
-            "structured_data": structured_data,
+            "h1": list(self.h1),
+            "h2": list(self.h2),
+            "h3": list(self.h3),
+            "internal_links": urls.urls(graph.link_range(*self.links)),
+            "external_links": urls.urls(self.external_links),
+            "images_missing_alt": list(self.images_missing_alt),
+            "structured_data": json.loads(self.structured_data),
+            "word_count": self.word_count,
+            "facts": self.facts or {},
+            "issues": self.issues,
+            "transfer": self.transfer,
         }
 
 
-def collect_word_count(html: str) -> int:
-    """Approximate body word count by stripping tags."""
-    text = re.sub(r"(?is)<(script|style).*?>.*?</\\1>", " ", html)
-    text = re.sub(r"(?s)<.*?>", " ", text)
-    words = [w for w in re.split(r"\\s+", text) if w]
-    return len(words)
-
+def split_links(hrefs: List[str]) -> Tuple[List[str], List[str]]:
+    """Resolve raw hrefs against BASE_URL into sorted (internal, external) lists."""
+    internal: Set[str] = set()
+    external: Set[str] = set()
+    base_netloc = urllib.parse.urlparse(BASE_URL).netloc
+    for href in hrefs:
+        href = href.split("#", 1)[0].strip()
+        if not href or href.startswith("mailto:") or href.startswith("tel:") or href.startswith("javascript:"):
+            continue
+        resolved = urllib.parse.urljoin(BASE_URL, href)
+        parsed = urllib.parse.urlparse(resolved)
+        if parsed.netloc and parsed.netloc != base_netloc:
+            external.add(resolved)
+        else:
+            internal.add(resolved)
+    return sorted(internal), sorted(external)
 
-def crawl() -> Dict[str, Any]:
-    robots = parse_robots()
-    disallow_paths = robots.get("disallow", [])
 
-    sitemap_status, _, sitemap_body = fetch_url(SITEMAP_URL)
-    sitemap_urls: List[str] = []
-    if sitemap_status == 200 and sitemap_body:
-        sitemap_urls = parse_sitemap_urls(sitemap_body)
+def parse_page(body: str) -> Dict[str, Any]:
+    """Extract on-page signals and rule issues from an HTML document (cacheable as JSON)."""
+    return parser_result(parse_html(body, RULES, backend=PARSER_BACKEND))
 
-    queue: deque[str] = deque()
-    visited: Set[str] = set()
-    for url in sitemap_urls:
-        if should_crawl(url, disallow_paths):
-            queue.append(url)
 
-    if not queue:
-        queue.append(BASE_URL)
+def parser_result(page: ParsedPage) -> Dict[str, Any]:
+    structured_data: List[Dict[str, Any]] = []
+    for blob in page.ld_json:
+        try:
+            parsed = json.loads(blob)
+            if isinstance(parsed, list):
+                structured_data.extend(parsed)
+            else:
+                structured_data.append(parsed)
+        except json.JSONDecodeError:
+            continue
+    internal_links, external_links = split_links(page.links)
+    return {
+        "title": page.title,
+        "meta": page.meta,
+        "canonical": page.canonical,
+        "h1": page.h1,
+        "h2": page.h2,
+        "h3": page.h3,
+        "internal_links": internal_links,
+        "external_links": external_links,
+        "images_missing_alt": page.images_missing_alt,
+        "structured_data": structured_data,
+        "word_count": None if page.partial else page.word_count,
+        "partial": page.partial,
+        "facts": page.facts,
+        "issues": [issue.as_dict() for issue in page.issues],
+        "parse_error": page.parse_error,
+    }
 
-    pages: List[PageData] = []
 
-    while queue and len(visited) < MAX_PAGES:
-        url = queue.popleft()
-        if url in visited:
+def crawl() -> Dict[str, Any]:
+    robots, robots_matcher = parse_robots()
+    if robots["crawlDelay"] is not None:
+        LIMITER.set_min_delay(robots["crawlDelay"])
+
+    # Sitemap URLs (including sitemap-index children) are pulled lazily, one per
+    # page, while the remaining child sitemaps download in the background.
+    sitemap = SitemapReader(fetch_sitemap)
+    records = sitemap.read(SITEMAP_URL)
+
+    def next_sitemap_url() -> Optional[str]:
+        for record in records:
+            if should_crawl(record.loc, robots_matcher):
+                return record.loc
+        return None
+
+    checkpoint = CrawlCheckpoint(CHECKPOINT_PATH, resume=RESUME)
+    # URLs are interned once; the visited set, the queue and the link graph hold int ids.
+    graph = LinkGraph()
+    urls = graph.urls
+    queue: deque[int] = deque()
+    visited = IdSet()
+    pages = JsonlWriter(PAGES_JSONL)
+    # Page body bytes on the wire and after decompression, over complete downloads.
+    transferred = TransferSize(complete=True)
+
+    def count_transfer(record: Dict[str, Any]) -> None:
+        transfer = record.get("transfer")
+        if transfer and transfer["complete"]:
+            transferred.wire_bytes += transfer["wire_bytes"]
+            transferred.decoded_bytes += transfer["decoded_bytes"]
+
+    if RESUME:
+        for url in checkpoint.done_urls():
+            visited.add(urls.id(url))
+        queue.extend(urls.id(url) for url, _ in checkpoint.pending())
+        for _, record in checkpoint.records():
+            pages.write(record)
+            count_transfer(record)
+            graph.add_links(urls.id(record["url"]), (urls.id(link) for link in record["internal_links"]))
+        print(f"Resuming from {CHECKPOINT_PATH}: {pages.count} pages done, {len(queue)} queued", file=sys.stderr)
+
+    first = next_sitemap_url()
+    if first is None and not visited:
+        queue.append(urls.id(BASE_URL))
+        checkpoint.queue(BASE_URL)
+
+    while len(visited) < MAX_PAGES:
+        # Sitemap URLs first, then links queued from crawled pages.
+        url, first = first, None
+        if url is not None:
+            url_id = urls.id(url)
+        else:
+            url = next_sitemap_url()
+            if url is not None:
+                url_id = urls.id(url)
+            elif queue:
+                url_id = queue.popleft()
+                url = urls.url(url_id)
+            else:
+                break
+        if not visited.add(url_id):
             continue
-        visited.add(url)
-        status, headers, body = fetch_url(url)
+        fetched = fetch_page(url, STREAM)
+        status, headers = fetched.status, fetched.headers
         content_type = headers.get("content-type", "")
 
-        page = PageData(
-            url=url,
-            status=status,
-            content_type=content_type,
-        )
-
-        if status == 200 and body and "html" in content_type:
-            parser = SEOHTMLParser()
-            try:
-                parser.feed(body)
-            except Exception as exc:  # noqa: BLE001
-                page.issues.append(f"HTML parse error: {exc}")
-            result = parser.result()
-            page.title = result["title"]
-            page.meta_description = parser.meta.get("description") if hasattr(parser, "meta") else None
-            if not page.meta_description and result["meta"].get("og:description"):
-                page.meta_description = result["meta"]["og:description"]
-            page.meta_robots = result["meta"].get("robots")
-            page.canonical = result["canonical"]
-            page.h1 = result["h1"]
-            page.h2 = result["h2"]
-            page.h3 = result["h3"]
-            page.internal_links = result["internal_links"]
-            page.external_links = result["external_links"]
-            page.images_missing_alt = result["images_missing_alt"]
-            page.structured_data = result["structured_data"]
-            page.word_count = collect_word_count(body)
-
-            # basic issue detection
-            if len(page.h1) != 1:
-                page.issues.append(f"Expected 1 H1, found {len(page.h1)}")
-            if not page.meta_description:
-                page.issues.append("Missing meta description")
-            if not page.canonical:
-                page.issues.append("Missing canonical tag")
-            if page.word_count < 300:
-                page.issues.append(f"Low word count ({page.word_count})")
-            if page.images_missing_alt:
-                page.issues.append(f"{len(page.images_missing_alt)} images missing alt text")
+        page = PageRecord(url_id, status, content_type)
+        if fetched.transfer is not None:
+            page.transfer = fetched.transfer.as_dict()
+
+        if status == 200 and (fetched.body or fetched.parsed) and "html" in content_type:
+            parsed = fetched.parsed
+            if parsed is None:
+                parsed = parse_page(fetched.body)
+            if CACHE is not None and not fetched.parsed_cached and not parsed.get("partial"):
+                CACHE.save_parsed(url, parsed)
+            if parsed["parse_error"]:
+                page.issues.append(f"HTML parse error: {parsed['parse_error']}")
+            page.title = parsed["title"]
+            page.meta_description = parsed["meta"].get("description") or parsed["meta"].get("og:description")
+            page.meta_robots = parsed["meta"].get("robots")
+            page.canonical = parsed["canonical"]
+            page.h1 = tuple(parsed["h1"])
+            page.h2 = tuple(parsed["h2"])
+            page.h3 = tuple(parsed["h3"])
+            page.external_links = array("I", map(urls.id, parsed["external_links"]))
+            page.images_missing_alt = tuple(parsed["images_missing_alt"])
+            page.structured_data = json.dumps(parsed["structured_data"], separators=(",", ":"))
+            page.word_count = parsed["word_count"]
+            page.facts = parsed["facts"]
+            page.issues.extend(issue["message"] for issue in parsed["issues"])
+            page.links = graph.add_links(url_id, map(urls.id, parsed["internal_links"]))
 
             # queue new internal links
             if FOLLOW_INTERNAL_LINKS:
-                for link in page.internal_links:
-                    if link not in visited and should_crawl(link, disallow_paths):
-                        queue.append(link)
+                for link_id in graph.link_range(*page.links):
+                    if link_id not in visited:
+                        link = urls.url(link_id)
+                        if should_crawl(link, robots_matcher):
+                            queue.append(link_id)
+                            checkpoint.queue(link)
         else:
             if status == 0:
                 page.issues.append("Request failed")
             elif status >= 400:
                 page.issues.append(f"HTTP error {status}")
 
-        pages.append(page)
-        time.sleep(CRAWL_DELAY)
+        record = page.as_dict(graph)
+        pages.write(record)
+        count_transfer(record)
+        # Failed requests are not checkpointed, so a resumed crawl retries them.
+        if status:
+            checkpoint.done(url, record)
+
+    # Count the rest of the sitemap without keeping it (or stop its downloads if it failed).
+    for _ in records:
+        pass
+    records.close()
+    checkpoint.close()
+    pages.close()
 
     return {
         "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "robots": robots,
         "sitemap": {
-            "status": sitemap_status,
-            "urlCount": len(sitemap_urls),
+            "status": 0 if any(url == SITEMAP_URL for url, _ in sitemap.errors) else 200,
+            "urlCount": sitemap.stats.urls,
+            "sitemapFiles": sitemap.stats.sitemaps,
+            "errors": [{"url": url, "error": error} for url, error in sitemap.errors],
+        },
+        "pagesCrawled": pages.count,
+        "transfer": {
+            "wireBytes": transferred.wire_bytes,
+            "decodedBytes": transferred.decoded_bytes,
+            "ratio": round(transferred.ratio, 2),
         },
-        "pagesCrawled": len(pages),
-        "pages": [asdict(page) for page in pages],
+        "linkGraph": {"urls": len(urls), "links": len(graph)},
+        "connectionPool": {
+            "poolSize": POOL.pool_size,
+            "http2": POOL.http2,
+            **POOL.stats.as_dict(),
+        },
+        "parserBackend": PARSER_BACKEND,
+        "headOnly": STOP_AFTER,
+        "cache": CACHE.stats.as_dict() if CACHE is not None else None,
+        "rateLimiter": {**LIMITER.stats.as_dict(), "delays": LIMITER.delays()},
+        "pagesFile": PAGES_JSONL,
     }
 
 
 def main() -> None:
-    result = crawl()
-    json.dump(result, sys.stdout, indent=2)
+    global CACHE, STREAM, CHECKPOINT_PATH, RESUME, PAGES_JSONL, PARSER_BACKEND, RULES, STOP_AFTER
+    parser = argparse.ArgumentParser(description="Deep SEO crawl of drsayuj.info (JSON to stdout).")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="Idle keep-alive connections kept per host")
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 when httpx[http2] is installed")
+    parser.add_argument("--cache-dir", help="Directory for the conditional-GET response cache")
+    parser.add_argument("--stream", action="store_true", help="Parse pages chunk by chunk while they download")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="SQLite file the crawl state is saved to")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted crawl from --checkpoint")
+    parser.add_argument("--pages-jsonl", default=PAGES_JSONL, help="JSON Lines file page records are appended to")
+    parser.add_argument("--parser-backend", choices=BACKENDS, default=PARSER_BACKEND,
+                        help="HTML tokenizer; lxml (C, faster) falls back to html.parser when not installed")
+    parser.add_argument("--head-only", nargs="?", const="head", choices=STOP_POINTS, default=None,
+                        help="Stream each page and stop reading at </head> (or after the first </h1> with 'h1'); "
+                             "only head rules run and body links are not collected")
+    args = parser.parse_args()
+
+    PARSER_BACKEND = resolve_backend(args.parser_backend)
+    STREAM = args.stream or bool(args.head_only)
+    if args.head_only:
+        STOP_AFTER = args.head_only
+        RULES = default_rules(head_only=True)
+    CHECKPOINT_PATH, RESUME = args.checkpoint, args.resume
+    PAGES_JSONL = args.pages_jsonl
+    if args.cache_dir:
+        CACHE = ResponseCache(args.cache_dir)
+    pool = configure_pool(args.pool_size, args.http2)
+    try:
+        result = crawl()
+    finally:
+        pool.close()
+    stats = result["connectionPool"]
+    print(
+        f"Connections: {stats['connections_opened']} opened, {stats['connections_reused']} reused "
+        f"across {stats['requests']} requests (reuse {stats['reuse_ratio']:.0%})",
+        file=sys.stderr,
+    )
+    transfer = result["transfer"]
+    print(
+        f"Transfer: {transfer['wireBytes'] / 1024:.1f} KB on the wire, "
+        f"{transfer['decodedBytes'] / 1024:.1f} KB decoded ({transfer['ratio']:.2f}x)",
+        file=sys.stderr,
+    )
+    if result["cache"] is not None:
+        cache_stats = result["cache"]
+        print(
+            f"Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['revalidated']} revalidated",
+            file=sys.stderr,
+        )
+    # The page records are streamed from the JSONL file rather than held in memory.
+    write_json_stream(sys.stdout, result, "pages", iter_jsonl(result["pagesFile"]))
 
 
 if __name__ == "__main__":